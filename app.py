@@ -4,7 +4,13 @@ YouTubeコメント構文抽出ツール
 """
 import streamlit as st
 import json
-from src.orchestrator import YouTubeCommentOrchestrator
+import time
+from src.progress_events import (
+    STAGES as PROGRESS_STAGES, STAGE_START, STAGE_FINISH, VIDEO_VERDICT, ITEMS, RESULT, RUN_FINISH,
+    PASSED, FAILED, SKIPPED, REUSED,
+)
+from src.resources import Resources, get_resources
+from src.run_config import RunConfig
 
 st.set_page_config(
     page_title="YouTube Comment Analyzer",
@@ -12,6 +18,14 @@ st.set_page_config(
     layout="wide"
 )
 
+
+
+@st.cache_resource(validate=lambda resources: resources.healthy())
+def load_resources() -> Resources:
+    """ルーター・YouTubeクライアント・レジストリ・結果ストア（再描画・セッションをまたいで使い回す）"""
+    return get_resources()
+
+
 # タイトル
 st.title("🎯 YouTubeコメント構文抽出ツール")
 st.markdown("**YouTuberが喋るだけで動画になる「ネタパック」を自動生成**")
@@ -24,10 +38,16 @@ with st.sidebar:
     st.info("`.env`ファイルでAPIキーを設定してください")
 
     st.markdown("### 処理設定")
-    max_videos = st.slider("検索動画数（クエリあたり）", 1, 5, 3)
-    max_comments = st.slider("取得コメント数", 50, 300, 200)
-    quality_threshold = st.slider("品質スコア閾値", 5.0, 9.0, 7.0, 0.5)
-    max_retry = st.slider("最大再試行回数", 1, 5, 2)
+    # 初期値は環境変数（.env）の設定
+    defaults = RunConfig.from_env()
+    max_videos = st.slider("検索動画数（クエリあたり）", 1, 5, min(max(defaults.max_search_results, 1), 5))
+    max_comments = st.slider("取得コメント数", 50, 300, min(max(defaults.max_comments, 50), 300))
+    quality_threshold = st.slider("品質スコア閾値", 5.0, 9.0, min(max(defaults.quality_threshold, 5.0), 9.0), 0.5)
+    max_retry = st.slider("最大再試行回数", 1, 5, min(max(defaults.max_retry, 1), 5))
+    target_results = st.number_input(
+        "目標ネタパック数（0=無制限）", min_value=0, max_value=20, value=min(defaults.target_results, 20),
+        help="品質評価に合格したネタパックがこの件数に達したら残りの動画の処理を打ち切ります"
+    )
 
     st.markdown("---")
     st.markdown("### 💡 使い方")
@@ -38,6 +58,12 @@ with st.sidebar:
     4. ネタパックが生成されます！
     """)
 
+    with st.expander("🩺 リソース状態"):
+        try:
+            st.json(load_resources().health())
+        except Exception as e:
+            st.error(f"リソースを初期化できません: {str(e)}")
+
 # メイン
 input_text = st.text_area(
     "探したいネタを入力してください",
@@ -52,94 +78,158 @@ with col2:
     clear_button = st.button("🗑️ クリア", use_container_width=True)
 
 if clear_button:
+    run = st.session_state.pop("run", None)
+    if run:
+        run.cancel()
+    st.session_state.pop("events", None)
     st.rerun()
 
 if analyze_button:
     if not input_text:
         st.error("テキストを入力してください")
     else:
-        # 環境変数を一時的に上書き
-        import os
-        os.environ["MAX_SEARCH_RESULTS"] = str(max_videos)
-        os.environ["MAX_COMMENTS_PER_VIDEO"] = str(max_comments)
-        os.environ["QUALITY_THRESHOLD"] = str(quality_threshold)
-        os.environ["MAX_RETRY_ATTEMPTS"] = str(max_retry)
+        # 処理設定はセッションごとにオーケストレーターへ渡す（os.environを書き換えると他のセッションの実行と競合する）
+        config = RunConfig.from_env(
+            max_search_results=max_videos,
+            max_comments=max_comments,
+            quality_threshold=quality_threshold,
+            max_retry=max_retry,
+            target_results=int(target_results)
+        )
+
+        previous = st.session_state.get("run")
+        if previous:
+            previous.cancel()
+
+        # 常駐リソースでバックグラウンド実行し、進捗イベントを再描画のたびに取り出して表示
+        # （同じ入力・設定で完了済みの実行はキャッシュから即座に再生）
+        try:
+            st.session_state["run"] = load_resources().start_run(input_text, config)
+            st.session_state["events"] = []
+        except Exception as e:
+            st.error(f"エラーが発生しました: {str(e)}")
 
-        # プログレスバー
-        progress_bar = st.progress(0)
-        status_text = st.empty()
 
-        with st.spinner("処理中..."):
-            try:
-                # オーケストレーター実行
-                orchestrator = YouTubeCommentOrchestrator(verbose=False)
+def render_result(i: int, result: dict):
+    """確定した1動画分のネタパックを表示"""
+    with st.expander(f"📹 動画 {i}: {result['video_info']['title']}", expanded=True):
+        if result.get('warning'):
+            st.warning(result['warning'])
 
-                status_text.text("検索ワード生成中...")
-                progress_bar.progress(20)
+        # 動画情報
+        col_a, col_b = st.columns([2, 1])
 
-                results = orchestrator.process(input_text)
+        with col_a:
+            st.markdown(f"**チャンネル:** {result['video_info']['channel_title']}")
+            st.markdown(f"**URL:** {result['video_info']['url']}")
 
-                progress_bar.progress(100)
-                status_text.text("完了！")
+            # 動画埋め込み
+            video_id = result['video_info']['video_id']
+            st.video(f"https://www.youtube.com/watch?v={video_id}")
 
-                if results:
-                    st.success(f"✅ {len(results)}件のネタパックを生成しました！")
+        with col_b:
+            st.markdown("### 📊 スコア")
+            st.metric("スクリーニング", f"{result['screening_result']['score']}/10")
+            st.metric("品質評価", f"{result['evaluation']['total_score']}/10")
+            st.metric("ネタ数", len(result['analysis']))
+            st.metric("試行回数", result['attempts'])
 
-                    # 結果表示
-                    for i, result in enumerate(results, 1):
-                        with st.expander(f"📹 動画 {i}: {result['video_info']['title']}", expanded=True):
-                            # 動画情報
-                            col_a, col_b = st.columns([2, 1])
+        # ネタパック表示
+        st.markdown("### 🎯 ネタパック")
 
-                            with col_a:
-                                st.markdown(f"**チャンネル:** {result['video_info']['channel_title']}")
-                                st.markdown(f"**URL:** {result['video_info']['url']}")
+        # 構文タグでグループ化
+        tags = list(set([item['構文タグ'] for item in result['analysis']]))
+        tabs = st.tabs(tags)
 
-                                # 動画埋め込み
-                                video_id = result['video_info']['video_id']
-                                st.video(f"https://www.youtube.com/watch?v={video_id}")
+        for tab, tag in zip(tabs, tags):
+            with tab:
+                filtered_items = [item for item in result['analysis'] if item['構文タグ'] == tag]
 
-                            with col_b:
-                                st.markdown("### 📊 スコア")
-                                st.metric("スクリーニング", f"{result['screening_result']['score']}/10")
-                                st.metric("品質評価", f"{result['evaluation']['total_score']}/10")
-                                st.metric("ネタ数", len(result['analysis']))
-                                st.metric("試行回数", result['attempts'])
+                for item in filtered_items:
+                    with st.container():
+                        st.markdown(f"**💬 コメント:** {item['元コメント']}")
+                        st.markdown(f"**🎭 いじりポイント:** {item['いじりポイント']}")
+                        st.markdown(f"**💥 ツッコミ例:** _{item['ツッコミ例']}_")
 
-                            # ネタパック表示
-                            st.markdown("### 🎯 ネタパック")
+                        if 'related_scene' in item or '関連シーン' in item:
+                            scene = item.get('関連シーン', item.get('related_scene', {}))
+                            st.markdown(f"**🎬 関連シーン:** [{scene.get('タイムスタンプ', 'N/A')}] {scene.get('シーン説明', '')}")
+                            st.markdown(f"**🔗 関連度:** {scene.get('関連度', 'N/A')}/10")
 
-                            # 構文タグでグループ化
-                            tags = list(set([item['構文タグ'] for item in result['analysis']]))
-                            tabs = st.tabs(tags)
+                        st.markdown("---")
 
-                            for tab, tag in zip(tabs, tags):
-                                with tab:
-                                    filtered_items = [item for item in result['analysis'] if item['構文タグ'] == tag]
+        # JSON出力
+        with st.expander("📄 JSON出力"):
+            st.json(result['analysis'])
 
-                                    for item in filtered_items:
-                                        with st.container():
-                                            st.markdown(f"**💬 コメント:** {item['元コメント']}")
-                                            st.markdown(f"**🎭 いじりポイント:** {item['いじりポイント']}")
-                                            st.markdown(f"**💥 ツッコミ例:** _{item['ツッコミ例']}_")
 
-                                            if 'related_scene' in item or '関連シーン' in item:
-                                                scene = item.get('関連シーン', item.get('related_scene', {}))
-                                                st.markdown(f"**🎬 関連シーン:** [{scene.get('タイムスタンプ', 'N/A')}] {scene.get('シーン説明', '')}")
-                                                st.markdown(f"**🔗 関連度:** {scene.get('関連度', 'N/A')}/10")
+VERDICT_LABELS = {
+    PASSED: "✅ 合格",
+    FAILED: "❌ 不合格",
+    SKIPPED: "⏭️ スキップ",
+    REUSED: "♻️ 再利用",
+}
 
-                                            st.markdown("---")
+run = st.session_state.get("run")
+if run:
+    events = st.session_state["events"]
+    # 終了したかを先に読んでから取り出す（逆順だと、その間に届いた最後のイベントを表示しないまま再描画を止めてしまう）
+    running = run.running
+    events.extend(run.drain())
 
-                            # JSON出力
-                            with st.expander("📄 JSON出力"):
-                                st.json(result['analysis'])
+    # 進捗（ステージ: 検索ワード10% → 検索20% → スクリーニング40% → 分析は確定した動画数に応じて100%まで）
+    finished = {e['stage']: e['count'] for e in events if e['type'] == STAGE_FINISH}
+    started = [e['stage'] for e in events if e['type'] == STAGE_START]
+    results = [e['result'] for e in events if e['type'] == RESULT]
+    progress = {"queries": 10, "search": 20, "screening": 40}
+    value = max([progress.get(stage, 0) for stage in finished] + [0])
+    if "screening" in finished:
+        value += int(60 * len(results) / max(finished["screening"], 1))
+    finish = next((e for e in events if e['type'] == RUN_FINISH), None)
+    if finish:
+        value = 100
+    st.progress(min(value, 100))
 
-                else:
-                    st.warning("ネタになる動画が見つかりませんでした。別のキーワードで試してください。")
+    if finish and finish['error']:
+        st.error(f"エラーが発生しました: {finish['error']}")
+    elif finish and run.cached:
+        st.caption("♻️ 同じ入力・設定の前回の結果を表示しています")
+    elif finish:
+        st.caption("完了！")
+    elif started:
+        st.caption(f"{PROGRESS_STAGES[started[-1]]}中...")
 
-            except Exception as e:
-                st.error(f"エラーが発生しました: {str(e)}")
-                st.exception(e)
+    col_status, col_cancel = st.columns([4, 1])
+    with col_cancel:
+        if running and st.button("⏹️ 中止", use_container_width=True):
+            run.cancel()
+    with col_status:
+        verdicts = [e for e in events if e['type'] == VIDEO_VERDICT]
+        if verdicts:
+            with st.expander(f"💬 スクリーニング判定（{len(verdicts)}件）", expanded=not results):
+                for e in verdicts:
+                    score = f"（{e['score']}/10）" if e['score'] is not None else ""
+                    st.markdown(f"{VERDICT_LABELS[e['verdict']]}{score} {e['title']}  \n{e['reason'] or ''}")
+
+    # 分析途中のネタ（品質評価前、確定した動画は除く）
+    done_ids = {r['video_info']['video_id'] for r in results}
+    partial = {e['video_id']: e for e in events if e['type'] == ITEMS and e['video_id'] not in done_ids}
+    for e in partial.values():
+        with st.expander(f"⏳ 分析中: {e['title']}（試行{e['attempt']}回目・品質評価前）"):
+            for item in e['items']:
+                st.markdown(f"**💬** {item.get('元コメント', '')} → _{item.get('ツッコミ例', '')}_")
+
+    if results:
+        st.success(f"✅ {len(results)}件のネタパックを生成しました！" if finish else f"{len(results)}件のネタパックが確定しました")
+        for i, result in enumerate(results, 1):
+            render_result(i, result)
+    elif finish and not finish['error']:
+        st.warning("ネタになる動画が見つかりませんでした。別のキーワードで試してください。")
+
+    if running:
+        # 実行中は定期的に再描画して届いたイベントを反映
+        time.sleep(1)
+        st.rerun()
 
 else:
     # 初期表示
@@ -154,3 +244,56 @@ else:
         - 料理の失敗動画
         - 迷惑系YouTuberの動画
         """)
+
+# 保存済みネタの検索
+st.markdown("---")
+st.header("🔎 保存済みネタを検索")
+
+# 結果ストアは常駐リソースのものを使う（再描画のたびに接続を開かない）
+try:
+    store = load_resources().result_store
+except Exception as e:
+    store = None
+    st.error(f"結果ストアを開けません: {str(e)}")
+
+if store is not None and not store.enabled:
+    st.info("結果ストアが無効です（`RESULT_STORE_ENABLED=false`）")
+elif store is not None:
+    col_q, col_tag, col_channel, col_score = st.columns([3, 2, 2, 1])
+    with col_q:
+        search_text = st.text_input("キーワード（元コメント・ツッコミ例など）")
+    with col_tag:
+        tag_options = ["（すべて）"] + [tag for tag, _ in store.tags()]
+        search_tag = st.selectbox("構文タグ", tag_options)
+    with col_channel:
+        search_channel = st.text_input("チャンネル")
+    with col_score:
+        search_min_score = st.number_input("品質スコア下限", 0.0, 10.0, 0.0, 0.5)
+
+    items = store.search(
+        text=search_text or None,
+        tag=None if search_tag == "（すべて）" else search_tag,
+        channel=search_channel or None,
+        min_score=search_min_score or None,
+        limit=100
+    )
+    if items:
+        st.caption(f"{len(items)}件")
+        st.dataframe(
+            [
+                {
+                    "構文タグ": item['構文タグ'],
+                    "元コメント": item['元コメント'],
+                    "ツッコミ例": item['ツッコミ例'],
+                    "シーン": f"[{item['関連シーン']['タイムスタンプ']}] {item['関連シーン']['シーン説明']}",
+                    "動画": item['title'],
+                    "チャンネル": item['channel_title'],
+                    "品質": item['quality_score'],
+                    "URL": item['url'],
+                }
+                for item in items
+            ],
+            use_container_width=True
+        )
+    else:
+        st.caption("該当するネタはありません")
@@ -0,0 +1,4 @@
+"""
+ベンチマークスイート
+偽バックエンドでオーケストレーター・各ステージを計測
+"""
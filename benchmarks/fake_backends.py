@@ -0,0 +1,401 @@
+"""
+偽バックエンド
+カセット（src/cassette.py）と同じ差し込み口で、OpenAI・YouTube・字幕API・yt-dlpの
+レスポンスを現実的なレイテンシとペイロードサイズの分布で合成する
+"""
+import hashlib
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+from config import prompt_template as T
+from src.cassette import Cassette
+from src.utils import estimate_tokens
+
+# systemメッセージ（固定プレフィックス）からステージを判別
+SYSTEM_PROMPT_STAGES = {
+    T.SEARCH_QUERY_GENERATOR_PREFIX: "query_generation",
+    T.COMMENT_SCREENING_PREFIX: "screening",
+    T.COMMENT_SCREENING_BATCH_PREFIX: "screening_batch",
+    T.COMMENT_SCREEN_AND_FILTER_PREFIX: "screen_and_filter",
+    T.COMMENT_FILTERING_PREFIX: "filtering",
+    T.COMMENT_ANALYSIS_PREFIX: "analysis",
+    T.QUALITY_EVALUATION_PREFIX: "evaluation",
+    T.QUALITY_EVALUATION_BATCH_PREFIX: "evaluation_batch",
+}
+
+# YouTube Data APIのクォータ消費（ユニット）
+QUOTA_UNITS = {
+    "youtube.search.list": 100,
+    "youtube.commentThreads.list": 1,
+    "youtube.videos.list": 1,
+}
+
+# OpenAIのプロンプトキャッシュが効く最小プレフィックス長
+CACHE_MIN_TOKENS = 1024
+
+COMMENT_LINE_PATTERN = re.compile(r'^\d+\. (.*)$', re.MULTILINE)
+TIMESTAMP_LINE_PATTERN = re.compile(r'^\[(\d+:\d{2}(?::\d{2})?)\]', re.MULTILINE)
+VIDEO_ID_PATTERN = re.compile(r'動画ID: (\S+)')
+TARGET_COUNT_PATTERN = re.compile(r'## 選定件数\n(\d+)件')
+
+COMMENT_WORDS = [
+    "だから", "女は", "運転", "するな", "草", "これは", "男でも", "無理", "免許返納", "しろ",
+    "最近の若者は", "完全に", "信号無視", "じゃん", "マジで", "ありえない", "普通", "わかる",
+]
+
+
+class FakeBackendError(Exception):
+    """偽バックエンドが注入する一時的なエラー（5xx相当）"""
+
+
+class FakeBackend(Cassette):
+    """
+    シナリオ設定に従ってレスポンスを合成するカセット互換バックエンド
+
+    再生モード扱いなのでAPIキー・ネットワークは不要。
+    呼び出し種別ごとの回数・トークン数・クォータ・転送バイト数を集計する。
+    """
+
+    def __init__(self, scenario: Dict, latency_scale: float = 1.0, seed: int = 0):
+        super().__init__(mode="replay")
+        self.scenario = scenario
+        self.latency_scale = latency_scale
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._seen_prefixes = set()
+        self._video_ids: Dict[str, int] = {}
+        # 合成した音声ファイルの内容ハッシュ → バイト数（文字起こしのキーから音声長を逆算する）
+        self._audio_sizes: Dict[str, int] = {}
+        self.metrics = {
+            "calls": {},
+            "errors": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cached_tokens": 0,
+            "quota_units": 0,
+            "audio_seconds": 0.0,
+            "bytes_transferred": 0,
+        }
+
+    def _dispatch(
+        self,
+        kind: str,
+        request: Dict,
+        live_fn: Callable[[], Any],
+        on_replay: Optional[Callable[[Any], None]] = None
+    ) -> Any:
+        handler = {
+            "openai.chat.completions": self._chat,
+            "openai.audio.transcriptions": self._transcription,
+            "youtube.search.list": self._search,
+            "youtube.commentThreads.list": self._comment_threads,
+            "youtube.videos.list": self._videos,
+            "youtube_transcript_api.fetch": self._transcript,
+            "subprocess.yt-dlp": self._yt_dlp,
+        }.get(kind)
+        if handler is None:
+            raise FakeBackendError(f"未対応の呼び出し種別です: {kind}")
+
+        with self._lock:
+            self.metrics["calls"][kind] = self.metrics["calls"].get(kind, 0) + 1
+            self.metrics["quota_units"] += QUOTA_UNITS.get(kind, 0)
+            fail = self.rng.random() < self.scenario.get("error_rate", 0.0)
+
+        response, latency, size = handler(request)
+        self._sleep(latency)
+
+        with self._lock:
+            self.metrics["bytes_transferred"] += size
+            if fail:
+                self.metrics["errors"] += 1
+        if fail:
+            raise FakeBackendError(f"503 Service Unavailable ({kind})")
+
+        if on_replay:
+            on_replay(response)
+        return response
+
+    # ========================================
+    # 乱数・レイテンシ
+    # ========================================
+    def _lognormal(self, median: float, sigma: float = 0.5) -> float:
+        with self._lock:
+            return median * math.exp(self.rng.gauss(0, sigma))
+
+    def _uniform(self, low: float, high: float) -> float:
+        with self._lock:
+            return self.rng.uniform(low, high)
+
+    def _chance(self, probability: float) -> bool:
+        with self._lock:
+            return self.rng.random() < probability
+
+    def _sleep(self, latency: float):
+        delay = latency * self.latency_scale
+        if delay > 0:
+            time.sleep(delay)
+
+    def _video_index(self, video_id: str) -> int:
+        """動画IDごとに安定した連番（字幕有無・音声長などの決定に使う）"""
+        with self._lock:
+            return self._video_ids.setdefault(video_id, len(self._video_ids))
+
+    # ========================================
+    # OpenAI
+    # ========================================
+    def _chat(self, request: Dict):
+        messages = request.get("messages", [])
+        system = messages[0]["content"] if messages else ""
+        user = messages[-1]["content"] if messages else ""
+        stage = SYSTEM_PROMPT_STAGES.get(system, "unknown")
+
+        content = {
+            "query_generation": self._gen_queries,
+            "screening": self._gen_screening,
+            "screening_batch": self._gen_screening_batch,
+            "screen_and_filter": self._gen_screen_and_filter,
+            "filtering": self._gen_filtering,
+            "analysis": self._gen_analysis,
+            "evaluation": self._gen_evaluation,
+            "evaluation_batch": self._gen_evaluation_batch,
+        }.get(stage, lambda u: "{}")(user)
+
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        completion_tokens = min(estimate_tokens(content), request.get("max_tokens", 4000))
+        prefix_tokens = estimate_tokens(system)
+        with self._lock:
+            cached = prefix_tokens if (system in self._seen_prefixes and prefix_tokens >= CACHE_MIN_TOKENS) else 0
+            self._seen_prefixes.add(system)
+            self.metrics["prompt_tokens"] += prompt_tokens
+            self.metrics["completion_tokens"] += completion_tokens
+            self.metrics["cached_tokens"] += cached
+
+        # 入力処理 + 出力生成時間（キャッシュヒット分は入力処理が速い）
+        latency = self._lognormal(
+            0.3 + (prompt_tokens - cached * 0.8) * 0.00005 + completion_tokens * 0.012,
+            self.scenario.get("llm_latency_sigma", 0.4)
+        )
+        if self._chance(self.scenario.get("slow_call_rate", 0.0)):
+            latency *= 8  # テールレイテンシ
+
+        response = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": 0,
+            "model": request.get("model", ""),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content}
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached}
+            }
+        }
+        return response, latency, len(content.encode('utf-8')) + sum(len(m["content"].encode('utf-8')) for m in messages)
+
+    def _json(self, data) -> str:
+        import json
+        return "```json\n" + json.dumps(data, ensure_ascii=False) + "\n```"
+
+    def _screening_slot(self) -> Dict:
+        passed = self._chance(self.scenario.get("screening_pass_rate", 0.6))
+        score = round(self._uniform(7.5, 9.5) if passed else self._uniform(2.0, 4.5), 1)
+        return {
+            "score": score,
+            "passed": passed,
+            "reason": "ツッコミどころのあるコメントが多い" if passed else "コメントが平凡",
+            "example_comments": ["だから女は運転するなって..."],
+            "expected_content_type": "差別コメント批判系ツッコミ",
+            "confidence": round(self._uniform(0.5, 0.95), 2)
+        }
+
+    def _evaluation_slot(self) -> Dict:
+        passed = self._chance(self.scenario.get("evaluation_pass_rate", 0.7))
+        score = round(self._uniform(7.5, 9.0) if passed else self._uniform(3.0, 5.5), 1)
+        return {
+            "総合スコア": score,
+            "個別スコア": {"シーンマッチング": score, "ネタ成立度": score, "実用性": score, "構文の質": score},
+            "合格判定": passed,
+            "改善ポイント": [] if passed else ["シーンマッチングが甘い", "ツッコミが長い"],
+            "次回への指示": "" if passed else "タイムスタンプを文字起こしと正確に対応させ、ツッコミを15文字以内にする",
+            "優れている点": ["テンポが良い"],
+            "確信度": round(self._uniform(0.6, 0.95), 2)
+        }
+
+    def _select_comments(self, user: str) -> List[str]:
+        comments = COMMENT_LINE_PATTERN.findall(user)
+        match = TARGET_COUNT_PATTERN.search(user)
+        target = int(match.group(1)) if match else 50
+        return comments[:target]
+
+    def _gen_queries(self, user: str) -> str:
+        count = self.scenario.get("queries", 3)
+        return self._json({"search_queries": [f"検索ワード{i + 1}" for i in range(count)]})
+
+    def _gen_screening(self, user: str) -> str:
+        return self._json(self._screening_slot())
+
+    def _gen_screening_batch(self, user: str) -> str:
+        return self._json({"results": {vid: self._screening_slot() for vid in VIDEO_ID_PATTERN.findall(user)}})
+
+    def _gen_screen_and_filter(self, user: str) -> str:
+        slot = self._screening_slot()
+        slot["selected_comments"] = self._select_comments(user) if slot["passed"] else []
+        return self._json(slot)
+
+    def _gen_filtering(self, user: str) -> str:
+        return self._json({"selected_comments": self._select_comments(user)})
+
+    def _gen_analysis(self, user: str) -> str:
+        comments = COMMENT_LINE_PATTERN.findall(user)
+        timestamps = TIMESTAMP_LINE_PATTERN.findall(user) or ["0:00"]
+        items = []
+        for i, comment in enumerate(comments[:self.scenario.get("items_per_analysis", 10)]):
+            with self._lock:
+                timestamp = self.rng.choice(timestamps)
+            items.append({
+                "元コメント": comment,
+                "構文タグ": ["差別", "暴走", "謎マウント", "被害妄想"][i % 4],
+                "いじりポイント": "主語が大きすぎて論理が破綻している",
+                "ツッコミ例": "お前が一番危ないわ",
+                "関連シーン": {"タイムスタンプ": timestamp, "シーン説明": "左折しようとして曲がり損ねたシーン", "関連度": 8}
+            })
+        return self._json(items)
+
+    def _gen_evaluation(self, user: str) -> str:
+        return self._json(self._evaluation_slot())
+
+    def _gen_evaluation_batch(self, user: str) -> str:
+        return self._json({"results": {vid: self._evaluation_slot() for vid in VIDEO_ID_PATTERN.findall(user)}})
+
+    def _transcription(self, request: Dict):
+        # 内容ハッシュから合成時のファイルサイズを引き、音声長を逆算（mp3中品質 ≒ 16KB/秒）
+        with self._lock:
+            file_size = self._audio_sizes.get(request.get("file_sha256"), 0)
+        audio_seconds = file_size / 16000
+        with self._lock:
+            self.metrics["audio_seconds"] += audio_seconds
+        segments = [
+            {"id": i, "start": float(start), "end": float(start + 5), "text": self._sentence()}
+            for i, start in enumerate(range(0, int(audio_seconds), 5))
+        ]
+        response = {
+            "text": "".join(s["text"] for s in segments),
+            "duration": audio_seconds,
+            "language": "japanese",
+            "segments": segments
+        }
+        # 音声長の約1/15で処理
+        return response, self._lognormal(2.0 + audio_seconds / 15, 0.3), file_size
+
+    # ========================================
+    # YouTube
+    # ========================================
+    def _search(self, request: Dict):
+        query = request.get("q", "")
+        count = min(request.get("maxResults", 5), self.scenario.get("videos_per_query", 3))
+        items = []
+        for i in range(count):
+            # クエリ間で一部の動画が重複するように採番
+            video_id = f"v{(zlib.crc32(query.encode('utf-8')) % 7 + i) % self.scenario.get('video_pool', 1000):010d}"
+            items.append({
+                "id": {"videoId": video_id},
+                "snippet": {
+                    "title": f"{query} の動画 {i + 1}",
+                    "description": "説明文" * 20,
+                    "channelTitle": f"チャンネル{i % 4}",
+                    "thumbnails": {"high": {"url": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"}}
+                }
+            })
+        response = {"items": items}
+        return response, self._lognormal(0.35, 0.3), 2000 * len(items)
+
+    def _comment_threads(self, request: Dict):
+        total = self.scenario.get("comments_per_video", 200)
+        page = int(request.get("pageToken") or 0)
+        page_size = request.get("maxResults", 100)
+        start = page * 100
+        count = max(min(page_size, total - start), 0)
+        low, high = self.scenario.get("comment_length", (10, 120))
+
+        items = []
+        for i in range(count):
+            with self._lock:
+                length = self.rng.randint(low, high)
+                words = [self.rng.choice(COMMENT_WORDS) for _ in range(max(length // 4, 1))]
+            items.append({
+                "snippet": {
+                    "topLevelComment": {"snippet": {
+                        "textDisplay": "".join(words)[:length],
+                        "authorDisplayName": f"user{start + i}",
+                        "likeCount": (start + i) % 50,
+                        "publishedAt": "2024-01-01T00:00:00Z"
+                    }},
+                    "totalReplyCount": (start + i) % 5
+                }
+            })
+
+        response = {"items": items}
+        if start + count < total:
+            response["nextPageToken"] = str(page + 1)
+        size = sum(len(item["snippet"]["topLevelComment"]["snippet"]["textDisplay"].encode('utf-8')) + 300 for item in items)
+        return response, self._lognormal(0.25 + count * 0.002, 0.3), size
+
+    def _videos(self, request: Dict):
+        ids = [v for v in request.get("id", "").split(",") if v]
+        response = {"items": [
+            {"id": vid, "statistics": {"commentCount": str(self.scenario.get("comments_per_video", 200))}}
+            for vid in ids
+        ]}
+        return response, self._lognormal(0.2, 0.3), 500 * len(ids)
+
+    def _transcript(self, request: Dict):
+        index = self._video_index(request["video_id"])
+        # 字幕ありの割合をcaption_ratioに合わせて決定的に割り当て
+        has_captions = (index * 0.618) % 1.0 < self.scenario.get("caption_ratio", 0.7)
+        if not has_captions:
+            return None, self._lognormal(0.4, 0.3), 500
+
+        audio_seconds = self._audio_seconds(request["video_id"])
+        segments = [
+            {"text": self._sentence(), "start": float(start), "duration": 4.0}
+            for start in range(0, int(audio_seconds), 4)
+        ]
+        return segments, self._lognormal(0.6, 0.3), sum(len(s["text"].encode('utf-8')) + 40 for s in segments)
+
+    def _yt_dlp(self, request: Dict):
+        url = next((arg for arg in request.get("cmd", []) if arg.startswith("https://")), "")
+        video_id = url.rsplit("=", 1)[-1]
+        audio_seconds = self._audio_seconds(video_id)
+        size = int(audio_seconds * 16000)
+        # 再生時のダミーファイルはこのハッシュで文字起こしのキーになる
+        digest = hashlib.sha256(f"{video_id}:{size}".encode('utf-8')).hexdigest()
+        with self._lock:
+            self._audio_sizes[digest] = size
+        response = {"returncode": 0, "stderr": "", "files": {".mp3": size}, "digests": {".mp3": digest}}
+        # ダウンロード + 変換
+        return response, self._lognormal(3.0 + audio_seconds / 60, 0.4), size
+
+    def _audio_seconds(self, video_id: str) -> float:
+        low, high = self.scenario.get("audio_minutes", (3, 15))
+        index = self._video_index(video_id)
+        # 動画ごとに決定的な長さ
+        return 60 * (low + (high - low) * ((index * 0.381) % 1.0))
+
+    def _sentence(self) -> str:
+        with self._lock:
+            return "".join(self.rng.choice(COMMENT_WORDS) for _ in range(6))
+
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            metrics = dict(self.metrics)
+            metrics["calls"] = dict(self.metrics["calls"])
+            return metrics
@@ -0,0 +1,399 @@
+"""
+ベンチマーク実行スクリプト
+
+偽バックエンドでオーケストレーター全体（シナリオ）と各ステージ単体を計測し、
+結果を benchmarks/results/<日時>_<コミット>.json に保存する。
+
+使い方:
+    python -m benchmarks.run_benchmarks                       # 全シナリオ + ステージ単体
+    python -m benchmarks.run_benchmarks baseline many_videos  # シナリオを指定
+    python -m benchmarks.run_benchmarks --latency-scale 0.1   # 遅延を1/10に縮めて高速に回す
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/xxx.json
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.scenarios import SCENARIOS, STAGE_BENCHMARKS  # noqa: E402
+
+USER_INPUT = "女性ドライバーへの差別的なコメントが多い事故動画"
+
+# 比較時に表示する指標（小さいほど良い）
+COMPARE_METRICS = ["wall_time_sec", "time_to_first_result_sec", "peak_rss_mb", "prompt_tokens", "quota_units"]
+
+
+# ========================================
+# ステージ別の計測
+# ========================================
+class StageTimer:
+    """インスタンスメソッドを包んでステージ別の所要時間・呼び出し回数を集計"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages: Dict[str, Dict] = {}
+
+    def wrap(self, obj, method: str, stage: str):
+        original = getattr(obj, method)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self._add(stage, time.perf_counter() - start)
+
+        setattr(obj, method, timed)
+
+    def _add(self, stage: str, elapsed: float):
+        with self._lock:
+            stats = self.stages.setdefault(stage, {"calls": 0, "total_sec": 0.0})
+            stats["calls"] += 1
+            stats["total_sec"] += elapsed
+
+    def report(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                stage: {"calls": s["calls"], "total_sec": round(s["total_sec"], 3)}
+                for stage, s in self.stages.items()
+            }
+
+
+def instrument_orchestrator(orchestrator, timer: StageTimer):
+    """オーケストレーターの各ステージ呼び出しにタイマーを仕掛ける"""
+    targets = [
+        (orchestrator.query_generator, "generate", "query_generation"),
+        (orchestrator.searcher, "search_multiple_queries", "search"),
+        (orchestrator.comment_fetcher, "fetch_comments", "comment_fetch"),
+        (orchestrator.screener, "screen_comments", "screening"),
+        (orchestrator.screener, "screen_and_filter", "screening"),
+        (orchestrator.screener, "screen_batch", "screening"),
+        (orchestrator.transcript_fetcher, "fetch_transcript", "transcript"),
+        (orchestrator.whisper_transcriber, "transcribe_video", "whisper"),
+        (orchestrator.comment_filter, "filter_comments", "filtering"),
+        (orchestrator.analyzer, "analyze", "analysis"),
+        (orchestrator.validator, "validate", "validation"),
+        (orchestrator.evaluator, "evaluate", "evaluation"),
+        (orchestrator.evaluator, "evaluate_batch", "evaluation"),
+    ]
+    for obj, method, stage in targets:
+        timer.wrap(obj, method, stage)
+
+
+def peak_rss_mb() -> float:
+    """プロセスの最大常駐メモリ（MB、Linuxのru_maxrssはKB単位）"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss /= 1024
+    return round(rss / 1024, 1)
+
+
+def latency_summary(samples: List[float]) -> Dict:
+    samples = sorted(samples)
+    return {
+        "iterations": len(samples),
+        "mean_sec": round(statistics.mean(samples), 4),
+        "p50_sec": round(samples[len(samples) // 2], 4),
+        "p95_sec": round(samples[min(int(len(samples) * 0.95), len(samples) - 1)], 4),
+    }
+
+
+# ========================================
+# ワーカー（1シナリオ = 1サブプロセス）
+# ========================================
+def _install_backend(scenario: Dict, latency_scale: float, seed: int):
+    """偽バックエンドをプロセス共通のカセットとして差し込む（クライアント生成より前に呼ぶこと）"""
+    from benchmarks.fake_backends import FakeBackend
+    from src.cassette import set_cassette
+
+    backend = FakeBackend(scenario["backend"], latency_scale=latency_scale, seed=seed)
+    set_cassette(backend)
+    return backend
+
+
+def run_scenario(name: str, latency_scale: float, seed: int) -> Dict:
+    """オーケストレーター全体を1回実行して計測"""
+    scenario = SCENARIOS[name]
+    os.environ.update(scenario["env"])
+    backend = _install_backend(scenario, latency_scale, seed)
+
+    from src.orchestrator import YouTubeCommentOrchestrator
+
+    orchestrator = YouTubeCommentOrchestrator(verbose=False)
+    timer = StageTimer()
+    instrument_orchestrator(orchestrator, timer)
+
+    start = time.perf_counter()
+    first_result_at: List[float] = []
+
+    def on_result(result: Dict):
+        if not first_result_at:
+            first_result_at.append(time.perf_counter() - start)
+
+    results = orchestrator.process(USER_INPUT, on_result=on_result)
+    wall_time = time.perf_counter() - start
+
+    metrics = backend.get_metrics()
+    router_stats = orchestrator.router.get_stats()
+    return {
+        "type": "scenario",
+        "description": scenario["description"],
+        "wall_time_sec": round(wall_time, 3),
+        "time_to_first_result_sec": round(first_result_at[0], 3) if first_result_at else None,
+        "results": len(results),
+        "stages": timer.report(),
+        "peak_rss_mb": peak_rss_mb(),
+        "prompt_tokens": metrics["prompt_tokens"],
+        "completion_tokens": metrics["completion_tokens"],
+        "cached_tokens": metrics["cached_tokens"],
+        "quota_units": metrics["quota_units"],
+        "audio_seconds": round(metrics["audio_seconds"], 1),
+        "bytes_transferred": metrics["bytes_transferred"],
+        "injected_errors": metrics["errors"],
+        "external_calls": metrics["calls"],
+        "llm_cost_usd": round(sum(s["total_cost_usd"] for s in router_stats.values()), 6),
+        "escalations": sum(s["escalations"] for s in router_stats.values()),
+    }
+
+
+def _stage_runner(stage: str) -> Callable[[], Callable[[], object]]:
+    """ステージ単体ベンチマークの準備関数（入力を作って計測対象の呼び出しを返す）"""
+    from src.comment_analyzer import CommentAnalyzer
+    from src.comment_fetcher import CommentFetcher
+    from src.comment_filter import CommentFilter
+    from src.early_screener import EarlyScreener
+    from src.quality_evaluator import QualityEvaluator
+    from src.search_query_generator import SearchQueryGenerator
+    from src.transcript_fetcher import TranscriptFetcher
+    from src.utils import ProgressLogger
+    from src.whisper_transcriber import WhisperTranscriber
+
+    logger = ProgressLogger(verbose=False)
+    video_info = {
+        "video_id": "v0000000001",
+        "title": "【ドラレコ】左折で曲がり損ねる事故",
+        "channel_title": "チャンネル0",
+        "url": "https://www.youtube.com/watch?v=v0000000001",
+    }
+
+    def comments(count: int) -> List[str]:
+        return CommentFetcher(logger).get_top_comments(video_info["video_id"], count)
+
+    def transcript() -> str:
+        return TranscriptFetcher(logger).get_transcript_with_timestamps(video_info["video_id"])
+
+    def analysis_result() -> List[Dict]:
+        return CommentAnalyzer(logger).analyze(video_info, transcript(), comments(50))
+
+    def prepare() -> Callable[[], object]:
+        if stage == "query_generation":
+            generator = SearchQueryGenerator(logger)
+            return lambda: generator.generate(USER_INPUT)
+        if stage == "comment_fetch":
+            fetcher = CommentFetcher(logger)
+            return lambda: fetcher.fetch_comments(video_info["video_id"], max_results=300)
+        if stage == "screening":
+            screener, sample = EarlyScreener(logger), comments(20)
+            return lambda: screener.screen_comments(video_info, sample)
+        if stage == "filtering":
+            comment_filter, sample = CommentFilter(logger), comments(300)
+            return lambda: comment_filter.filter_comments(sample, 50)
+        if stage == "transcript":
+            fetcher = TranscriptFetcher(logger)
+            return lambda: fetcher.fetch_transcript(video_info["video_id"])
+        if stage == "whisper":
+            transcriber = WhisperTranscriber(logger)
+            return lambda: transcriber.transcribe_video("v0000000002")
+        if stage == "analysis":
+            analyzer, text, sample = CommentAnalyzer(logger), transcript(), comments(50)
+            return lambda: analyzer.analyze(video_info, text, sample)
+        if stage == "evaluation":
+            evaluator, result = QualityEvaluator(logger), analysis_result()
+            return lambda: evaluator.evaluate(result)
+        raise ValueError(f"未定義のステージです: {stage}")
+
+    return prepare
+
+
+def run_stage(stage: str, latency_scale: float, seed: int) -> Dict:
+    """ステージ単体を複数回実行してレイテンシ分布を計測（入力準備の時間は除外）"""
+    scenario = SCENARIOS["baseline"]
+    os.environ.update(scenario["env"])
+    backend = _install_backend(scenario, latency_scale, seed)
+
+    call = _stage_runner(stage)()
+    before = backend.get_metrics()
+
+    samples = []
+    for _ in range(STAGE_BENCHMARKS[stage]):
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+
+    after = backend.get_metrics()
+    iterations = len(samples)
+    return dict(
+        latency_summary(samples),
+        type="stage",
+        peak_rss_mb=peak_rss_mb(),
+        prompt_tokens=(after["prompt_tokens"] - before["prompt_tokens"]) // iterations,
+        quota_units=(after["quota_units"] - before["quota_units"]) // iterations,
+    )
+
+
+def worker_main(target: str, latency_scale: float, seed: int):
+    """サブプロセス側: 一時ディレクトリで実行し、結果JSONを標準出力の最終行に出す"""
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    os.chdir(workdir)  # outputs/ 等の書き出し先を隔離
+
+    # 計測対象のログが結果JSONに混ざらないよう標準出力を退避
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        if target.startswith("stage:"):
+            report = run_stage(target.split(":", 1)[1], latency_scale, seed)
+        else:
+            report = run_scenario(target, latency_scale, seed)
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+    print(json.dumps(report, ensure_ascii=False))
+
+
+# ========================================
+# 親プロセス
+# ========================================
+def run_in_subprocess(target: str, latency_scale: float, seed: int) -> Dict:
+    """1シナリオを独立したプロセスで実行（ピークRSS・モジュール状態を分離するため）"""
+    cmd = [
+        sys.executable, "-m", "benchmarks.run_benchmarks",
+        "--worker", target,
+        "--latency-scale", str(latency_scale),
+        "--seed", str(seed),
+    ]
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    completed = subprocess.run(cmd, cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "不明なエラー"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def print_report(report: Dict):
+    for name, r in report["scenarios"].items():
+        if "error" in r:
+            print(f"❌ {name}: {r['error']}")
+            continue
+        ttfr = r["time_to_first_result_sec"]
+        print(
+            f"🎬 {name:16s} wall {r['wall_time_sec']:7.2f}s / 初回結果 "
+            f"{f'{ttfr:.2f}s' if ttfr is not None else '-':>7s} / 結果{r['results']:3d}件 / "
+            f"RSS {r['peak_rss_mb']:6.1f}MB / tokens {r['prompt_tokens']:8d} / quota {r['quota_units']:5d}"
+        )
+        breakdown = ", ".join(f"{stage} {s['total_sec']:.2f}s×{s['calls']}" for stage, s in r["stages"].items())
+        print(f"   {breakdown}")
+
+    for name, r in report["stages"].items():
+        if "error" in r:
+            print(f"❌ stage:{name}: {r['error']}")
+            continue
+        print(
+            f"⚙️  {name:16s} mean {r['mean_sec']:.3f}s / p50 {r['p50_sec']:.3f}s / p95 {r['p95_sec']:.3f}s / "
+            f"tokens {r['prompt_tokens']} / quota {r['quota_units']}"
+        )
+
+
+def print_comparison(report: Dict, baseline: Dict):
+    """前回結果との差分を表示"""
+    print(f"\n📊 比較: {baseline.get('revision', '?')} → {report['revision']}")
+    for name, r in report["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base or "error" in r or "error" in base:
+            continue
+        diffs = []
+        for metric in COMPARE_METRICS:
+            old, new = base.get(metric), r.get(metric)
+            if not old or new is None:
+                continue
+            diffs.append(f"{metric} {(new - old) / old:+.1%}")
+        print(f"   {name:16s} " + " / ".join(diffs))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="偽バックエンドによるベンチマーク")
+    parser.add_argument("scenarios", nargs="*", help=f"実行するシナリオ（省略時は全て）: {', '.join(SCENARIOS)}")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="偽バックエンドの遅延倍率")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    parser.add_argument("--skip-stages", action="store_true", help="ステージ単体ベンチマークを省略")
+    parser.add_argument("--compare", help="比較する過去の結果JSON")
+    parser.add_argument("--no-save", action="store_true", help="結果を保存しない")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        worker_main(args.worker, args.latency_scale, args.seed)
+        return
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"未定義のシナリオです: {', '.join(unknown)}")
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "latency_scale": args.latency_scale,
+        "seed": args.seed,
+        "scenarios": {},
+        "stages": {},
+    }
+
+    for name in args.scenarios or list(SCENARIOS):
+        print(f"▶ {name} 実行中...", flush=True)
+        report["scenarios"][name] = run_in_subprocess(name, args.latency_scale, args.seed)
+
+    if not args.skip_stages:
+        for stage in STAGE_BENCHMARKS:
+            print(f"▶ stage:{stage} 実行中...", flush=True)
+            report["stages"][stage] = run_in_subprocess(f"stage:{stage}", args.latency_scale, args.seed)
+
+    print()
+    print_report(report)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            print_comparison(report, json.load(f))
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{report['revision']}.json"
+        filepath = os.path.join(RESULTS_DIR, filename)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 結果を保存しました: {filepath}")
+
+
+if __name__ == "__main__":
+    main()
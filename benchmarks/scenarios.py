@@ -0,0 +1,74 @@
+"""
+ベンチマークシナリオ定義
+
+各シナリオは偽バックエンドの分布設定（backend）と、実行時に上書きする環境変数（env）の組。
+"""
+
+BASE_BACKEND = {
+    "queries": 3,
+    "videos_per_query": 3,
+    "comments_per_video": 300,
+    "comment_length": (10, 120),
+    "caption_ratio": 0.7,
+    "audio_minutes": (3, 15),
+    "screening_pass_rate": 0.6,
+    "evaluation_pass_rate": 0.7,
+    "items_per_analysis": 10,
+    "error_rate": 0.0,
+    "slow_call_rate": 0.0,
+    "llm_latency_sigma": 0.4,
+}
+
+BASE_ENV = {
+    "MAX_SEARCH_RESULTS": "5",
+    "MAX_COMMENTS_PER_VIDEO": "300",
+    "EARLY_SCREENING_COMMENTS": "20",
+    "FILTERED_COMMENTS": "50",
+    "QUALITY_THRESHOLD": "7.0",
+    "MAX_RETRY_ATTEMPTS": "2",
+}
+
+
+def _scenario(description: str, backend: dict = None, env: dict = None) -> dict:
+    return {
+        "description": description,
+        "backend": dict(BASE_BACKEND, **(backend or {})),
+        "env": dict(BASE_ENV, **(env or {})),
+    }
+
+
+SCENARIOS = {
+    "baseline": _scenario("標準的な1回の実行（3クエリ×3動画）"),
+    "many_videos": _scenario(
+        "大量の動画（5クエリ×10動画）",
+        backend={"queries": 5, "videos_per_query": 10},
+        env={"MAX_SEARCH_RESULTS": "10"},
+    ),
+    "huge_comments": _scenario(
+        "1万件コメントの動画",
+        backend={"queries": 1, "videos_per_query": 3, "comments_per_video": 10000},
+        env={"MAX_COMMENTS_PER_VIDEO": "10000"},
+    ),
+    "long_whisper": _scenario(
+        "字幕なし・長尺音声（Whisper経由）",
+        backend={"queries": 1, "videos_per_query": 3, "caption_ratio": 0.0, "audio_minutes": (40, 90)},
+    ),
+    "retry_heavy": _scenario(
+        "品質評価の不合格・API障害・テールレイテンシが多い",
+        backend={"evaluation_pass_rate": 0.15, "error_rate": 0.05, "slow_call_rate": 0.05},
+    ),
+    "batch_mode": _scenario("バッチモード（BATCH_MODE=true）", env={"BATCH_MODE": "true"}),
+    "fused_screening": _scenario("統合スクリーニング（FUSED_SCREENING=true）", env={"FUSED_SCREENING": "true"}),
+}
+
+# ステージ単体ベンチマーク: ステージ名 → 反復回数（baselineの分布で実行）
+STAGE_BENCHMARKS = {
+    "query_generation": 5,
+    "comment_fetch": 5,
+    "screening": 5,
+    "filtering": 5,
+    "transcript": 5,
+    "whisper": 2,
+    "analysis": 3,
+    "evaluation": 5,
+}
@@ -4,8 +4,11 @@ YouTubeコメント構文抽出ツール
 """
 import argparse
 import json
+import os
 import sys
 from src.orchestrator import YouTubeCommentOrchestrator
+from src.result_sink import STDOUT_TARGET, open_result_sink
+from src.run_config import RunConfig
 
 def main():
     parser = argparse.ArgumentParser(
@@ -15,42 +18,46 @@ def main():
     parser.add_argument(
         'query',
         type=str,
+        nargs='?',
         help='探したいネタ（例: "炎上している女性ドライバーの事故動画"）'
     )
 
     parser.add_argument(
         '--max-videos',
         type=int,
-        default=3,
-        help='検索動画数（クエリあたり）デフォルト: 3'
+        default=None,
+        help='検索動画数（クエリあたり）デフォルト: MAX_SEARCH_RESULTS（3）'
     )
 
     parser.add_argument(
         '--max-comments',
         type=int,
-        default=200,
-        help='取得コメント数 デフォルト: 200'
+        default=None,
+        help='取得コメント数 デフォルト: MAX_COMMENTS_PER_VIDEO（200）'
     )
 
     parser.add_argument(
         '--quality-threshold',
         type=float,
-        default=7.0,
-        help='品質スコア閾値 デフォルト: 7.0'
+        default=None,
+        help='品質スコア閾値 デフォルト: QUALITY_THRESHOLD（7.0）'
     )
 
     parser.add_argument(
         '--max-retry',
         type=int,
-        default=2,
-        help='最大再試行回数 デフォルト: 2'
+        default=None,
+        help='最大再試行回数 デフォルト: MAX_RETRY_ATTEMPTS（2）'
     )
 
     parser.add_argument(
         '--output',
         type=str,
         default='outputs',
-        help='出力ディレクトリ デフォルト: outputs'
+        help=(
+            '結果の出力先。ディレクトリなら <dir>/<日時>_results.jsonl、*.jsonl ならそのファイルに追記、'
+            '- なら標準出力に1動画ずつJSONLでストリーミング（ログは標準エラーへ） デフォルト: outputs'
+        )
     )
 
     parser.add_argument(
@@ -59,20 +66,139 @@ def main():
         help='詳細ログを非表示'
     )
 
+    parser.add_argument(
+        '--target-results',
+        type=int,
+        default=None,
+        help='品質評価に合格したネタパックがこの件数に達したら終了 デフォルト: TARGET_RESULTS（0は無制限）'
+    )
+
+    parser.add_argument(
+        '--deadline',
+        type=float,
+        default=None,
+        help='締め切り（秒）。間に合う見込みの処理だけを行い、時間内に得られた結果を返す'
+    )
+
+    parser.add_argument(
+        '--budget',
+        type=float,
+        default=None,
+        help='推定コストの上限（USD） デフォルト: MAX_RUN_COST_USD'
+    )
+
+    parser.add_argument(
+        '--max-tokens',
+        type=int,
+        default=None,
+        help='トークン数の上限 デフォルト: MAX_RUN_TOKENS'
+    )
+
+    parser.add_argument(
+        '--resume',
+        type=str,
+        metavar='RUN_ID',
+        help='中断した実行を再開（記録済みのステップは外部呼び出しを繰り返さない。queryは不要）'
+    )
+
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='all',
+        choices=['all', 'sampling', 'deterministic'],
+        help='ステージ別プロファイルを出力ディレクトリに保存（省略時: all）'
+    )
+
+    batch_group = parser.add_argument_group('バッチ実行')
+    batch_group.add_argument(
+        '--batch',
+        type=str,
+        metavar='FILE',
+        help='入力文章を1行1件で書いたファイルをまとめて処理（検索ワード・動画は全入力で重複除去）'
+    )
+    batch_group.add_argument(
+        '--concurrency',
+        type=int,
+        default=None,
+        help='バッチ実行の並列ワーカー数 デフォルト: BATCH_CONCURRENCY'
+    )
+
+    search_group = parser.add_argument_group('保存済みネタの検索（生成は行わない）')
+    search_group.add_argument(
+        '--search',
+        nargs='?',
+        const='',
+        metavar='TEXT',
+        help='元コメント・いじりポイント・ツッコミ例・シーン説明を部分一致で検索（TEXT省略時は条件のみで絞り込み）'
+    )
+    search_group.add_argument('--tag', type=str, help='構文タグで絞り込み')
+    search_group.add_argument('--channel', type=str, help='チャンネル名で絞り込み（部分一致）')
+    search_group.add_argument('--min-score', type=float, help='品質スコアの下限')
+    search_group.add_argument('--limit', type=int, default=20, help='表示件数 デフォルト: 20')
+
     args = parser.parse_args()
 
-    # 環境変数を設定
-    import os
-    os.environ["MAX_SEARCH_RESULTS"] = str(args.max_videos)
-    os.environ["MAX_COMMENTS_PER_VIDEO"] = str(args.max_comments)
-    os.environ["QUALITY_THRESHOLD"] = str(args.quality_threshold)
-    os.environ["MAX_RETRY_ATTEMPTS"] = str(args.max_retry)
+    if args.search is not None or args.tag or args.channel or args.min_score is not None:
+        sys.exit(search_results(args))
+    if not args.query and not args.resume and not args.batch:
+        parser.error("探したいネタ（query）、--batch または --resume を指定してください")
+
+    # 処理設定（CLIで指定した項目以外は環境変数から）
+    config = RunConfig.from_env(
+        max_search_results=args.max_videos,
+        max_comments=args.max_comments,
+        quality_threshold=args.quality_threshold,
+        max_retry=args.max_retry
+    )
+
+    if args.batch:
+        sys.exit(run_batch(args, config))
+
+    to_stdout = args.output == STDOUT_TARGET
+    if to_stdout:
+        output_dir = "outputs"
+    elif args.output.endswith(".jsonl"):
+        output_dir = os.path.dirname(args.output) or "."
+    else:
+        output_dir = args.output
 
-    # オーケストレーター実行
-    orchestrator = YouTubeCommentOrchestrator(verbose=not args.quiet)
+    # プロファイラはトレーサーを差し替えるためオーケストレーター生成より前に作る
+    profiler = None
+    if args.profile:
+        from src.profiler import PipelineProfiler
+        from src.utils import ProgressLogger
+        profiler = PipelineProfiler(
+            output_dir, mode=args.profile, logger=ProgressLogger(stream=sys.stderr if to_stdout else None)
+        )
+
+    # オーケストレーター実行（標準出力を結果のストリームに使う場合、ログは標準エラーへ）
+    orchestrator = YouTubeCommentOrchestrator(
+        verbose=not args.quiet,
+        log_stream=sys.stderr if to_stdout else None,
+        config=config
+    )
+    # 確定した結果から順に書き出すため、中断しても処理済みの動画の結果は残る
+    result_sink = open_result_sink(args.output, orchestrator.logger)
 
     try:
-        results = orchestrator.process(args.query)
+        run_options = dict(
+            deadline_sec=args.deadline,
+            max_cost_usd=args.budget,
+            max_tokens=args.max_tokens,
+            target_results=args.target_results,
+            result_sink=result_sink,
+            # 標準出力に流す場合はサマリーを出さないので結果をメモリに保持しない
+            keep_results=not to_stdout,
+            resume_run_id=args.resume
+        )
+        if profiler:
+            with profiler:
+                results = orchestrator.process(args.query, **run_options)
+        else:
+            results = orchestrator.process(args.query, **run_options)
+
+        if to_stdout:
+            sys.exit(0 if result_sink.count else 1)
 
         if results:
             print("\n" + "=" * 80)
@@ -97,7 +223,7 @@ def main():
                     print(f"  ... 他 {len(result['analysis']) - 3}件")
 
             print("\n" + "=" * 80)
-            print(f"✅ 処理完了！ 詳細はoutputsディレクトリのJSONファイルを参照してください")
+            print(f"✅ 処理完了！ 結果: {result_sink.target}（保存したネタは --search / --tag で検索できます）")
             print("=" * 80)
 
             sys.exit(0)
@@ -106,7 +232,9 @@ def main():
             sys.exit(1)
 
     except KeyboardInterrupt:
-        print("\n\n中断されました")
+        print("\n\n中断されました", file=sys.stderr)
+        if orchestrator.run_id and orchestrator.journal.enabled:
+            print(f"再開するには: python cli.py --resume {orchestrator.run_id}", file=sys.stderr)
         sys.exit(130)
     except Exception as e:
         print(f"\n❌ エラー: {str(e)}", file=sys.stderr)
@@ -114,6 +242,63 @@ def main():
             import traceback
             traceback.print_exc()
         sys.exit(1)
+    finally:
+        result_sink.close()
+
+
+def run_batch(args, config: RunConfig) -> int:
+    """入力ファイルの全入力をバッチ実行"""
+    from src.batch_runner import BatchRunner, load_prompts
+    prompts = load_prompts(args.batch)
+    if not prompts:
+        print(f"⚠️  入力がありません: {args.batch}", file=sys.stderr)
+        return 1
+
+    runner = BatchRunner(concurrency=args.concurrency, verbose=not args.quiet, config=config)
+    try:
+        summary = runner.run(prompts, output_dir=args.output)
+    except KeyboardInterrupt:
+        runner.cancel()
+        print("\n\n中断されました（確定済みの結果は入力ごとのJSONLに保存されています）", file=sys.stderr)
+        return 130
+
+    print("\n" + "=" * 80)
+    print(f"📊 バッチ実行サマリー（検索ワード{summary['unique_queries']}件・動画{summary['unique_videos']}件）")
+    print("=" * 80)
+    for item in summary['prompts']:
+        print(f"\n{item['prompt']}")
+        print(f"  動画: {item['videos']}件 / ネタパック: {item['results']}件（合格{item['passed']}件）")
+        print(f"  結果: {item['output']}")
+    return 0 if any(item['results'] for item in summary['prompts']) else 1
+
+
+def search_results(args) -> int:
+    """結果ストアを検索して表示"""
+    from src.result_store import ResultStore
+    store = ResultStore()
+    if not store.enabled:
+        print("⚠️  結果ストアが無効です（RESULT_STORE_ENABLED=false）", file=sys.stderr)
+        return 1
+
+    items = store.search(
+        text=args.search or None,
+        tag=args.tag,
+        channel=args.channel,
+        min_score=args.min_score,
+        limit=args.limit
+    )
+    if not items:
+        print("⚠️  該当するネタが見つかりませんでした")
+        return 1
+
+    print(f"🔎 {len(items)}件")
+    for i, item in enumerate(items, 1):
+        scene = item['関連シーン']
+        print(f"\n{i}. [{item['構文タグ']}] {item['元コメント']}")
+        print(f"   ツッコミ: {item['ツッコミ例']}")
+        print(f"   シーン: [{scene['タイムスタンプ']}] {scene['シーン説明']}")
+        print(f"   動画: {item['title']}（{item['channel_title']}、品質{item['quality_score']}/10）{item['url']}")
+    return 0
 
 
 if __name__ == "__main__":
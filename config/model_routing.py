@@ -0,0 +1,64 @@
+"""
+モデルルーティング設定
+各ステージで試すモデルの順番（安い・速い → 強い）と料金表
+"""
+
+# ========================================
+# ステージ別ルーティングテーブル
+# ========================================
+# 先頭のモデルから順に試し、結果がボーダーラインの場合のみ次のモデルへ昇格する。
+# 環境変数 MODEL_ROUTE_<STAGE>（例: MODEL_ROUTE_SCREENING="gpt-4o-mini,gpt-4o"）で上書き可能。
+DEFAULT_ROUTING_TABLE = {
+    "query_generation": ["gpt-4o-mini"],
+    "screening": ["gpt-4o-mini", "gpt-4o"],
+    "filtering": ["gpt-3.5-turbo", "gpt-4o-mini"],
+    "analysis": ["gpt-4o-mini", "gpt-4o"],
+    "evaluation": ["gpt-4o-mini", "gpt-4o"],
+}
+
+# ========================================
+# 昇格判定パラメータ
+# ========================================
+# スコアが閾値 ± ESCALATION_MARGIN 以内ならボーダーライン扱い
+DEFAULT_ESCALATION_MARGIN = 1.0
+
+# モデル自己申告の確信度（0.0-1.0）がこれ未満ならボーダーライン扱い
+DEFAULT_MIN_CONFIDENCE = 0.6
+
+# ========================================
+# モデル料金表（USD / 100万トークン）
+# ========================================
+MODEL_PRICING = {
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+    "gpt-3.5-turbo": {"input": 0.50, "cached_input": 0.50, "output": 1.50},
+}
+
+# Whisper料金（USD / 分）
+WHISPER_PRICE_PER_MINUTE = 0.006
+
+# ========================================
+# YouTube Data APIのクォータ消費（ユニット / 呼び出し、1日の上限は10,000）
+# ========================================
+YOUTUBE_QUOTA_COST = {
+    "search.list": 100,
+    "commentThreads.list": 1,
+    "videos.list": 1,
+}
+
+# ========================================
+# レート制限（全スレッド・全プロセスで共有するトークンバケット）
+# ========================================
+# モデル別の上限 {"rpm": リクエスト/分, "tpm": トークン/分}（OpenAIのTier 1相当）。
+# 環境変数 RATE_LIMIT_<MODEL>（例: RATE_LIMIT_GPT_4O="5000,800000"）で上書き可能。
+# 表にないモデルは DEFAULT_MODEL_RATE_LIMIT を使う。
+MODEL_RATE_LIMITS = {
+    "gpt-4o": {"rpm": 500, "tpm": 30_000},
+    "gpt-4o-mini": {"rpm": 500, "tpm": 200_000},
+    "gpt-3.5-turbo": {"rpm": 3_500, "tpm": 200_000},
+    "whisper-1": {"rpm": 50, "tpm": 0},
+}
+DEFAULT_MODEL_RATE_LIMIT = {"rpm": 500, "tpm": 30_000}
+
+# YouTube Data APIの1日のクォータ（ユニット）
+YOUTUBE_DAILY_QUOTA = 10_000
@@ -1,18 +1,22 @@
 """
 プロンプトテンプレート集
 YouTubeコメント構文抽出ツール用
+
+各テンプレートは「固定プレフィックス（_PREFIX）」と「可変サフィックス（_SUFFIX）」に分かれている。
+プレフィックスには役割・判定基準・評価軸・出力形式などリクエスト間で変わらない内容のみを置き、
+systemメッセージとしてそのまま送る（format不要なので波括弧はエスケープしない）。
+タイトル・URL・文字起こし・コメント・閾値などの可変値はサフィックスに置き、
+userメッセージとしてformatして送る。
+先頭の長い共通部分が毎回一致するため、プロバイダ側のプロンプトキャッシュが効く。
 """
 
 # ========================================
 # 検索ワード生成プロンプト
 # ========================================
-SEARCH_QUERY_GENERATOR_PROMPT = """
+SEARCH_QUERY_GENERATOR_PREFIX = """
 あなたはYouTube検索のエキスパートです。
 ユーザーの入力文章から、YouTubeで効果的な検索ワードリストを生成してください。
 
-## ユーザー入力
-{user_input}
-
 ## 生成ルール
 1. ユーザーの意図を忠実に反映する
 2. 3-5個の検索ワードを生成
@@ -20,33 +24,26 @@ SEARCH_QUERY_GENERATOR_PROMPT = """
 4. 言葉のバリエーションを持たせる（同じ意味でも異なる表現）
 
 ## 出力形式（JSON）
-{{
+{
   "search_queries": [
     "検索ワード1",
     "検索ワード2",
     "検索ワード3"
   ]
-}}
+}
 
 JSONのみを出力してください。
 """
 
+SEARCH_QUERY_GENERATOR_SUFFIX = """
+## ユーザー入力
+{user_input}
+"""
+
 # ========================================
 # コメント面白さスクリーニングプロンプト（新版）
 # ========================================
-COMMENT_SCREENING_PROMPT = """
-あなたはYouTuberのネタ探しエージェントです。
-以下のコメント欄を見て、「ツッコミネタ」として成立するか判定してください。
-
-動画内容は一切見ません。純粋にコメントの質だけで判定します。
-
-## 動画情報
-タイトル: {title}
-チャンネル: {channel_title}
-
-## コメント一覧（{comment_count}件）
-{comments}
-
+SCREENING_CRITERIA = """
 ## 判定基準（10点満点）
 
 ### 1. コメントの量と質（5点）
@@ -60,9 +57,16 @@ COMMENT_SCREENING_PROMPT = """
 - 差別的・炎上系コメントがあるか？（批判目的で使える）
 - 面白い誤字・構文ミス・謎理論があるか？
 - 暴走、被害妄想、謎マウントがあるか？
+"""
 
+COMMENT_SCREENING_PREFIX = """
+あなたはYouTuberのネタ探しエージェントです。
+与えられたコメント欄を見て、「ツッコミネタ」として成立するか判定してください。
+
+動画内容は一切見ません。純粋にコメントの質だけで判定します。
+""" + SCREENING_CRITERIA + """
 ## 出力形式（JSON）
-{{
+{
   "score": 7,
   "passed": true,
   "reason": "差別的コメントが多数。ツッコミネタとして成立する",
@@ -70,23 +74,28 @@ COMMENT_SCREENING_PROMPT = """
     "だから女は運転するなって...",
     "これだから最近の若者は..."
   ],
-  "expected_content_type": "差別コメント批判系ツッコミ"
-}}
+  "expected_content_type": "差別コメント批判系ツッコミ",
+  "confidence": 0.8
+}
 
 スコア6以上で passed=true、6未満で passed=false
+confidence は判定への確信度（0.0-1.0）。判断に迷う場合は低くしてください。
 JSONのみを出力してください。
 """
 
-# ========================================
-# コメントフィルタリングプロンプト（GPT-3.5用）
-# ========================================
-COMMENT_FILTERING_PROMPT = """
-あなたはお笑い芸人のネタ選びアシスタントです。
-以下のコメントリストから、「YouTuberがいじれる」コメントを{target_count}件選んでください。
+COMMENT_SCREENING_SUFFIX = """
+## 動画情報
+タイトル: {title}
+チャンネル: {channel_title}
 
-## コメントリスト
+## コメント一覧（{comment_count}件）
 {comments}
+"""
 
+# ========================================
+# コメントフィルタリング選定基準（フィルタリング・統合プロンプト共通）
+# ========================================
+FILTERING_CRITERIA = """
 ## 選定基準
 1. 論理的矛盾がある
 2. 思い込みが激しい
@@ -96,49 +105,100 @@ COMMENT_FILTERING_PROMPT = """
 6. 被害妄想
 7. 差別的（ツッコミで批判できる）
 8. 過激な一般化
+"""
 
+# ========================================
+# スクリーニング + フィルタリング統合プロンプト（1回の呼び出しで両方）
+# ========================================
+COMMENT_SCREEN_AND_FILTER_PREFIX = """
+あなたはYouTuberのネタ探しエージェント兼お笑い芸人のネタ選びアシスタントです。
+与えられたコメント欄について、次の2つを1回で行ってください。
+
+1. コメント欄全体が「ツッコミネタ」として成立するか判定する（動画内容は見ない）
+2. 成立する場合、「YouTuberがいじれる」コメントを指定件数だけ元の文のまま選ぶ
+""" + SCREENING_CRITERIA + FILTERING_CRITERIA + """
 ## 出力形式（JSON）
-{{
+{
+  "score": 7,
+  "passed": true,
+  "reason": "差別的コメントが多数。ツッコミネタとして成立する",
+  "example_comments": [
+    "だから女は運転するなって...",
+    "これだから最近の若者は..."
+  ],
+  "expected_content_type": "差別コメント批判系ツッコミ",
+  "confidence": 0.8,
   "selected_comments": [
     "選ばれたコメント1",
     "選ばれたコメント2"
   ]
-}}
+}
 
+スコア6以上で passed=true、6未満で passed=false
+passed=false の場合 selected_comments は空配列にしてください。
+confidence は判定への確信度（0.0-1.0）。判断に迷う場合は低くしてください。
 JSONのみを出力してください。
 """
 
-# ========================================
-# コメント構文抽出プロンプト（GPT-4用）
-# ========================================
-COMMENT_ANALYSIS_PROMPT = """
-あなたはお笑い芸人のツッコミ職人です。
-YouTubeコメントの論理的矛盾、思い込み、暴走、謎マウントなどを抽出し、
-YouTuberが喋りたくなる「ツッコミ構文」を生成してください。
+COMMENT_SCREEN_AND_FILTER_SUFFIX = """
+## 選定件数
+{target_count}件
 
 ## 動画情報
 タイトル: {title}
-URL: {url}
+チャンネル: {channel_title}
 
-## 文字起こし（タイムスタンプ付き）
-{transcript}
+## コメント一覧（{comment_count}件）
+{comments}
+"""
 
-## 分析対象コメント
+# ========================================
+# コメントフィルタリングプロンプト（GPT-3.5用）
+# ========================================
+COMMENT_FILTERING_PREFIX = """
+あなたはお笑い芸人のネタ選びアシスタントです。
+与えられたコメントリストから、「YouTuberがいじれる」コメントを指定件数だけ選んでください。
+""" + FILTERING_CRITERIA + """
+## 出力形式（JSON）
+{
+  "selected_comments": [
+    "選ばれたコメント1",
+    "選ばれたコメント2"
+  ]
+}
+
+JSONのみを出力してください。
+"""
+
+COMMENT_FILTERING_SUFFIX = """
+## 選定件数
+{target_count}件
+
+## コメントリスト
 {comments}
+"""
+
+# ========================================
+# コメント構文抽出プロンプト（GPT-4用）
+# ========================================
+COMMENT_ANALYSIS_PREFIX = """
+あなたはお笑い芸人のツッコミ職人です。
+YouTubeコメントの論理的矛盾、思い込み、暴走、謎マウントなどを抽出し、
+YouTuberが喋りたくなる「ツッコミ構文」を生成してください。
 
 ## 出力形式（JSON配列）
 [
-  {{
+  {
     "元コメント": "実際のコメント文",
     "構文タグ": "逆張り/暴走/意味不明/差別/謎マウント/被害妄想/etc",
     "いじりポイント": "なぜこのコメントがツッコミ対象なのか、論理的矛盾や思い込みを指摘",
     "ツッコミ例": "短く、キレ良く、ボケへの返しとして成立する一言（15文字以内推奨）",
-    "関連シーン": {{
+    "関連シーン": {
       "タイムスタンプ": "0:32",
       "シーン説明": "このコメントが言及している動画内容を50文字程度で説明",
       "関連度": 8
-    }}
-  }}
+    }
+  }
 ]
 
 ## 重要なルール
@@ -154,16 +214,22 @@ URL: {url}
 JSONのみを出力してください。
 """
 
+COMMENT_ANALYSIS_SUFFIX = """
+## 動画情報
+タイトル: {title}
+URL: {url}
+
+## 文字起こし（タイムスタンプ付き）
+{transcript}
+
+## 分析対象コメント
+{comments}
+"""
+
 # ========================================
 # 品質評価プロンプト（GPT-4o用）
 # ========================================
-QUALITY_EVALUATION_PROMPT = """
-あなたは人気YouTuberのディレクター兼お笑いプロデューサーです。
-以下の「ネタパック」が実際の動画で使えるか、厳しく評価してください。
-
-## 分析結果
-{analysis_result}
-
+EVALUATION_CRITERIA = """
 ## 評価軸（各10点満点）
 
 ### 1. シーンマッチング精度（最重要）
@@ -189,16 +255,21 @@ QUALITY_EVALUATION_PROMPT = """
 - ツッコミに「キレ」があるか？
 - 構文タグが適切か？
 - 文章のテンポ・語感が良いか？
+"""
 
+QUALITY_EVALUATION_PREFIX = """
+あなたは人気YouTuberのディレクター兼お笑いプロデューサーです。
+与えられた「ネタパック」が実際の動画で使えるか、厳しく評価してください。
+""" + EVALUATION_CRITERIA + """
 ## 出力形式（JSON）
-{{
+{
   "総合スコア": 7.5,
-  "個別スコア": {{
+  "個別スコア": {
     "シーンマッチング": 8,
     "ネタ成立度": 7,
     "実用性": 8,
     "構文の質": 7
-  }},
+  },
   "合格判定": true,
   "改善ポイント": [
     "具体的な改善点1",
@@ -208,15 +279,113 @@ QUALITY_EVALUATION_PROMPT = """
   "優れている点": [
     "良かった点1",
     "良かった点2"
-  ]
-}}
+  ],
+  "確信度": 0.8
+}
 
-総合スコア{threshold}点以上で合格判定=true
+総合スコアが指定された合格点以上なら合格判定=true
+確信度は評価への確信度（0.0-1.0）。判断に迷う場合は低くしてください。
 JSONのみを出力してください。
 """
 
+QUALITY_EVALUATION_SUFFIX = """
+## 合格点
+総合スコア{threshold}点以上
+
+## 分析結果
+{analysis_result}
+"""
+
+# ========================================
+# 複数動画まとめてスクリーニング（バッチモード用）
+# ========================================
+COMMENT_SCREENING_BATCH_PREFIX = """
+あなたはYouTuberのネタ探しエージェントです。
+与えられた複数の動画それぞれについて、コメント欄だけを見て「ツッコミネタ」として成立するか判定してください。
+
+動画内容は一切見ません。純粋にコメントの質だけで、動画ごとに独立して判定します。
+""" + SCREENING_CRITERIA + """
+## 出力形式（JSON）
+動画IDをキーにして、全ての動画の判定結果を必ず含めてください。
+{
+  "results": {
+    "動画ID": {
+      "score": 7,
+      "passed": true,
+      "reason": "差別的コメントが多数。ツッコミネタとして成立する",
+      "example_comments": ["だから女は運転するなって..."],
+      "expected_content_type": "差別コメント批判系ツッコミ",
+      "confidence": 0.8
+    }
+  }
+}
+
+スコア6以上で passed=true、6未満で passed=false
+confidence は判定への確信度（0.0-1.0）。判断に迷う場合は低くしてください。
+JSONのみを出力してください。
+"""
+
+COMMENT_SCREENING_BATCH_SUFFIX = """
+## 判定対象の動画（{video_count}本）
+{videos}
+"""
+
+COMMENT_SCREENING_BATCH_ITEM = """
+### 動画ID: {video_id}
+タイトル: {title}
+チャンネル: {channel_title}
+コメント一覧（{comment_count}件）:
+{comments}
+"""
+
+# ========================================
+# 複数動画まとめて品質評価（バッチモード用）
+# ========================================
+QUALITY_EVALUATION_BATCH_PREFIX = """
+あなたは人気YouTuberのディレクター兼お笑いプロデューサーです。
+与えられた複数の「ネタパック」それぞれが実際の動画で使えるか、動画ごとに独立して厳しく評価してください。
+""" + EVALUATION_CRITERIA + """
+## 出力形式（JSON）
+動画IDをキーにして、全てのネタパックの評価結果を必ず含めてください。
+{
+  "results": {
+    "動画ID": {
+      "総合スコア": 7.5,
+      "個別スコア": {
+        "シーンマッチング": 8,
+        "ネタ成立度": 7,
+        "実用性": 8,
+        "構文の質": 7
+      },
+      "合格判定": true,
+      "改善ポイント": ["具体的な改善点1"],
+      "次回への指示": "次の分析で改善すべき点を具体的に指示（プロンプトに追加される）",
+      "優れている点": ["良かった点1"],
+      "確信度": 0.8
+    }
+  }
+}
+
+総合スコアが指定された合格点以上なら合格判定=true
+確信度は評価への確信度（0.0-1.0）。判断に迷う場合は低くしてください。
+JSONのみを出力してください。
+"""
+
+QUALITY_EVALUATION_BATCH_SUFFIX = """
+## 合格点
+総合スコア{threshold}点以上
+
+## 評価対象のネタパック（{video_count}本）
+{analyses}
+"""
+
+QUALITY_EVALUATION_BATCH_ITEM = """
+### 動画ID: {video_id}
+{analysis_result}
+"""
+
 # ========================================
-# 再分析用改善プロンプト
+# 再分析用改善プロンプト（COMMENT_ANALYSIS_SUFFIXの末尾に追加）
 # ========================================
 REFINEMENT_PROMPT_ADDITION = """
 
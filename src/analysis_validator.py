@@ -0,0 +1,182 @@
+"""
+分析結果の事前検証モジュール
+GPT-4oの品質評価に回す前に、構造的に壊れた結果をローカルで即座に不合格にする
+"""
+import re
+from bisect import bisect_left
+from typing import Dict, List, Optional
+from src.utils import get_env, parse_timestamp, ProgressLogger
+
+REQUIRED_ITEM_KEYS = ["元コメント", "構文タグ", "いじりポイント", "ツッコミ例", "関連シーン"]
+REQUIRED_SCENE_KEYS = ["タイムスタンプ", "シーン説明", "関連度"]
+
+# 文字起こし行頭の "[0:32]" / "[1:02:03]" 形式
+TRANSCRIPT_TIMESTAMP_PATTERN = re.compile(r'^\[(\d+:\d{2}(?::\d{2})?)\]', re.MULTILINE)
+
+# エラー内容をフィードバックに列挙する最大件数
+MAX_REPORTED_ERRORS = 10
+
+
+class AnalysisValidator:
+    def __init__(self, logger: ProgressLogger = None):
+        self.logger = logger or ProgressLogger()
+        # 文字起こしのセグメント開始時刻からこの秒数以内なら存在するタイムスタンプとみなす
+        self.timestamp_tolerance = float(get_env("TIMESTAMP_TOLERANCE_SEC", "15"))
+
+    def validate(
+        self,
+        analysis_result: List[Dict],
+        transcript: Optional[str] = None
+    ) -> Dict:
+        """
+        スキーマ・タイムスタンプ・重複をチェック
+
+        Args:
+            analysis_result: コメント分析結果
+            transcript: 文字起こし（タイムスタンプ付き）
+
+        Returns:
+            {
+                "passed": True/False,
+                "errors": 検出したエラーのリスト,
+                "feedback": 再分析プロンプトに渡す指示
+            }
+        """
+        errors = []
+
+        if not isinstance(analysis_result, list) or not analysis_result:
+            errors.append("ネタが1件も出力されていません（JSON配列で1件以上出力してください）")
+            return self._build_result(errors)
+
+        segment_starts = self._extract_segment_starts(transcript) if transcript else []
+        seen_comments = set()
+
+        for i, item in enumerate(analysis_result, 1):
+            if not isinstance(item, dict):
+                errors.append(f"{i}件目: オブジェクト形式ではありません")
+                continue
+
+            missing = [key for key in REQUIRED_ITEM_KEYS if not item.get(key)]
+            if missing:
+                errors.append(f"{i}件目: 必須キーが欠落または空です: {', '.join(missing)}")
+
+            original = item.get("元コメント")
+            if isinstance(original, str) and original:
+                normalized = original.strip()
+                if normalized in seen_comments:
+                    errors.append(f"{i}件目: 元コメントが重複しています: 「{normalized[:30]}」")
+                seen_comments.add(normalized)
+
+            scene = item.get("関連シーン")
+            if scene:
+                errors.extend(self._validate_scene(i, scene, segment_starts))
+
+        return self._build_result(errors)
+
+    def _validate_scene(self, index: int, scene, segment_starts: List[int]) -> List[str]:
+        """関連シーンの形式とタイムスタンプ実在性をチェック"""
+        if not isinstance(scene, dict):
+            return [f"{index}件目: 関連シーンがオブジェクト形式ではありません"]
+
+        errors = []
+        missing = [key for key in REQUIRED_SCENE_KEYS if key not in scene]
+        if missing:
+            errors.append(f"{index}件目: 関連シーンのキーが欠落しています: {', '.join(missing)}")
+
+        relevance = scene.get("関連度")
+        if "関連度" in scene and not (isinstance(relevance, (int, float)) and 1 <= relevance <= 10):
+            errors.append(f"{index}件目: 関連度は1-10の数値にしてください（値: {relevance}）")
+
+        timestamp = scene.get("タイムスタンプ")
+        if timestamp is None:
+            return errors
+
+        seconds = parse_timestamp(str(timestamp))
+        if seconds is None:
+            errors.append(f"{index}件目: タイムスタンプ「{timestamp}」が「分:秒」形式ではありません")
+        elif segment_starts and not self._exists_in_transcript(seconds, segment_starts):
+            errors.append(f"{index}件目: タイムスタンプ「{timestamp}」は文字起こしに存在しません")
+
+        return errors
+
+    def _extract_segment_starts(self, transcript: str) -> List[int]:
+        """文字起こしからセグメント開始秒数のソート済みリストを取得"""
+        starts = []
+        for match in TRANSCRIPT_TIMESTAMP_PATTERN.finditer(transcript):
+            seconds = parse_timestamp(match.group(1))
+            if seconds is not None:
+                starts.append(seconds)
+        return sorted(starts)
+
+    def _exists_in_transcript(self, seconds: int, segment_starts: List[int]) -> bool:
+        """最寄りのセグメント開始時刻が許容範囲内か"""
+        idx = bisect_left(segment_starts, seconds)
+        neighbors = segment_starts[max(idx - 1, 0):idx + 1]
+        return any(abs(seconds - start) <= self.timestamp_tolerance for start in neighbors)
+
+    def _build_result(self, errors: List[str]) -> Dict:
+        """検証結果と再分析用フィードバックを組み立て"""
+        if not errors:
+            return {"passed": True, "errors": [], "feedback": ""}
+
+        reported = errors[:MAX_REPORTED_ERRORS]
+        if len(errors) > MAX_REPORTED_ERRORS:
+            reported.append(f"...他{len(errors) - MAX_REPORTED_ERRORS}件")
+
+        feedback = (
+            "前回の出力には以下の構造上の問題がありました。必ず修正してください。\n"
+            + "\n".join(f"- {e}" for e in reported)
+            + "\nタイムスタンプは文字起こしに実在する「分:秒」を使い、元コメントは重複させないでください。"
+        )
+
+        self.logger.warning(f"事前検証で{len(errors)}件の問題を検出（品質評価をスキップ）")
+        return {"passed": False, "errors": errors, "feedback": feedback}
+
+    def to_evaluation(self, validation: Dict) -> Dict:
+        """
+        事前検証の不合格結果をQualityEvaluatorと同じ形式に変換
+
+        Args:
+            validation: validate()の戻り値
+
+        Returns:
+            QualityEvaluator.evaluate()と同形式の評価結果
+        """
+        return {
+            "passed": False,
+            "total_score": 0,
+            "individual_scores": {},
+            "improvements": validation["errors"],
+            "feedback": validation["feedback"],
+            "strengths": [],
+            "prevalidation_failed": True
+        }
+
+
+if __name__ == "__main__":
+    # テスト実行
+    validator = AnalysisValidator()
+
+    transcript = """[0:00] 今日は事故動画を見ていきます
+[0:15] こちらをご覧ください
+[0:32] 左折しようとしていますが曲がり損ねました"""
+
+    sample_result = [
+        {
+            "元コメント": "だから女は運転するなって言ってんだよ",
+            "構文タグ": "差別",
+            "いじりポイント": "性別で十把一絡げにしてる時点で無理筋",
+            "ツッコミ例": "まずお前が免許返納してから言え",
+            "関連シーン": {"タイムスタンプ": "5:10", "シーン説明": "存在しないシーン", "関連度": 8}
+        },
+        {
+            "元コメント": "だから女は運転するなって言ってんだよ",
+            "構文タグ": "差別",
+            "いじりポイント": "重複",
+            "関連シーン": {"タイムスタンプ": "0:32", "シーン説明": "左折シーン", "関連度": 8}
+        }
+    ]
+
+    result = validator.validate(sample_result, transcript)
+    print(f"\n検証結果: {'合格' if result['passed'] else '不合格'}")
+    print(result['feedback'])
@@ -0,0 +1,213 @@
+"""
+バッチ実行モジュール
+複数の入力文章を1回の実行でまとめて処理する
+
+- 全入力の検索ワード・動画IDを重複除去し、同じ検索・同じ動画の処理は1回だけ行う
+  （スクリーニング以降は入力文章に依存しないため、動画ごとの結果を該当する全入力で共有できる）
+- 1つのワーカープールで並列処理し、YouTubeクライアントはワーカースレッドごとに1回だけ生成する
+- ルーター・動画レジストリ・結果ストア・使用量集計は全ワーカーで共有する
+- 結果は入力ごとのJSONLに1動画ずつ追記する
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+from src.model_router import ModelRouter
+from src.orchestrator import YouTubeCommentOrchestrator
+from src.result_sink import JsonlResultSink
+from src.result_store import ResultStore
+from src.run_config import RunConfig
+from src.usage_tracker import UsageTracker
+from src.utils import get_env, save_json, ProgressLogger
+from src.video_registry import VideoRegistry
+
+
+def load_prompts(filepath: str) -> List[str]:
+    """入力ファイルを読み込み（1行1入力、空行と#で始まる行は無視）"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith('#')]
+
+
+def _normalize(text: str) -> str:
+    """重複判定用に空白と大文字小文字の違いを吸収"""
+    return " ".join(text.split()).lower()
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        verbose: bool = True,
+        log_stream=None,
+        config: Optional[RunConfig] = None
+    ):
+        """
+        Args:
+            concurrency: 並列ワーカー数（省略時は BATCH_CONCURRENCY）
+            verbose: 詳細ログを出力するか
+            log_stream: ログの出力先（省略時は標準出力）
+            config: 全ワーカー共通の処理設定（省略時は RunConfig.from_env()）
+        """
+        self.logger = ProgressLogger(verbose=verbose, stream=log_stream)
+        self.concurrency = concurrency or int(get_env("BATCH_CONCURRENCY", "4"))
+        self.config = config or RunConfig.from_env()
+
+        # 全ワーカーで共有（いずれもスレッドセーフ）
+        self.router = ModelRouter(self.logger)
+        self.registry = VideoRegistry(logger=self.logger)
+        self.result_store = ResultStore(logger=self.logger)
+
+        self._local = threading.local()
+        self._cancel = threading.Event()
+
+    def _orchestrator(self) -> YouTubeCommentOrchestrator:
+        """ワーカースレッドごとのオーケストレーター（YouTubeクライアントはスレッド間で共有できない）"""
+        orchestrator = getattr(self._local, "orchestrator", None)
+        if orchestrator is None:
+            orchestrator = YouTubeCommentOrchestrator(
+                verbose=self.logger.verbose,
+                log_stream=self.logger.stream,
+                router=self.router,
+                registry=self.registry,
+                result_store=self.result_store,
+                config=self.config
+            )
+            self._local.orchestrator = orchestrator
+        return orchestrator
+
+    def run(self, prompts: List[str], output_dir: str = "outputs") -> Dict:
+        """
+        バッチ実行
+
+        Args:
+            prompts: 入力文章のリスト
+            output_dir: 出力ディレクトリ（<output_dir>/<日時>_batch/ に入力ごとのJSONLとサマリーを保存）
+
+        Returns:
+            サマリー {"prompts": [{"prompt", "queries", "videos", "results", "passed", "output"}], ...}
+        """
+        unique_prompts = list({_normalize(p): p for p in prompts}.values())
+        self.logger.log("=" * 60)
+        self.logger.log(f"🎬 バッチ実行開始: {len(unique_prompts)}件の入力（並列数 {self.concurrency}）")
+        self.logger.log("=" * 60)
+
+        run_dir = os.path.join(output_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_batch")
+        usage = UsageTracker.from_env(self.logger)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch") as pool:
+            # Step 1: 検索ワード生成（入力ごと）→ 全入力で重複除去
+            self.logger.log("\n📝 Step 1: 検索ワード生成")
+            query_lists = list(pool.map(
+                lambda p: self._with_usage(usage, lambda: self._orchestrator().query_generator.generate(p)),
+                unique_prompts
+            ))
+            prompts_by_query: Dict[str, List[int]] = {}
+            queries: Dict[str, str] = {}
+            for index, generated in enumerate(query_lists):
+                for query in generated or []:
+                    key = _normalize(query)
+                    queries.setdefault(key, query)
+                    if index not in prompts_by_query.setdefault(key, []):
+                        prompts_by_query[key].append(index)
+            generated_total = sum(len(q or []) for q in query_lists)
+            self.logger.success(f"検索ワード {generated_total}件 → 重複除去後 {len(queries)}件")
+
+            # Step 2: 動画検索（検索ワードごと）→ 全入力で重複除去
+            self.logger.log("\n🔍 Step 2: YouTube動画検索")
+            keys = list(queries)
+            search_results = list(pool.map(
+                lambda k: self._with_usage(usage, lambda: self._orchestrator().searcher.search_videos(
+                    queries[k], max_results=self.config.max_search_results
+                )),
+                keys
+            ))
+            videos: Dict[str, Dict] = {}
+            prompts_by_video: Dict[str, List[int]] = {}
+            for key, found in zip(keys, search_results):
+                for video in found:
+                    videos.setdefault(video['video_id'], video)
+                    owners = prompts_by_video.setdefault(video['video_id'], [])
+                    for index in prompts_by_query[key]:
+                        if index not in owners:
+                            owners.append(index)
+            hits = sum(len(found) for found in search_results)
+            self.logger.success(f"動画 {hits}件 → 重複除去後 {len(videos)}件")
+
+            # Step 3-4: 動画ごとにスクリーニング・分析し、該当する全入力のJSONLへ追記
+            self.logger.log("\n🤖 Step 3-4: スクリーニング・詳細分析")
+            sinks = [
+                JsonlResultSink(os.path.join(run_dir, f"prompt_{index + 1:03d}.jsonl"), self.logger)
+                for index in range(len(unique_prompts))
+            ]
+            stats = [{"videos": 0, "results": 0, "passed": 0} for _ in unique_prompts]
+            stats_lock = threading.Lock()
+            for owners in prompts_by_video.values():
+                for index in owners:
+                    stats[index]["videos"] += 1
+
+            def process_video(video_id: str):
+                owners = prompts_by_video[video_id]
+
+                def on_result(result: Dict):
+                    for index in owners:
+                        sinks[index].write(result)
+                    with stats_lock:
+                        for index in owners:
+                            stats[index]["results"] += 1
+                            if result['evaluation'].get('passed'):
+                                stats[index]["passed"] += 1
+
+                if self._cancel.is_set() or usage.aborted:
+                    return
+                try:
+                    self._orchestrator().process_videos(
+                        [videos[video_id]],
+                        on_result=on_result,
+                        usage=usage,
+                        query=" / ".join(unique_prompts[index] for index in owners),
+                        cancel_event=self._cancel
+                    )
+                except Exception as e:
+                    self.logger.error(f"動画の処理に失敗しました: {videos[video_id]['title']}: {str(e)}")
+
+            try:
+                list(pool.map(process_video, list(videos)))
+            finally:
+                for sink in sinks:
+                    sink.close()
+
+        summary = {
+            "prompts": [
+                {
+                    "prompt": prompt,
+                    "queries": query_lists[index] or [],
+                    "output": sinks[index].target,
+                    **stats[index]
+                }
+                for index, prompt in enumerate(unique_prompts)
+            ],
+            "unique_queries": len(queries),
+            "unique_videos": len(videos),
+            "usage": usage.report()
+        }
+        filepath = save_json(summary, "summary", output_dir=run_dir)
+
+        self.logger.log("\n📈 モデルルーティング統計")
+        self.router.log_stats()
+        usage.log_summary()
+        self.logger.log("\n" + "=" * 60)
+        self.logger.success(f"✅ バッチ実行完了！ 結果: {run_dir}（サマリー: {filepath}）")
+        self.logger.log("=" * 60)
+        return summary
+
+    def cancel(self):
+        """未着手の動画の処理を中止"""
+        self._cancel.set()
+
+    @staticmethod
+    def _with_usage(usage: UsageTracker, fn):
+        """ワーカースレッドで使用量の集計先を有効にして実行（contextvarはスレッドに引き継がれない）"""
+        with usage.activate():
+            return fn()
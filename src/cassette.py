@@ -0,0 +1,362 @@
+"""
+外部呼び出しの記録・再生（カセット）モジュール
+OpenAI・YouTube Data API・youtube-transcript-api・yt-dlpの呼び出しをローカルに記録し、
+ネットワークやAPIキーなしで決定的に再生する
+
+CASSETTE_MODE:
+    off    - 何もしない（デフォルト、本番）
+    record - 実際に呼び出し、リクエストとレスポンスを CASSETTE_DIR に保存
+    replay - 保存済みのレスポンスのみを返す（APIキー・ネットワーク不要）
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from src.tracing import get_tracer
+from src.utils import get_env, ProgressLogger
+
+
+class CassetteMissError(Exception):
+    """再生モードで該当する記録が見つからない"""
+
+
+class CassetteReplayError(Exception):
+    """記録時に発生した例外の再生"""
+
+    def __init__(self, error_type: str, message: str):
+        super().__init__(f"{error_type}: {message}")
+        self.error_type = error_type
+
+
+class ReplayObject(dict):
+    """属性アクセスと添字アクセスの両方に対応した記録済みレスポンス"""
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+def to_replay_object(data: Any) -> Any:
+    """JSON互換データを再帰的にReplayObjectへ変換"""
+    if isinstance(data, dict):
+        return ReplayObject({k: to_replay_object(v) for k, v in data.items()})
+    if isinstance(data, list):
+        return [to_replay_object(v) for v in data]
+    return data
+
+
+def _dump_response(response: Any) -> Any:
+    """SDKのレスポンスオブジェクトをJSON互換データに変換"""
+    if hasattr(response, "model_dump"):
+        return response.model_dump(mode="json")
+    return response
+
+
+def file_digest(file) -> str:
+    """開いているファイルの内容のSHA-256（読み取り位置は元に戻す）"""
+    position = file.tell()
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.read(1 << 20), b""):
+        digest.update(chunk)
+    file.seek(position)
+    return digest.hexdigest()
+
+
+class Cassette:
+    """外部呼び出し1件ごとにリクエストのハッシュをキーとして記録・再生"""
+
+    def __init__(
+        self,
+        mode: str = "off",
+        directory: str = "cassettes",
+        latency_scale: float = 1.0,
+        latency_ms: Optional[float] = None,
+        logger: ProgressLogger = None
+    ):
+        if mode not in ("off", "record", "replay"):
+            raise ValueError(f"不正なCASSETTE_MODEです: {mode}")
+        self.mode = mode
+        self.directory = directory
+        # 再生時の遅延 = 記録時の所要時間 × latency_scale（latency_ms指定時は固定値）
+        self.latency_scale = latency_scale
+        self.latency_ms = latency_ms
+        self.logger = logger or ProgressLogger()
+        self._lock = threading.Lock()
+        # 再生時に作成したダミーファイル → 記録時のファイル内容のハッシュ
+        self._digests: Dict[str, str] = {}
+
+    @classmethod
+    def from_env(cls, logger: ProgressLogger = None) -> "Cassette":
+        """環境変数から生成"""
+        latency_ms = get_env("CASSETTE_LATENCY_MS", "")
+        return cls(
+            mode=get_env("CASSETTE_MODE", "off").lower(),
+            directory=get_env("CASSETTE_DIR", "cassettes"),
+            latency_scale=float(get_env("CASSETTE_LATENCY_SCALE", "1.0")),
+            latency_ms=float(latency_ms) if latency_ms else None,
+            logger=logger
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def call(
+        self,
+        kind: str,
+        request: Dict,
+        live_fn: Callable[[], Any],
+        on_replay: Optional[Callable[[Any], None]] = None
+    ) -> Any:
+        """
+        外部呼び出しを記録・再生
+
+        Args:
+            kind: 呼び出し種別（例: "openai.chat.completions"）
+            request: キーとなるリクエスト内容（JSON互換）
+            live_fn: 実際の呼び出し（JSON互換の値を返すこと）
+            on_replay: 再生時にレスポンスを受け取って副作用（ファイル生成等）を再現する関数
+
+        Returns:
+            レスポンス（JSON互換データ）
+        """
+        tracer = get_tracer()
+        if not tracer.enabled:
+            return self._dispatch(kind, request, live_fn, on_replay)
+
+        with tracer.span(kind, **{"external.kind": kind, "cassette.mode": self.mode}) as span:
+            try:
+                response = self._dispatch(kind, request, live_fn, on_replay)
+            except Exception:
+                tracer.metrics.inc("external_calls_total", kind=kind, status="error")
+                raise
+            size = len(json.dumps(response, ensure_ascii=False, default=str).encode('utf-8'))
+            span.set_attribute("bytes_transferred", size)
+            tracer.metrics.inc("external_calls_total", kind=kind, status="ok")
+            tracer.metrics.inc("external_bytes_total", size, kind=kind)
+            return response
+
+    def _dispatch(
+        self,
+        kind: str,
+        request: Dict,
+        live_fn: Callable[[], Any],
+        on_replay: Optional[Callable[[Any], None]] = None
+    ) -> Any:
+        """モードに応じて実呼び出し・記録・再生を振り分け"""
+        if not self.enabled:
+            return live_fn()
+
+        path = self._path(kind, request)
+
+        if self.replaying:
+            if not os.path.exists(path):
+                raise CassetteMissError(f"記録がありません: {kind} {self._request_json(request)[:200]}")
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            self._sleep(entry.get("elapsed", 0.0))
+            if "error" in entry:
+                raise CassetteReplayError(entry["error"]["type"], entry["error"]["message"])
+            if on_replay:
+                on_replay(entry["response"])
+            return entry["response"]
+
+        start = time.perf_counter()
+        try:
+            response = live_fn()
+        except Exception as e:
+            self._save(path, kind, request, time.perf_counter() - start, error={
+                "type": type(e).__name__,
+                "message": str(e)
+            })
+            raise
+        self._save(path, kind, request, time.perf_counter() - start, response=response)
+        return response
+
+    def register_digest(self, path: str, digest: str):
+        """再生時: ダミーファイルを記録時のファイル内容のハッシュで扱う"""
+        with self._lock:
+            self._digests[os.path.abspath(path)] = digest
+
+    def file_digest(self, file) -> str:
+        """リクエストのキーに使うファイル内容のハッシュ（再生時のダミーファイルは記録時の値）"""
+        name = getattr(file, "name", None)
+        if isinstance(name, str):
+            with self._lock:
+                digest = self._digests.get(os.path.abspath(name))
+            if digest is not None:
+                return digest
+        return file_digest(file)
+
+    def _request_json(self, request: Dict) -> str:
+        return json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+
+    def _path(self, kind: str, request: Dict) -> str:
+        digest = hashlib.sha256(f"{kind}\n{self._request_json(request)}".encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, kind, f"{digest[:32]}.json")
+
+    def _save(self, path: str, kind: str, request: Dict, elapsed: float, response: Any = None, error: Dict = None):
+        entry = {"kind": kind, "request": request, "elapsed": elapsed}
+        if error is not None:
+            entry["error"] = error
+        else:
+            entry["response"] = response
+
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False, indent=2, default=str)
+            os.replace(tmp_path, path)
+
+    def _sleep(self, recorded_elapsed: float):
+        """合成レイテンシを再現"""
+        if self.latency_ms is not None:
+            delay = self.latency_ms / 1000
+        else:
+            delay = recorded_elapsed * self.latency_scale
+        if delay > 0:
+            time.sleep(delay)
+
+
+# ========================================
+# OpenAIクライアントのプロキシ
+# ========================================
+class _ChatCompletions:
+    def __init__(self, client, cassette: Cassette):
+        self._client = client
+        self._cassette = cassette
+
+    def create(self, **kwargs):
+        response = self._cassette.call(
+            "openai.chat.completions",
+            kwargs,
+            lambda: _dump_response(self._client.chat.completions.create(**kwargs))
+        )
+        return to_replay_object(response)
+
+
+class _AudioTranscriptions:
+    def __init__(self, client, cassette: Cassette):
+        self._client = client
+        self._cassette = cassette
+
+    def create(self, file, **kwargs):
+        # 一時ファイル名は毎回変わるため、ファイル内容のハッシュ + パラメータをキーにする
+        request = dict(kwargs, file_sha256=self._cassette.file_digest(file))
+        response = self._cassette.call(
+            "openai.audio.transcriptions",
+            request,
+            lambda: _dump_response(self._client.audio.transcriptions.create(file=file, **kwargs))
+        )
+        return to_replay_object(response)
+
+
+class _Namespace:
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+
+class CassetteOpenAI:
+    """openai.OpenAIのうちパイプラインが使う呼び出しだけを記録・再生するプロキシ"""
+
+    def __init__(self, client, cassette: Cassette):
+        self._client = client
+        self.chat = _Namespace(completions=_ChatCompletions(client, cassette))
+        self.audio = _Namespace(transcriptions=_AudioTranscriptions(client, cassette))
+
+
+# ========================================
+# YouTube Data APIクライアントのプロキシ
+# ========================================
+class _YouTubeRequest:
+    def __init__(self, youtube, resource: str, method: str, kwargs: Dict, cassette: Cassette):
+        self._youtube = youtube
+        self._resource = resource
+        self._method = method
+        self._kwargs = kwargs
+        self._cassette = cassette
+
+    def execute(self):
+        return self._cassette.call(
+            f"youtube.{self._resource}.{self._method}",
+            self._kwargs,
+            lambda: getattr(getattr(self._youtube, self._resource)(), self._method)(**self._kwargs).execute()
+        )
+
+
+class _YouTubeResource:
+    def __init__(self, youtube, resource: str, cassette: Cassette):
+        self._youtube = youtube
+        self._resource = resource
+        self._cassette = cassette
+
+    def __getattr__(self, method: str):
+        return lambda **kwargs: _YouTubeRequest(self._youtube, self._resource, method, kwargs, self._cassette)
+
+
+class CassetteYouTube:
+    """googleapiclientのyoutubeリソースを記録・再生するプロキシ（search().list(...).execute()等）"""
+
+    def __init__(self, youtube, cassette: Cassette):
+        self._youtube = youtube
+        self._cassette = cassette
+
+    def __getattr__(self, resource: str):
+        return lambda: _YouTubeResource(self._youtube, resource, self._cassette)
+
+
+# ========================================
+# クライアント生成
+# ========================================
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Cassette:
+    """プロセス共通のカセット（環境変数から初回のみ生成）"""
+    global _cassette
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = Cassette.from_env()
+        return _cassette
+
+
+def set_cassette(cassette: Optional[Cassette]):
+    """プロセス共通のカセットを差し替え（Noneで環境変数から再生成）"""
+    global _cassette
+    with _cassette_lock:
+        _cassette = cassette
+
+
+def build_openai_client():
+    """OpenAIクライアントを生成（記録・再生モードではプロキシで包む。再生時はAPIキー不要）"""
+    import openai
+
+    cassette = get_cassette()
+    if cassette.replaying:
+        return CassetteOpenAI(None, cassette)
+
+    client = openai.OpenAI(api_key=get_env("OPENAI_API_KEY"))
+    # トレース有効時もプロキシ経由にして外部呼び出しのスパンを取る
+    return CassetteOpenAI(client, cassette) if cassette.enabled or get_tracer().enabled else client
+
+
+def build_youtube_client():
+    """YouTube Data APIクライアントを生成（記録・再生モードではプロキシで包む。再生時はAPIキー不要）"""
+    from googleapiclient.discovery import build
+
+    cassette = get_cassette()
+    if cassette.replaying:
+        return CassetteYouTube(None, cassette)
+
+    youtube = build('youtube', 'v3', developerKey=get_env("YOUTUBE_API_KEY"))
+    return CassetteYouTube(youtube, cassette) if cassette.enabled or get_tracer().enabled else youtube
@@ -0,0 +1,196 @@
+"""
+サーキットブレーカーモジュール
+外部依存（チャットモデル・Whisper・YouTube検索・commentThreads・字幕API）ごとに連続失敗を数え、
+閾値を超えたら一定時間呼び出さずに即失敗させる（各ステージは既定のフォールバックで続行する）
+
+- closed: 通常どおり呼び出す。連続 CIRCUIT_FAILURE_THRESHOLD 回失敗したら open
+- open: CircuitOpenError で即失敗。CIRCUIT_RESET_SEC 経過後に half_open
+- half_open: 1件だけ試しに呼び出し、成功すれば closed、失敗すれば再び open
+"""
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from src.cassette import CassetteMissError, CassetteReplayError
+from src.rate_limiter import http_status
+from src.tracing import get_tracer
+from src.utils import get_env, ProgressLogger
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """遮断中の依存先を呼び出そうとした"""
+
+
+# 通信エラー・タイムアウトの例外クラス名（openai / httpx / requests / httplib2 / http.client。
+# いずれも任意の依存なので import せずに名前で判定する）
+NETWORK_ERROR_NAMES = {
+    "APIConnectionError", "APITimeoutError",
+    "ConnectError", "ReadError", "WriteError", "RemoteProtocolError", "TimeoutException",
+    "ConnectTimeout", "ReadTimeout", "Timeout",
+    "HttpLib2Error", "ServerNotFoundError", "RemoteDisconnected", "IncompleteRead",
+}
+
+
+def is_network_error(error: Exception) -> bool:
+    """通信エラー・タイムアウトか"""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return any(cls.__name__ in NETWORK_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def is_outage(error: Exception) -> bool:
+    """
+    依存先の障害とみなす失敗か
+
+    通信エラー・タイムアウト・5xx・408・429・クォータ超過だけを障害とする。
+    それ以外の4xx（コメント無効・不正なリクエストなど）と、ステータスを持たない手元の失敗
+    （レート制限の待機打ち切り・予算超過・カセットの再生漏れ・パースエラー・中止など）は数えない
+    """
+    # 再生した記録の例外・再生漏れは手元の事情（記録時の通信エラーの再生も含めて障害として数えない）
+    if isinstance(error, (CassetteMissError, CassetteReplayError)):
+        return False
+    if is_network_error(error):
+        return True
+    status = http_status(error)
+    if status is None:
+        return False
+    if status >= 500 or status in (408, 429):
+        return True
+    if status == 403:
+        content = getattr(error, "content", b"") or b""
+        if isinstance(content, bytes):
+            content = content.decode("utf-8", "ignore")
+        return "quotaExceeded" in content or "rateLimitExceeded" in content
+    return False
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: Optional[int] = None,
+        reset_sec: Optional[float] = None,
+        is_failure: Callable[[Exception], bool] = is_outage,
+        logger: ProgressLogger = None
+    ):
+        """
+        Args:
+            name: 依存先の名前（例: "chat:gpt-4o", "whisper", "youtube.search"）
+            failure_threshold: 連続失敗がこの回数に達したら遮断（省略時は CIRCUIT_FAILURE_THRESHOLD）
+            reset_sec: 遮断してから試しに呼び出すまでの秒数（省略時は CIRCUIT_RESET_SEC）
+            is_failure: 障害として数える例外か
+        """
+        self.name = name
+        self.logger = logger or ProgressLogger()
+        self.enabled = get_env("CIRCUIT_BREAKER_ENABLED", "true").lower() == "true"
+        self.failure_threshold = failure_threshold or int(get_env("CIRCUIT_FAILURE_THRESHOLD", "5"))
+        self.reset_sec = reset_sec if reset_sec is not None else float(get_env("CIRCUIT_RESET_SEC", "30"))
+        self.is_failure = is_failure
+
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def available(self) -> bool:
+        """今呼び出せるか（遮断中でも試し呼び出しの時期ならTrue）"""
+        if not self.enabled:
+            return True
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return time.monotonic() - self._opened_at >= self.reset_sec
+            return not self._probing
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """
+        遮断中でなければ呼び出し、結果を記録
+
+        Raises:
+            CircuitOpenError: 遮断中
+        """
+        if not self.enabled:
+            return fn()
+        self._before_call()
+        settled = False
+        try:
+            try:
+                result = fn()
+            except Exception as e:
+                if self.is_failure(e):
+                    self._on_failure(e)
+                else:
+                    # 依存先は応答しているので成功扱い
+                    self._on_success()
+                settled = True
+                raise
+            self._on_success()
+            settled = True
+            return result
+        finally:
+            if not settled:
+                # 中断（KeyboardInterrupt等）は成功とも失敗とも数えず、試し呼び出しの枠だけ返す
+                self._release_probe()
+
+    def _before_call(self):
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_sec:
+                    raise CircuitOpenError(f"{self.name} は障害のため遮断中です")
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    raise CircuitOpenError(f"{self.name} は復旧確認中です")
+                self._probing = True
+
+    def _release_probe(self):
+        with self._lock:
+            self._probing = False
+
+    def _on_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+                self.logger.success(f"{self.name} が復旧しました")
+
+    def _on_failure(self, error: Exception):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+                self.logger.warning(
+                    f"{self.name} が連続{self._failures}回失敗したため{self.reset_sec:.0f}秒間遮断します: {str(error)}"
+                )
+
+    def _transition(self, state: str):
+        """状態を変更（ロック内で呼ぶこと）"""
+        self.state = state
+        get_tracer().metrics.inc("circuit_breaker_transitions_total", breaker=self.name, state=state)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, is_failure: Callable[[Exception], bool] = is_outage) -> CircuitBreaker:
+    """プロセス共通のサーキットブレーカー（依存先ごとに1つ）"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            # 複数の実行で共有するため、実行ごとのログ出力先ではなく標準エラーに出す
+            # （標準出力に結果をストリーミングする実行を汚さない）
+            breaker = _breakers[name] = CircuitBreaker(
+                name, is_failure=is_failure, logger=ProgressLogger(stream=sys.stderr)
+            )
+        return breaker
@@ -2,15 +2,19 @@
 コメント分析エンジン
 GPT-4で構文抽出とシーンマッチング
 """
-import openai
 from typing import List, Dict, Optional
-from config.prompt_template import COMMENT_ANALYSIS_PROMPT, REFINEMENT_PROMPT_ADDITION
-from src.utils import get_env, extract_json_from_text, ProgressLogger
+from config.prompt_template import (
+    COMMENT_ANALYSIS_PREFIX,
+    COMMENT_ANALYSIS_SUFFIX,
+    REFINEMENT_PROMPT_ADDITION,
+)
+from src.model_router import ModelRouter
+from src.utils import ProgressLogger
 
 class CommentAnalyzer:
-    def __init__(self, logger: ProgressLogger = None):
-        self.client = openai.OpenAI(api_key=get_env("OPENAI_API_KEY"))
+    def __init__(self, logger: ProgressLogger = None, router: ModelRouter = None):
         self.logger = logger or ProgressLogger()
+        self.router = router or ModelRouter(self.logger)
 
     def analyze(
         self,
@@ -47,7 +51,7 @@ class CommentAnalyzer:
         comments_text = "\n".join([f"{i+1}. {c}" for i, c in enumerate(comments)])
 
         # 基本プロンプト
-        prompt = COMMENT_ANALYSIS_PROMPT.format(
+        prompt = COMMENT_ANALYSIS_SUFFIX.format(
             title=video_info['title'],
             url=video_info['url'],
             transcript=transcript[:15000],  # トークン制限対策（約15K文字まで）
@@ -63,18 +67,18 @@ class CommentAnalyzer:
             )
 
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
+            # 配列として解釈できない応答のみ上位モデルで再生成
+            routed = self.router.complete(
+                "analysis",
                 messages=[
-                    {"role": "system", "content": "あなたはお笑い芸人のツッコミ職人です。"},
+                    {"role": "system", "content": COMMENT_ANALYSIS_PREFIX},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.8,  # 創造性を確保
-                max_tokens=4000
+                max_tokens=4000,
+                validate=lambda r: isinstance(r, list) and len(r) > 0
             )
-
-            result_text = response.choices[0].message.content
-            result = extract_json_from_text(result_text)
+            result = routed["result"]
 
             if isinstance(result, list):
                 self.logger.success(f"分析完了: {len(result)}件のネタを抽出")
@@ -1,14 +1,22 @@
 """
 YouTubeコメント取得モジュール
 """
-from googleapiclient.discovery import build
 from typing import List, Dict
-from src.utils import get_env, ProgressLogger
+from src.cassette import build_youtube_client
+from src.circuit_breaker import get_breaker
+from src.rate_limiter import get_rate_limiter
+from src.single_flight import single_flight
+from src.utils import ProgressLogger
 
 class CommentFetcher:
-    def __init__(self, logger: ProgressLogger = None):
-        self.api_key = get_env("YOUTUBE_API_KEY")
-        self.youtube = build('youtube', 'v3', developerKey=self.api_key)
+    def __init__(self, logger: ProgressLogger = None, youtube=None):
+        """
+        Args:
+            youtube: YouTube Data APIクライアント（省略時は生成。スレッド間で共有しないこと）
+        """
+        self.youtube = youtube or build_youtube_client()
+        self.limiter = get_rate_limiter()
+        self.breaker = get_breaker("youtube.comments")
         self.logger = logger or ProgressLogger()
 
     def fetch_comments(
@@ -34,6 +42,14 @@ class CommentFetcher:
                 "reply_count": 返信数
             }]
         """
+        # 同じ動画のコメントを同時に取得しようとした場合は1回にまとめる
+        return single_flight(
+            ("comments", video_id, max_results, order),
+            lambda: self._fetch_comments(video_id, max_results, order)
+        )
+
+    def _fetch_comments(self, video_id: str, max_results: int, order: str) -> List[Dict]:
+        """commentThreads.listをページングして取得"""
         self.logger.info(f"コメント取得中: {video_id} (最大{max_results}件)")
 
         comments = []
@@ -50,7 +66,9 @@ class CommentFetcher:
                     textFormat="plainText"
                 )
 
-                response = request.execute()
+                response = self.breaker.call(
+                    lambda: self.limiter.execute_youtube(request, "commentThreads.list", "comment_fetch")
+                )
 
                 for item in response.get('items', []):
                     top_comment = item['snippet']['topLevelComment']['snippet']
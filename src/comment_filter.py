@@ -2,15 +2,15 @@
 コメントフィルタリングモジュール
 GPT-3.5で大量コメントから候補を絞る
 """
-import openai
 from typing import List
-from config.prompt_template import COMMENT_FILTERING_PROMPT
-from src.utils import get_env, extract_json_from_text, ProgressLogger
+from config.prompt_template import COMMENT_FILTERING_PREFIX, COMMENT_FILTERING_SUFFIX
+from src.model_router import ModelRouter
+from src.utils import ProgressLogger
 
 class CommentFilter:
-    def __init__(self, logger: ProgressLogger = None):
-        self.client = openai.OpenAI(api_key=get_env("OPENAI_API_KEY"))
+    def __init__(self, logger: ProgressLogger = None, router: ModelRouter = None):
         self.logger = logger or ProgressLogger()
+        self.router = router or ModelRouter(self.logger)
 
     def filter_comments(
         self,
@@ -36,37 +36,54 @@ class CommentFilter:
         # コメントを整形
         comments_text = "\n".join([f"{i+1}. {c}" for i, c in enumerate(comments)])
 
-        prompt = COMMENT_FILTERING_PROMPT.format(
+        prompt = COMMENT_FILTERING_SUFFIX.format(
             comments=comments_text,
             target_count=target_count
         )
 
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",  # コスト削減のためGPT-3.5使用
+            routed = self.router.complete(
+                "filtering",
                 messages=[
-                    {"role": "system", "content": "あなたはお笑い芸人のネタ選びアシスタントです。"},
+                    {"role": "system", "content": COMMENT_FILTERING_PREFIX},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.5,
-                max_tokens=2000
+                max_tokens=2000,
+                validate=lambda r: isinstance(r, dict) and isinstance(r.get("selected_comments"), list)
             )
-
-            result_text = response.choices[0].message.content
-            result = extract_json_from_text(result_text)
+            result = routed["result"]
 
             if result and "selected_comments" in result:
                 selected = result["selected_comments"]
                 self.logger.success(f"フィルタリング完了: {len(selected)}件を選出")
                 return selected
             else:
-                self.logger.warning("フィルタリング結果のパースに失敗、元のコメントを返します")
-                return comments[:target_count]
+                self.logger.warning(f"フィルタリング結果のパースに失敗、ローカルの順位付け（重複・短いコメントを後回し）で{target_count}件に絞ります")
+                return self.rank_locally(comments, target_count)
 
         except Exception as e:
-            self.logger.error(f"フィルタリングエラー: {str(e)}")
-            # エラー時は単純に上位N件を返す
-            return comments[:target_count]
+            self.logger.error(f"フィルタリングエラー、ローカルの順位付けで{target_count}件に絞ります: {str(e)}")
+            # エラー時（モデル遮断中を含む）はローカルの順位付けで絞る
+            return self.rank_locally(comments, target_count)
+
+    @staticmethod
+    def rank_locally(comments: List[str], target_count: int, min_length: int = 8) -> List[str]:
+        """
+        LLMを使わずにコメントを絞る
+
+        取得順（YouTubeの関連度順）を保ったまま、重複と短すぎるコメント（「草」「w」など、
+        ネタになりにくい）を後回しにして上位N件を返す
+        """
+        seen = set()
+        primary, short = [], []
+        for comment in comments:
+            key = " ".join(comment.split())
+            if key in seen:
+                continue
+            seen.add(key)
+            (primary if len(key) >= min_length else short).append(comment)
+        return (primary + short)[:target_count]
 
 
 if __name__ == "__main__":
@@ -2,15 +2,26 @@
 早期スクリーニングモジュール（コメントのみ版）
 コメントの面白さだけでスクリーニングしてコスト削減
 """
-import openai
 from typing import Dict, List
-from config.prompt_template import COMMENT_SCREENING_PROMPT
-from src.utils import get_env, extract_json_from_text, ProgressLogger
+from config.prompt_template import (
+    COMMENT_SCREENING_PREFIX,
+    COMMENT_SCREENING_SUFFIX,
+    COMMENT_SCREENING_BATCH_PREFIX,
+    COMMENT_SCREENING_BATCH_SUFFIX,
+    COMMENT_SCREENING_BATCH_ITEM,
+    COMMENT_SCREEN_AND_FILTER_PREFIX,
+    COMMENT_SCREEN_AND_FILTER_SUFFIX,
+)
+from src.model_router import ModelRouter
+from src.utils import get_env, estimate_tokens, pack_batches, ProgressLogger
 
 class EarlyScreener:
-    def __init__(self, logger: ProgressLogger = None):
-        self.client = openai.OpenAI(api_key=get_env("OPENAI_API_KEY"))
+    def __init__(self, logger: ProgressLogger = None, router: ModelRouter = None):
         self.logger = logger or ProgressLogger()
+        self.router = router or ModelRouter(self.logger)
+        # バッチモード: 1リクエストに詰める最大トークン数・最大動画数
+        self.batch_token_budget = int(get_env("BATCH_TOKEN_BUDGET", "8000"))
+        self.batch_max_videos = int(get_env("BATCH_MAX_VIDEOS", "5"))
 
     def screen_comments(
         self,
@@ -40,7 +51,7 @@ class EarlyScreener:
         # コメントを整形
         comments_text = "\n".join([f"{i+1}. {c}" for i, c in enumerate(comments)])
 
-        prompt = COMMENT_SCREENING_PROMPT.format(
+        prompt = COMMENT_SCREENING_SUFFIX.format(
             title=video_info['title'],
             channel_title=video_info.get('channel_title', '不明'),
             comments=comments_text,
@@ -48,44 +59,229 @@ class EarlyScreener:
         )
 
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",  # 最高峰モデル使用
+            # 軽量モデルで判定し、閾値付近・低確信度・スキーマ不一致の場合のみ上位モデルへ
+            routed = self.router.complete(
+                "screening",
                 messages=[
-                    {"role": "system", "content": "あなたはYouTuberのネタ探しエージェントです。"},
+                    {"role": "system", "content": COMMENT_SCREENING_PREFIX},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.3,  # 判定は安定性重視
-                max_tokens=500
+                max_tokens=500,
+                validate=lambda r: isinstance(r, dict) and "score" in r,
+                is_borderline=lambda r: self.router.is_borderline(
+                    r.get("score"), threshold, r.get("confidence")
+                )
             )
-
-            result_text = response.choices[0].message.content
-            result = extract_json_from_text(result_text)
+            result = routed["result"]
 
             if result:
-                score = result.get("score", 0)
-                passed = result.get("passed", False) and score >= threshold
-
-                screening_result = {
-                    "passed": passed,
-                    "score": score,
-                    "reason": result.get("reason", ""),
-                    "example_comments": result.get("example_comments", []),
-                    "expected_content_type": result.get("expected_content_type", "")
-                }
-
-                if passed:
-                    self.logger.success(f"✅ 合格 (スコア: {score}/10) - {screening_result['reason'][:50]}...")
-                else:
-                    self.logger.warning(f"❌ 不合格 (スコア: {score}/10) - スキップします")
-
-                return screening_result
+                return self._build_screening_result(result, threshold, routed["model"])
             else:
                 self.logger.error("スクリーニング結果のパースに失敗")
-                return {"passed": False, "score": 0, "reason": "解析エラー"}
+                return {"passed": False, "score": 0, "reason": "解析エラー", "error": True}
+
+        except Exception as e:
+            self.logger.error(f"スクリーニングエラー: {str(e)}")
+            return {"passed": False, "score": 0, "reason": str(e), "error": True}
+
+    def screen_and_filter(
+        self,
+        video_info: Dict,
+        comments: List[str],
+        threshold: float = 6.0,
+        target_count: int = 50
+    ) -> Dict:
+        """
+        スクリーニングとコメントフィルタリングを1回の呼び出しで実行
+
+        合格動画ごとにCommentFilterで全コメントを再送する往復を省略できる。
+
+        Args:
+            video_info: 動画情報 {"title", "channel_title", ...}
+            comments: 全コメントリスト
+            threshold: 合格スコア閾値
+            target_count: 選定するコメント件数
+
+        Returns:
+            screen_comments()の戻り値 + "selected_comments": 選定コメントリスト
+            （不合格時は空リスト）
+        """
+        if len(comments) <= target_count:
+            # 絞り込み不要ならフィルタリングなしの通常スクリーニングで十分
+            screening_result = self.screen_comments(video_info, comments, threshold)
+            screening_result["selected_comments"] = comments if screening_result['passed'] else []
+            return screening_result
+
+        self.logger.info(f"コメントスクリーニング + フィルタリング中: {video_info['title']} ({len(comments)}件 → {target_count}件)")
+
+        comments_text = "\n".join([f"{i+1}. {c}" for i, c in enumerate(comments)])
+
+        prompt = COMMENT_SCREEN_AND_FILTER_SUFFIX.format(
+            target_count=target_count,
+            title=video_info['title'],
+            channel_title=video_info.get('channel_title', '不明'),
+            comments=comments_text,
+            comment_count=len(comments)
+        )
+
+        try:
+            routed = self.router.complete(
+                "screening",
+                messages=[
+                    {"role": "system", "content": COMMENT_SCREEN_AND_FILTER_PREFIX},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,
+                max_tokens=500 + 60 * target_count,  # 選定コメント分の出力枠を確保
+                validate=lambda r: (
+                    isinstance(r, dict) and "score" in r
+                    and isinstance(r.get("selected_comments"), list)
+                ),
+                is_borderline=lambda r: self.router.is_borderline(
+                    r.get("score"), threshold, r.get("confidence")
+                )
+            )
+            result = routed["result"]
+
+            if not result:
+                self.logger.error("スクリーニング結果のパースに失敗")
+                return {"passed": False, "score": 0, "reason": "解析エラー", "error": True, "selected_comments": []}
+
+            screening_result = self._build_screening_result(result, threshold, routed["model"])
+            selected = result.get("selected_comments") or []
+            if screening_result['passed'] and not selected:
+                self.logger.warning("選定コメントが空のため、上位コメントを使用します")
+                selected = comments[:target_count]
+            screening_result["selected_comments"] = selected[:target_count] if screening_result['passed'] else []
+            return screening_result
 
         except Exception as e:
             self.logger.error(f"スクリーニングエラー: {str(e)}")
-            return {"passed": False, "score": 0, "reason": str(e)}
+            return {"passed": False, "score": 0, "reason": str(e), "error": True, "selected_comments": []}
+
+    def screen_batch(
+        self,
+        videos_data: List[Dict],
+        threshold: float = 6.0
+    ) -> List[Dict]:
+        """
+        複数動画のコメントを1リクエストにまとめてスクリーニング
+
+        判定基準・出力形式を動画ごとに繰り返さずに済むため、小さな動画が多い場合に
+        往復回数とトークンを削減できる。トークン予算内でバッチに分割し、
+        バッチが失敗した動画・結果スロットが欠けた動画・ボーダーラインの動画は
+        screen_comments()で個別に判定し直す。
+
+        Args:
+            videos_data: [{
+                "video_info": 動画情報,
+                "comments": コメントリスト
+            }]
+            threshold: 合格スコア閾値
+
+        Returns:
+            videos_dataと同じ順序のスクリーニング結果リスト
+        """
+        results: List[Dict] = [None] * len(videos_data)
+        indexed = list(enumerate(videos_data))
+        batches = pack_batches(
+            indexed,
+            size_fn=lambda x: estimate_tokens("\n".join(x[1]['comments'])),
+            token_budget=self.batch_token_budget,
+            max_items=self.batch_max_videos
+        )
+
+        for batch in batches:
+            if len(batch) > 1:
+                for idx, result in self._screen_one_batch(batch, threshold).items():
+                    results[idx] = result
+
+            # バッチで確定しなかった動画は個別判定にフォールバック
+            for idx, data in batch:
+                if results[idx] is None:
+                    results[idx] = self.screen_comments(data['video_info'], data['comments'], threshold)
+
+        return results
+
+    def _screen_one_batch(self, batch: List, threshold: float) -> Dict[int, Dict]:
+        """1バッチ分をまとめて判定し、確定した結果を {元のindex: 結果} で返す"""
+        video_blocks = []
+        for _, data in batch:
+            comments = data['comments']
+            video_blocks.append(COMMENT_SCREENING_BATCH_ITEM.format(
+                video_id=data['video_info']['video_id'],
+                title=data['video_info']['title'],
+                channel_title=data['video_info'].get('channel_title', '不明'),
+                comment_count=len(comments),
+                comments="\n".join([f"{i+1}. {c}" for i, c in enumerate(comments)])
+            ))
+
+        prompt = COMMENT_SCREENING_BATCH_SUFFIX.format(
+            video_count=len(batch),
+            videos="".join(video_blocks)
+        )
+
+        self.logger.info(f"コメントスクリーニング中（バッチ{len(batch)}本）")
+
+        try:
+            routed = self.router.complete(
+                "screening",
+                messages=[
+                    {"role": "system", "content": COMMENT_SCREENING_BATCH_PREFIX},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,
+                max_tokens=400 * len(batch),
+                validate=lambda r: isinstance(r, dict) and isinstance(r.get("results"), dict)
+            )
+        except Exception as e:
+            self.logger.warning(f"バッチスクリーニング失敗、個別判定に切り替えます: {str(e)}")
+            return {}
+
+        slots = (routed["result"] or {}).get("results")
+        if not isinstance(slots, dict):
+            self.logger.warning("バッチスクリーニング結果のパースに失敗、個別判定に切り替えます")
+            return {}
+
+        confirmed = {}
+        for idx, data in batch:
+            slot = slots.get(data['video_info']['video_id'])
+            if not isinstance(slot, dict) or "score" not in slot:
+                continue
+            # スコアが数値でないスロットは個別判定に回す（"7" のような文字列は数値に直す）
+            try:
+                slot = dict(slot, score=float(slot["score"]))
+            except (TypeError, ValueError):
+                continue
+            # ボーダーラインのスロットは個別判定（カスケード）に回す
+            if self.router.is_borderline(slot.get("score"), threshold, slot.get("confidence")):
+                continue
+            self.logger.info(f"バッチ判定結果: {data['video_info']['title']}")
+            confirmed[idx] = self._build_screening_result(slot, threshold, routed["model"])
+
+        return confirmed
+
+    def _build_screening_result(self, result: Dict, threshold: float, model: str) -> Dict:
+        """モデル出力からスクリーニング結果を組み立ててログ出力"""
+        score = result.get("score", 0)
+        passed = result.get("passed", False) and score >= threshold
+
+        screening_result = {
+            "passed": passed,
+            "score": score,
+            "reason": result.get("reason", ""),
+            "example_comments": result.get("example_comments", []),
+            "expected_content_type": result.get("expected_content_type", ""),
+            "model": model
+        }
+
+        if passed:
+            self.logger.success(f"✅ 合格 (スコア: {score}/10) - {screening_result['reason'][:50]}...")
+        else:
+            self.logger.warning(f"❌ 不合格 (スコア: {score}/10) - スキップします")
+
+        return screening_result
 
     def screen_multiple_videos(
         self,
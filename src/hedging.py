@@ -0,0 +1,156 @@
+"""
+ヘッジリクエストモジュール
+チャット補完が直近のレイテンシのパーセンタイル（HEDGE_PERCENTILE）を過ぎても返ってこない場合に
+同じリクエストをもう1本（HEDGE_FALLBACK_MODEL 指定時はそのモデルへ）送り、先に返った方を採用する
+
+- 遅い方は結果を捨てる（同期クライアントでは送信済みのHTTPリクエストを止められないため、
+  未送信なら取り消し、送信済みなら完了を待たずに破棄して使用量だけ記録する）
+- ヘッジ率（HEDGE_MAX_RATE）と破棄した応答のコスト（HEDGE_BUDGET_USD）に上限を設ける
+- 既定は無効（HEDGE_ENABLED=true で有効）
+"""
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+from src.tracing import get_tracer
+from src.utils import get_env, ProgressLogger
+
+# パーセンタイルを計算する直近のレイテンシ件数（ステージ・モデルごと）
+LATENCY_WINDOW = 200
+
+
+class Hedger:
+    def __init__(self, logger: ProgressLogger = None):
+        self.logger = logger or ProgressLogger()
+        self.tracer = get_tracer()
+        self.enabled = get_env("HEDGE_ENABLED", "false").lower() == "true"
+        self.percentile = float(get_env("HEDGE_PERCENTILE", "95"))
+        # レイテンシの記録がこの件数に満たないうちはヘッジしない
+        self.min_samples = int(get_env("HEDGE_MIN_SAMPLES", "20"))
+        self.max_rate = float(get_env("HEDGE_MAX_RATE", "0.1"))
+        self.budget_usd = float(get_env("HEDGE_BUDGET_USD", "0"))
+        self.fallback_model = get_env("HEDGE_FALLBACK_MODEL", "")
+
+        self._lock = threading.Lock()
+        self._latencies: Dict[Tuple[str, str], Deque[float]] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.spent_usd = 0.0
+
+    def record_latency(self, stage: str, model: str, seconds: float):
+        """成功した呼び出しのレイテンシを記録"""
+        with self._lock:
+            self._latencies.setdefault((stage, model), deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def delay(self, stage: str, model: str) -> Optional[float]:
+        """ヘッジを送るまでの待ち時間（記録が足りなければNone）"""
+        with self._lock:
+            samples = sorted(self._latencies.get((stage, model), ()))
+        if len(samples) < self.min_samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+        return samples[index]
+
+    def _allow(self) -> bool:
+        """ヘッジ率・予算の上限内か（ロック内で呼ぶこと）"""
+        if (self.hedged + 1) / max(self.requests, 1) > self.max_rate:
+            return False
+        return not (self.budget_usd and self.spent_usd >= self.budget_usd)
+
+    def call(
+        self,
+        stage: str,
+        model: str,
+        send: Callable[[str], Any],
+        on_discard: Callable[[str, Any], float]
+    ) -> Tuple[Any, str]:
+        """
+        ヘッジ付きで呼び出し
+
+        Args:
+            stage: ステージ名
+            model: モデル名
+            send: モデル名を受け取ってAPIを呼び出す関数
+            on_discard: 破棄した応答の使用量を記録し、そのコスト（USD）を返す関数
+
+        Returns:
+            (採用した応答, 応答したモデル)
+        """
+        if not self.enabled:
+            return send(model), model
+
+        with self._lock:
+            self.requests += 1
+        delay = self.delay(stage, model)
+        primary = self._submit(stage, send, model)
+        if delay is None or not wait([primary], timeout=delay).not_done:
+            return primary.result(), model
+
+        with self._lock:
+            allowed = self._allow()
+            if allowed:
+                self.hedged += 1
+        if not allowed:
+            return primary.result(), model
+
+        hedge_model = self.fallback_model or model
+        self.logger.info(f"{model} の応答が{delay:.1f}秒を超えたため {hedge_model} へヘッジを送ります")
+        hedge = self._submit(stage, send, hedge_model)
+        futures = {primary: model, hedge: hedge_model}
+
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        winner = next(iter(done))
+        if winner.exception() is not None:
+            # 先に返った方が失敗なら、もう一方の結果を待つ
+            other = hedge if winner is primary else primary
+            wait([other])
+            if other.exception() is not None:
+                raise primary.exception()
+            winner = other
+
+        loser = hedge if winner is primary else primary
+        won = winner is hedge
+        with self._lock:
+            self.hedge_wins += 1 if won else 0
+        self.tracer.metrics.inc("llm_hedges_total", stage=stage, model=model, outcome="won" if won else "lost")
+        if not loser.cancel():
+            loser.add_done_callback(lambda f: self._discard(stage, futures[loser], f, on_discard))
+        return winner.result(), futures[winner]
+
+    def _submit(self, stage: str, send: Callable[[str], Any], model: str) -> Future:
+        """ワーカースレッドで呼び出し、成功したらレイテンシを記録"""
+        def timed():
+            started = time.perf_counter()
+            response = send(model)
+            self.record_latency(stage, model, time.perf_counter() - started)
+            return response
+
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+        # 使用量・トレースのcontextvarをワーカースレッドに引き継ぐ
+        return self._pool.submit(contextvars.copy_context().run, timed)
+
+    def _discard(self, stage: str, model: str, future: Future, on_discard: Callable[[str, Any], float]):
+        """破棄した応答が返ってきたら使用量を記録し、ヘッジのコストに計上"""
+        if future.cancelled() or future.exception() is not None:
+            return
+        cost = on_discard(model, future.result())
+        with self._lock:
+            self.spent_usd += cost
+        self.tracer.metrics.inc("llm_hedge_cost_usd_total", cost, stage=stage, model=model)
+
+    def stats(self) -> Dict:
+        """ヘッジ統計 {"requests", "hedged", "hedge_rate", "hedge_wins", "spent_usd"}"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "hedge_rate": self.hedged / self.requests if self.requests else 0.0,
+                "hedge_wins": self.hedge_wins,
+                "spent_usd": self.spent_usd
+            }
@@ -0,0 +1,247 @@
+"""
+ジョブキューモジュール
+SQLiteファイルだけで動く永続キュー（外部サービス不要）
+
+- enqueue → lease（期限付きで取得）→ ack（完了）/ nack（失敗、バックオフ後に再実行）
+- ワーカーが落ちてリースが期限切れになったジョブは他のワーカーが再取得する
+- 同じキーのジョブは1回だけ登録される（再実行時に後続タスクが重複しない）
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+from src.utils import get_env, ProgressLogger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    job_group TEXT,                     -- 1回の投入（入力文章）単位のID
+    job_key TEXT UNIQUE,                -- 重複登録防止用キー
+    payload TEXT NOT NULL,              -- JSON
+    status TEXT NOT NULL,               -- queued / leased / done / failed
+    priority INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    available_at REAL NOT NULL,
+    result TEXT,                        -- JSON
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(status, kind, available_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_group ON jobs(job_group);
+"""
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+def default_worker_id() -> str:
+    """ホスト名 + プロセスID（同じファイルシステムを共有する複数ホストで一意）"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue:
+    def __init__(self, path: Optional[str] = None, logger: ProgressLogger = None):
+        self.logger = logger or ProgressLogger()
+        self.path = path or get_env("JOB_QUEUE_PATH", "outputs/jobs.sqlite3")
+        # リース期間（ワーカーは処理中この1/3ごとに延長する）
+        self.lease_sec = float(get_env("JOB_LEASE_SEC", "300"))
+        self.max_attempts = int(get_env("JOB_MAX_ATTEMPTS", "3"))
+        # nack後の再実行までの待ち時間（試行回数に応じて倍々）
+        self.retry_backoff_sec = float(get_env("JOB_RETRY_BACKOFF_SEC", "10"))
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # 複数プロセスからの書き込みはSQLiteのロックで直列化（待ち時間はtimeoutまで）
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict,
+        group: Optional[str] = None,
+        key: Optional[str] = None,
+        priority: int = 0
+    ) -> int:
+        """
+        ジョブを登録
+
+        Args:
+            kind: ステージ名
+            payload: タスクの入力（JSON化できる値）
+            group: 投入単位のID
+            key: 重複登録防止用キー（同じキーのジョブが既にあれば登録しない）
+            priority: 大きいほど先に取得される
+
+        Returns:
+            ジョブID（登録済みなら既存のID）
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                INSERT OR IGNORE INTO jobs (
+                    kind, job_group, job_key, payload, status, priority, max_attempts,
+                    available_at, created_at, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (kind, group, key, json.dumps(payload, ensure_ascii=False), QUEUED, priority,
+                 self.max_attempts, now, now, now)
+            )
+            if cursor.rowcount:
+                return cursor.lastrowid
+            row = self._conn.execute("SELECT id FROM jobs WHERE job_key = ?", (key,)).fetchone()
+            return row["id"]
+
+    def lease(self, kinds: List[str], worker_id: str) -> Optional[Dict]:
+        """
+        実行可能なジョブを1件リース（期限切れリースのジョブも対象）
+
+        Returns:
+            {"id", "kind", "group", "payload", "attempts"}、なければNone
+        """
+        now = time.time()
+        placeholders = ",".join("?" * len(kinds))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # 期限切れリースのうち試行回数を使い切ったものは失敗扱い
+                self._conn.execute(
+                    f"""
+                    UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, updated_at = ?
+                    WHERE status = ? AND lease_expires_at < ? AND attempts >= max_attempts
+                      AND kind IN ({placeholders})
+                    """,
+                    (FAILED, "リース期限切れ（ワーカー停止）", now, LEASED, now, *kinds)
+                )
+                row = self._conn.execute(
+                    f"""
+                    SELECT * FROM jobs
+                    WHERE kind IN ({placeholders})
+                      AND ((status = ? AND available_at <= ?) OR (status = ? AND lease_expires_at < ?))
+                    ORDER BY priority DESC, id
+                    LIMIT 1
+                    """,
+                    (*kinds, QUEUED, now, LEASED, now)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                if row["status"] == LEASED:
+                    self.logger.warning(f"リース期限切れのジョブを再取得: #{row['id']} {row['kind']}（前回: {row['lease_owner']}）")
+                self._conn.execute(
+                    """
+                    UPDATE jobs SET status = ?, lease_owner = ?, lease_expires_at = ?,
+                        attempts = attempts + 1, updated_at = ?
+                    WHERE id = ?
+                    """,
+                    (LEASED, worker_id, now + self.lease_sec, now, row["id"])
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "group": row["job_group"],
+            "payload": json.loads(row["payload"]),
+            "attempts": row["attempts"] + 1
+        }
+
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """リースを延長（リースを失っていればFalse）"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_expires_at = ?, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (time.time() + self.lease_sec, time.time(), job_id, LEASED, worker_id)
+            )
+            return cursor.rowcount > 0
+
+    def ack(self, job_id: int, worker_id: str, result: Optional[Dict] = None) -> bool:
+        """完了（リースを失っていればFalse。結果は他のワーカーの実行分を優先し破棄）"""
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                UPDATE jobs SET status = ?, result = ?, lease_owner = NULL, updated_at = ?
+                WHERE id = ? AND status = ? AND lease_owner = ?
+                """,
+                (DONE, json.dumps(result, ensure_ascii=False) if result is not None else None,
+                 time.time(), job_id, LEASED, worker_id)
+            )
+            return cursor.rowcount > 0
+
+    def nack(self, job_id: int, worker_id: str, error: str) -> bool:
+        """失敗（試行回数が残っていればバックオフ後に再実行、なければ失敗確定）"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = ? AND lease_owner = ?",
+                (job_id, LEASED, worker_id)
+            ).fetchone()
+            if row is None:
+                return False
+            if row["attempts"] >= row["max_attempts"]:
+                status, available_at = FAILED, now
+            else:
+                status, available_at = QUEUED, now + self.retry_backoff_sec * 2 ** (row["attempts"] - 1)
+            self._conn.execute(
+                """
+                UPDATE jobs SET status = ?, error = ?, available_at = ?, lease_owner = NULL, updated_at = ?
+                WHERE id = ?
+                """,
+                (status, error, available_at, now, job_id)
+            )
+            return True
+
+    def pending(self, kinds: Optional[List[str]] = None) -> int:
+        """未完了（待機中・リース中）のジョブ数"""
+        sql = "SELECT COUNT(*) AS n FROM jobs WHERE status IN (?, ?)"
+        params: List = [QUEUED, LEASED]
+        if kinds:
+            sql += f" AND kind IN ({','.join('?' * len(kinds))})"
+            params.extend(kinds)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()["n"]
+
+    def stats(self, group: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        """ステージ別・状態別のジョブ数 {kind: {status: 件数}}"""
+        sql = "SELECT kind, status, COUNT(*) AS n FROM jobs"
+        params: List = []
+        if group:
+            sql += " WHERE job_group = ?"
+            params.append(group)
+        sql += " GROUP BY kind, status"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        stats: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            stats.setdefault(row["kind"], {})[row["status"]] = row["n"]
+        return stats
+
+    def failures(self, group: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """失敗確定したジョブ"""
+        sql = "SELECT id, kind, job_group, attempts, error FROM jobs WHERE status = ?"
+        params: List = [FAILED]
+        if group:
+            sql += " AND job_group = ?"
+            params.append(group)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
@@ -0,0 +1,392 @@
+"""
+モデルルーティングモジュール
+安価・高速なモデルから試し、結果がボーダーラインの場合のみ上位モデルへ昇格する
+"""
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from config.model_routing import (
+    DEFAULT_ROUTING_TABLE,
+    DEFAULT_ESCALATION_MARGIN,
+    DEFAULT_MIN_CONFIDENCE,
+)
+from src.cassette import build_openai_client
+from src.circuit_breaker import get_breaker
+from src.hedging import Hedger
+from src.rate_limiter import get_rate_limiter
+from src.tracing import get_tracer
+from src.usage_tracker import current_tracker, estimate_cost
+from src.utils import get_env, estimate_tokens, extract_json_from_text, ProgressLogger
+
+
+class ModelRouter:
+    """ステージ別モデルカスケード + 昇格統計"""
+
+    def __init__(
+        self,
+        logger: ProgressLogger = None,
+        client=None,
+        routing_table: Optional[Dict[str, List[str]]] = None
+    ):
+        self.logger = logger or ProgressLogger()
+        self.client = client or build_openai_client()
+        self.limiter = get_rate_limiter()
+        self.hedger = Hedger(self.logger)
+        self.tracer = get_tracer()
+        self.routing_table = self._load_routing_table(routing_table or DEFAULT_ROUTING_TABLE)
+        self.escalation_margin = float(get_env("ESCALATION_MARGIN", str(DEFAULT_ESCALATION_MARGIN)))
+        self.min_confidence = float(get_env("MIN_CONFIDENCE", str(DEFAULT_MIN_CONFIDENCE)))
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+
+    def _load_routing_table(self, base_table: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """環境変数 MODEL_ROUTE_<STAGE> でテーブルを上書き"""
+        table = {stage: list(models) for stage, models in base_table.items()}
+        for stage in table:
+            override = get_env(f"MODEL_ROUTE_{stage.upper()}", "")
+            models = [m.strip() for m in override.split(",") if m.strip()]
+            if models:
+                table[stage] = models
+        return table
+
+    def get_models(self, stage: str) -> List[str]:
+        """ステージで試すモデル一覧（先頭が最安）"""
+        models = self.routing_table.get(stage)
+        if not models:
+            raise ValueError(f"ルーティング未定義のステージです: {stage}")
+        return models
+
+    def is_borderline(
+        self,
+        score: Optional[float],
+        threshold: float,
+        confidence: Optional[float] = None
+    ) -> bool:
+        """
+        スコアが閾値付近、または自己申告の確信度が低いか判定
+
+        Args:
+            score: モデルが返したスコア
+            threshold: 合格閾値
+            confidence: モデル自己申告の確信度（0.0-1.0、なければNone）
+
+        Returns:
+            ボーダーラインならTrue
+        """
+        try:
+            if score is not None and abs(float(score) - threshold) < self.escalation_margin:
+                return True
+            if confidence is not None and float(confidence) < self.min_confidence:
+                return True
+        except (TypeError, ValueError):
+            return True
+        return False
+
+    def complete(
+        self,
+        stage: str,
+        messages: List[Dict],
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        validate: Optional[Callable[[object], bool]] = None,
+        is_borderline: Optional[Callable[[object], bool]] = None
+    ) -> Dict:
+        """
+        カスケードでチャット補完を実行
+
+        Args:
+            stage: ステージ名（ルーティングテーブルのキー）
+            messages: チャットメッセージ
+            temperature: 温度
+            max_tokens: 最大出力トークン
+            validate: パース結果のスキーマチェック（Falseで昇格）
+            is_borderline: パース結果がボーダーラインか（Trueで昇格）
+
+        Returns:
+            {
+                "result": パース済みJSON（失敗時None）,
+                "text": 生のレスポンステキスト,
+                "model": 最終的に採用したモデル,
+                "tier": 採用したモデルの段（0始まり）,
+                "escalated": 昇格したかどうか,
+                "degraded": 昇格先が遮断中・失敗のため下位モデルの結果で代用したか
+            }
+            どのモデルからも結果が得られなかった場合は例外を送出
+        """
+        with self.tracer.span(f"llm.{stage}", stage=stage) as span:
+            routed = self._cascade(stage, messages, temperature, max_tokens, validate, is_borderline)
+            span.set_attributes(
+                model=routed["model"], tier=routed["tier"], escalated=routed["escalated"], degraded=routed["degraded"]
+            )
+            return routed
+
+    def _cascade(
+        self,
+        stage: str,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        validate: Optional[Callable[[object], bool]],
+        is_borderline: Optional[Callable[[object], bool]]
+    ) -> Dict:
+        """下位モデルから順に呼び出し、昇格条件を満たさなくなった時点の結果を返す"""
+        models = self.get_models(stage)
+        start_time = time.perf_counter()
+        total_cost = 0.0
+
+        tracker = current_tracker()
+        if tracker:
+            tracker.check_budget(stage)
+            if tracker.downgraded:
+                # 予算超過後は昇格せず最安モデルの結果をそのまま使う
+                models = models[:1]
+
+        # TPMの消費見込み（入力 + 最大出力）
+        request_tokens = estimate_tokens("".join(str(m.get("content", "")) for m in messages)) + max_tokens
+
+        def send(target: str):
+            """レート制限・サーキットブレーカー経由で1回呼び出し"""
+            return get_breaker(f"chat:{target}").call(lambda: self.limiter.call_openai(
+                target,
+                request_tokens,
+                lambda: self.client.chat.completions.create(
+                    model=target,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+            ))
+
+        # 昇格前の下位モデルの結果（ボーダーラインだがスキーマは正しい）。昇格先が使えなければこれで代用する
+        fallback: Optional[Dict] = None
+
+        def degrade(reason: str) -> Dict:
+            self.logger.warning(f"{reason}のため {fallback['model']} の結果を使います")
+            self._record(stage, fallback["model"], fallback["tier"], time.perf_counter() - start_time, total_cost)
+            self.tracer.metrics.inc("llm_escalations_skipped_total", stage=stage, model=fallback["model"])
+            return {**fallback, "degraded": True}
+
+        for tier, model in enumerate(models):
+            is_last = tier == len(models) - 1
+            if not get_breaker(f"chat:{model}").available:
+                if not is_last:
+                    # 障害中のモデルは呼ばずに上位モデルへ
+                    self.logger.warning(f"{model} は遮断中のため {models[tier + 1]} を使います")
+                    continue
+                if fallback:
+                    return degrade(f"昇格先の {model} が遮断中")
+                # 代用できる結果がなければ呼び出してCircuitOpenErrorで即失敗
+
+            with self.tracer.span("llm.attempt", stage=stage, model=model, tier=tier) as span:
+                call_start = time.perf_counter()
+                try:
+                    # 遅い場合はヘッジ（有効時のみ）。ヘッジ先のモデルが先に返ればそのモデルの結果を使う
+                    response, model = self.hedger.call(
+                        stage, model, send,
+                        on_discard=lambda target, discarded: self._record_discarded(stage, target, discarded, tracker)
+                    )
+                except Exception as e:
+                    self.tracer.metrics.inc("llm_requests_total", stage=stage, model=model, outcome="error")
+                    if is_last:
+                        if fallback:
+                            span.record_error(e)
+                            return degrade(f"昇格先の {model} の呼び出しに失敗（{str(e)}）")
+                        self._record(stage, model, tier, time.perf_counter() - start_time, total_cost, failed=True)
+                        raise
+                    span.record_error(e)
+                    self.logger.warning(f"{model} 呼び出し失敗、上位モデルへ昇格: {str(e)}")
+                    continue
+
+                prompt_tokens, completion_tokens, cached_tokens = self._usage_tokens(response)
+                total_cost += estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens)
+                if tracker:
+                    tracker.record_llm(stage, model, prompt_tokens, completion_tokens, cached_tokens)
+                self._record_call(stage, model, prompt_tokens, completion_tokens, cached_tokens,
+                                  time.perf_counter() - call_start)
+                span.set_attributes(
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=completion_tokens,
+                    cached_tokens=cached_tokens,
+                    cache_hit=cached_tokens > 0
+                )
+                result_text = response.choices[0].message.content
+                result = extract_json_from_text(result_text)
+
+                reason = None
+                if validate and not validate(result):
+                    reason = "スキーマ不一致"
+                elif is_borderline and is_borderline(result):
+                    reason = "ボーダーライン"
+                span.set_attribute("escalation_reason", reason)
+                self.tracer.metrics.inc(
+                    "llm_requests_total", stage=stage, model=model,
+                    outcome="ok" if reason is None else "escalated"
+                )
+
+                if reason is None or is_last:
+                    self._record(stage, model, tier, time.perf_counter() - start_time, total_cost)
+                    return {
+                        "result": result,
+                        "text": result_text,
+                        "model": model,
+                        "tier": tier,
+                        "escalated": tier > 0,
+                        "degraded": False
+                    }
+
+                if reason == "ボーダーライン":
+                    fallback = {
+                        "result": result,
+                        "text": result_text,
+                        "model": model,
+                        "tier": tier,
+                        "escalated": tier > 0
+                    }
+                self.logger.info(f"{model} の結果が{reason}のため {models[tier + 1]} へ昇格")
+
+    def _usage_tokens(self, response) -> tuple:
+        """
+        レスポンスのusageからトークン数を取得
+
+        Returns:
+            (入力トークン, 出力トークン, キャッシュヒットした入力トークン)
+        """
+        usage = getattr(response, "usage", None)
+        if not usage:
+            return 0, 0, 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        return (
+            getattr(usage, "prompt_tokens", 0) or 0,
+            getattr(usage, "completion_tokens", 0) or 0,
+            getattr(details, "cached_tokens", 0) or 0
+        )
+
+    def _record_discarded(self, stage: str, model: str, response, tracker) -> float:
+        """ヘッジで破棄した応答の使用量を記録（課金はされるため）し、コストを返す"""
+        prompt_tokens, completion_tokens, cached_tokens = self._usage_tokens(response)
+        if tracker:
+            tracker.record_llm(stage, model, prompt_tokens, completion_tokens, cached_tokens)
+        return estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens)
+
+    def _stage_stats(self, stage: str) -> Dict:
+        """ステージ別統計の器を取得（ロック内で呼ぶこと）"""
+        return self._stats.setdefault(stage, {
+            "calls": 0,
+            "escalations": 0,
+            "failures": 0,
+            "total_latency": 0.0,
+            "total_cost_usd": 0.0,
+            "final_models": {},
+            "api_calls": 0,
+            "prompt_tokens": 0,
+            "cached_tokens": 0,
+            "cache_hit_calls": 0,
+            "cache_hit_latency": 0.0,
+            "cache_miss_latency": 0.0
+        })
+
+    def _record_call(
+        self,
+        stage: str,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int,
+        latency: float
+    ):
+        """API呼び出し1回分のトークン・プロンプトキャッシュ統計を更新"""
+        if self.tracer.enabled:
+            metrics = self.tracer.metrics
+            metrics.inc("llm_tokens_total", prompt_tokens, stage=stage, model=model, type="prompt")
+            metrics.inc("llm_tokens_total", completion_tokens, stage=stage, model=model, type="completion")
+            metrics.inc("llm_tokens_total", cached_tokens, stage=stage, model=model, type="cached")
+        with self._lock:
+            stats = self._stage_stats(stage)
+            stats["api_calls"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["cached_tokens"] += cached_tokens
+            if cached_tokens > 0:
+                stats["cache_hit_calls"] += 1
+                stats["cache_hit_latency"] += latency
+            else:
+                stats["cache_miss_latency"] += latency
+
+    def _record(
+        self,
+        stage: str,
+        model: str,
+        tier: int,
+        latency: float,
+        cost: float,
+        failed: bool = False
+    ):
+        """ステージ別統計を更新"""
+        with self._lock:
+            stats = self._stage_stats(stage)
+            stats["calls"] += 1
+            stats["escalations"] += 1 if tier > 0 else 0
+            stats["failures"] += 1 if failed else 0
+            stats["total_latency"] += latency
+            stats["total_cost_usd"] += cost
+            stats["final_models"][model] = stats["final_models"].get(model, 0) + 1
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """
+        ステージ別の昇格率・レイテンシ・コストを取得
+
+        Returns:
+            {
+                "screening": {
+                    "calls": 呼び出し数,
+                    "escalation_rate": 昇格率,
+                    "avg_latency_sec": 平均レイテンシ,
+                    "total_cost_usd": 推定コスト,
+                    "final_models": {モデル: 採用回数},
+                    "cache_hit_ratio": 入力トークンのうちキャッシュヒットした割合,
+                    "avg_latency_cache_hit_sec": キャッシュヒット時の平均レイテンシ,
+                    "avg_latency_cache_miss_sec": キャッシュミス時の平均レイテンシ,
+                    ...
+                }
+            }
+        """
+        with self._lock:
+            stats = {}
+            for stage, s in self._stats.items():
+                calls = s["calls"] or 1
+                miss_calls = s["api_calls"] - s["cache_hit_calls"]
+                stats[stage] = {
+                    "calls": s["calls"],
+                    "escalations": s["escalations"],
+                    "escalation_rate": s["escalations"] / calls,
+                    "failures": s["failures"],
+                    "avg_latency_sec": s["total_latency"] / calls,
+                    "total_cost_usd": s["total_cost_usd"],
+                    "final_models": dict(s["final_models"]),
+                    "api_calls": s["api_calls"],
+                    "prompt_tokens": s["prompt_tokens"],
+                    "cached_tokens": s["cached_tokens"],
+                    "cache_hit_ratio": s["cached_tokens"] / s["prompt_tokens"] if s["prompt_tokens"] else 0.0,
+                    "avg_latency_cache_hit_sec": (
+                        s["cache_hit_latency"] / s["cache_hit_calls"] if s["cache_hit_calls"] else None
+                    ),
+                    "avg_latency_cache_miss_sec": (
+                        s["cache_miss_latency"] / miss_calls if miss_calls else None
+                    )
+                }
+            return stats
+
+    def log_stats(self):
+        """統計をログ出力"""
+        for stage, s in self.get_stats().items():
+            self.logger.info(
+                f"[{stage}] 呼び出し{s['calls']}回 / 昇格率{s['escalation_rate']:.0%} / "
+                f"平均{s['avg_latency_sec']:.1f}秒 / ${s['total_cost_usd']:.4f} / "
+                f"キャッシュヒット率{s['cache_hit_ratio']:.0%}"
+            )
+        if self.hedger.enabled:
+            h = self.hedger.stats()
+            self.logger.info(
+                f"[ヘッジ] {h['requests']}回中{h['hedged']}回（{h['hedge_rate']:.0%}） / "
+                f"ヘッジ側の勝ち{h['hedge_wins']}回 / 破棄した応答 ${h['spent_usd']:.4f}"
+            )
@@ -2,7 +2,11 @@
 オーケストレーターモジュール
 全処理フローを統合し、自己改善ループを管理
 """
-from typing import Dict, List, Optional
+import contextvars
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.cassette import build_youtube_client
 from src.search_query_generator import SearchQueryGenerator
 from src.youtube_search import YouTubeSearcher
 from src.transcript_fetcher import TranscriptFetcher
@@ -11,222 +15,1143 @@ from src.early_screener import EarlyScreener
 from src.comment_filter import CommentFilter
 from src.comment_analyzer import CommentAnalyzer
 from src.quality_evaluator import QualityEvaluator
+from src.analysis_validator import AnalysisValidator
 from src.whisper_transcriber import WhisperTranscriber
-from src.utils import get_env, save_json, ProgressLogger
+from src.model_router import ModelRouter
+from src.progress_events import (
+    ProgressEvents, STAGE_START, STAGE_FINISH, VIDEO_VERDICT, ITEMS, RESULT, RUN_FINISH,
+    PASSED, FAILED, SKIPPED, REUSED,
+)
+from src.scheduler import RunScheduler
+from src.tracing import get_tracer
+from src.result_sink import JsonlResultSink
+from src.result_store import ResultStore
+from src.run_config import RunConfig
+from src.run_journal import RunJournal
+from src.single_flight import single_flight
+from src.usage_tracker import UsageTracker
+from src.video_registry import VideoRegistry, comment_fingerprint, PROCESS, SKIP, REUSE_SCREENING, REUSE_RESULT
+from src.utils import save_json, ProgressLogger
+
+# 評価モデルの遮断で品質評価できなかった結果の警告
+UNEVALUATED_WARNING = "品質評価未実施（評価モデルが遮断中）"
+
 
 class YouTubeCommentOrchestrator:
     """全処理を統括するメインオーケストレーター"""
 
-    def __init__(self, verbose: bool = True):
-        self.logger = ProgressLogger(verbose=verbose)
+    def __init__(
+        self,
+        verbose: bool = True,
+        log_stream=None,
+        router: Optional[ModelRouter] = None,
+        registry: Optional[VideoRegistry] = None,
+        result_store: Optional[ResultStore] = None,
+        config: Optional[RunConfig] = None,
+        youtube=None
+    ):
+        """
+        Args:
+            verbose: 詳細ログを出力するか
+            log_stream: ログの出力先（省略時は標準出力）
+            config: 処理設定（省略時は RunConfig.from_env()）
+            youtube: 検索・コメント取得で使うYouTube Data APIクライアント（省略時は生成）
+            router / registry / result_store: 複数のオーケストレーター（バッチ実行のワーカー）で共有する場合に指定
+        """
+        self.logger = ProgressLogger(verbose=verbose, stream=log_stream)
+        self.tracer = get_tracer()
+
+        # LLM呼び出しは全ステージで1つのルーター（モデルカスケード + 統計）を共有
+        self.router = router or ModelRouter(self.logger)
 
         # 各モジュール初期化
-        self.query_generator = SearchQueryGenerator(self.logger)
-        self.searcher = YouTubeSearcher(self.logger)
+        self.query_generator = SearchQueryGenerator(self.logger, self.router)
+        # YouTubeクライアントは検索・コメント取得で、OpenAIクライアントはルーターとWhisperで1つを共有
+        youtube = youtube or build_youtube_client()
+        self.searcher = YouTubeSearcher(self.logger, youtube)
         self.transcript_fetcher = TranscriptFetcher(self.logger)
-        self.whisper_transcriber = WhisperTranscriber(self.logger)
-        self.comment_fetcher = CommentFetcher(self.logger)
-        self.screener = EarlyScreener(self.logger)
-        self.comment_filter = CommentFilter(self.logger)
-        self.analyzer = CommentAnalyzer(self.logger)
-        self.evaluator = QualityEvaluator(self.logger)
-
-        # 設定読み込み
-        self.max_search_results = int(get_env("MAX_SEARCH_RESULTS", "3"))
-        self.max_comments = int(get_env("MAX_COMMENTS_PER_VIDEO", "200"))
-        self.screening_comments = int(get_env("EARLY_SCREENING_COMMENTS", "20"))
-        self.filtered_comments = int(get_env("FILTERED_COMMENTS", "50"))
-        self.quality_threshold = float(get_env("QUALITY_THRESHOLD", "7.0"))
-        self.max_retry = int(get_env("MAX_RETRY_ATTEMPTS", "2"))
-
-    def process(self, user_input: str) -> List[Dict]:
+        self.whisper_transcriber = WhisperTranscriber(self.logger, self.router.client)
+        self.comment_fetcher = CommentFetcher(self.logger, youtube)
+        self.screener = EarlyScreener(self.logger, self.router)
+        self.comment_filter = CommentFilter(self.logger, self.router)
+        self.analyzer = CommentAnalyzer(self.logger, self.router)
+        self.validator = AnalysisValidator(self.logger)
+        self.evaluator = QualityEvaluator(self.logger, self.router)
+        self.usage = UsageTracker.from_env(self.logger)
+        self.scheduler = RunScheduler(self.logger)
+        self.registry = registry or VideoRegistry(logger=self.logger)
+        self.result_store = result_store or ResultStore(logger=self.logger)
+
+        # 処理設定（省略時は環境変数から。実行中に変わらないよう変更不可のオブジェクトで保持）
+        self.config = config or RunConfig.from_env()
+
+        self._cancel = threading.Event()
+        self._run_target = self.config.target_results
+        # レジストリから再利用するネタパック（スクリーニング時に集め、分析の前に確定させる）
+        self._reused_results: List[Dict] = []
+        self._run_query: Optional[str] = None
+        self._result_sink: Optional[JsonlResultSink] = None
+        self._keep_results = True
+        # 今回の実行で確定した結果数・合格数
+        self._emitted = 0
+        self._passed = 0
+        # 結果ストアに保存できなかった結果（Step 5でJSONに残す）
+        self._unstored: List[Dict] = []
+        # 締め切りで打ち切った実行（実行中の呼び出しが返るまでバックグラウンドに残る）
+        self._abandoned = False
+        self._abandoned_worker: Optional[threading.Thread] = None
+        self._emit_lock = threading.Lock()
+        # 実行ジャーナル（process()ごとに新規作成、または再開対象を読み込む）
+        self.journal = RunJournal(logger=self.logger, enabled=False)
+        self.run_id: Optional[str] = None
+        # 進捗イベントの配信先（process()のon_eventで実行ごとに設定）
+        self.events = ProgressEvents(logger=self.logger)
+
+    def process(
+        self,
+        user_input: Optional[str],
+        on_result: Optional[Callable[[Dict], None]] = None,
+        deadline_sec: Optional[float] = None,
+        max_cost_usd: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        target_results: Optional[int] = None,
+        cancel_event: Optional[threading.Event] = None,
+        result_sink: Optional[JsonlResultSink] = None,
+        keep_results: bool = True,
+        resume_run_id: Optional[str] = None,
+        on_event: Optional[Callable[[Dict], None]] = None
+    ) -> List[Dict]:
         """
         メイン処理フロー
 
         Args:
             user_input: ユーザーの入力文章
+            on_result: 1動画分の結果が確定するたびに呼ばれるコールバック
+            deadline_sec: 壁時計の締め切り（秒）。指定時は間に合う見込みの処理だけを行い、
+                締め切り時点で得られている結果を返す
+            max_cost_usd: 推定コストの上限（USD、省略時は MAX_RUN_COST_USD）
+            max_tokens: トークン数の上限（省略時は MAX_RUN_TOKENS）
+            target_results: 品質評価に合格したネタパックがこの件数に達したら残りを打ち切る
+                （省略時は設定の target_results、0は無制限）
+            cancel_event: 外部から処理を中止するためのイベント（set()で以降の処理をスキップ）
+            result_sink: 1動画分の結果が確定するたびにJSONLで追記する出力先
+            keep_results: Falseなら結果をメモリに保持せず空リストを返す（result_sink・on_resultで受け取る場合）
+            resume_run_id: 中断した実行のID。指定時はジャーナルに記録済みのステップを再利用し、
+                続きから処理する（user_inputはジャーナルの値を使う）
+            on_event: 進捗イベント（src/progress_events.py）を受け取るコールバック
 
         Returns:
             ネタパックのリスト
         """
+        if not user_input and not resume_run_id:
+            raise ValueError("入力文章が指定されていません")
+
+        if self._abandoned_worker is not None and self._abandoned_worker.is_alive():
+            # 前回締め切りで打ち切った処理がジャーナル・状態を書き換えないよう、終わるのを待ってから始める
+            self.logger.info("前回締め切りで打ち切った処理の終了を待ちます")
+            self._abandoned_worker.join()
+
+        # 各ステップの出力をジャーナルに記録し、中断しても続きから再開できるようにする
+        if resume_run_id:
+            self.journal = RunJournal.resume(resume_run_id, logger=self.logger)
+            found, recorded = self.journal.lookup("input")
+            if found:
+                if user_input and user_input != recorded['user_input']:
+                    self.logger.warning(f"再開する実行の入力を使用します: {recorded['user_input']}")
+                user_input = recorded['user_input']
+            if not user_input:
+                self.journal.close()
+                raise ValueError("入力文章が指定されていません")
+        else:
+            self.journal = RunJournal(logger=self.logger)
+            self.journal.record("input", {"user_input": user_input})
+        self.run_id = self.journal.run_id
+
+        # 使用量・予算・締め切りは実行ごとに管理
+        self._begin_run(
+            usage=UsageTracker.from_env(self.logger, max_cost_usd=max_cost_usd, max_tokens=max_tokens),
+            query=user_input,
+            deadline_sec=deadline_sec,
+            cancel_event=cancel_event,
+            target_results=target_results if target_results is not None else self.config.target_results,
+            result_sink=result_sink,
+            keep_results=keep_results,
+            journal=self.journal,
+            on_event=on_event
+        )
+        try:
+            with self.usage.activate(), self.tracer.span("pipeline.process", user_input=user_input) as span:
+                span.set_attribute("run_id", self.run_id)
+                all_results = self._run_until_deadline(user_input, on_result)
+                span.set_attribute("results", self._emitted)
+        finally:
+            self.journal.close()
+        self.events.publish(RUN_FINISH, results=self._emitted, passed=self._passed, error=None)
+        if self._abandoned:
+            # 打ち切った処理のイベントは終了後に届けない
+            self.events.close()
+        self.tracer.flush()
+        return all_results
+
+    def _run_until_deadline(
+        self,
+        user_input: str,
+        on_result: Optional[Callable[[Dict], None]] = None
+    ) -> List[Dict]:
+        """
+        締め切りがあれば別スレッドで実行し、締め切りを過ぎたら実行中の呼び出し（Whisper・分析・評価など）を
+        待たずに、それまでに確定した結果を返す
+
+        打ち切った処理は中止を設定して放置する（同期クライアントの呼び出しは止められないため）。
+        その後に確定した結果は出力・保存しない
+        """
+        if not self.scheduler.active:
+            return self._run_pipeline(user_input, on_result)
+
+        emitted: List[Dict] = []
+
+        def collect(result: Dict):
+            emitted.append(result)
+            if on_result:
+                on_result(result)
+
+        outcome: Dict[str, Any] = {}
+
+        def run():
+            try:
+                outcome["results"] = self._run_pipeline(user_input, collect)
+            except BaseException as e:
+                outcome["error"] = e
+
+        # 使用量・トレースのcontextvarを引き継ぐ
+        worker = threading.Thread(target=contextvars.copy_context().run, args=(run,), daemon=True, name="pipeline")
+        worker.start()
+        worker.join(timeout=max(self.scheduler.remaining(), 0))
+        if worker.is_alive():
+            with self._emit_lock:
+                self._abandoned = True
+                self._cancel.set()
+                results = list(emitted) if self._keep_results else []
+            self._abandoned_worker = worker
+            self.logger.warning(f"締め切りを過ぎたため実行中の処理を打ち切り、確定した{len(emitted)}件の結果を返します")
+            self.tracer.metrics.inc("deadline_abandoned_runs_total")
+            return results
+
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["results"]
+
+    def _run_pipeline(
+        self,
+        user_input: str,
+        on_result: Optional[Callable[[Dict], None]] = None
+    ) -> List[Dict]:
+        """Step 1-5を順に実行"""
         self.logger.log("=" * 60)
         self.logger.log("🎬 YouTube Comment Analyzer 開始")
         self.logger.log("=" * 60)
+        if self.journal.enabled:
+            self.logger.info(f"実行ID: {self.run_id}（中断時は --resume {self.run_id} で再開できます）")
 
         # Step 1: 検索ワード生成
         self.logger.log("\n📝 Step 1: 検索ワード生成")
-        search_queries = self.query_generator.generate(user_input)
+        self.events.publish(STAGE_START, stage="queries")
+        with self.tracer.span("stage.query_generation"):
+            search_queries = self._journaled("queries", lambda: self.query_generator.generate(user_input))
+        self.events.publish(STAGE_FINISH, stage="queries", count=len(search_queries or []))
         if not search_queries:
             self.logger.error("検索ワードの生成に失敗しました")
             return []
 
         # Step 2: YouTube動画検索
         self.logger.log("\n🔍 Step 2: YouTube動画検索")
-        videos = self.searcher.search_multiple_queries(
-            search_queries,
-            max_results_per_query=self.max_search_results
-        )
+        self.events.publish(STAGE_START, stage="search")
+        with self.tracer.span("stage.search", queries=len(search_queries)) as span:
+            videos = self._journaled("videos", lambda: self.searcher.search_multiple_queries(
+                search_queries,
+                max_results_per_query=self.config.max_search_results
+            ))
+            span.set_attribute("videos", len(videos))
+        self.events.publish(STAGE_FINISH, stage="search", count=len(videos))
         if not videos:
             self.logger.error("動画が見つかりませんでした")
             return []
 
+        all_results = self._screen_and_analyze(videos, on_result)
+
+        # Step 5: 結果保存（結果ストア・result_sinkには1動画ごとに保存済み）
+        if self._emitted:
+            self.logger.log("\n💾 Step 5: 結果保存")
+            if self._result_sink:
+                self.logger.success(f"結果を出力しました: {self._result_sink.target}（{self._result_sink.count}件）")
+            if self.result_store.enabled and not self._unstored:
+                self.logger.success(f"結果は結果ストアに保存済みです: {self.result_store.path}")
+            else:
+                # 結果ストアが無効、または保存に失敗した結果はJSONに残す
+                unsaved = self._unstored if self.result_store.enabled else all_results
+                if unsaved:
+                    filepath = save_json(unsaved, "analysis_result")
+                    self.logger.success(f"結果を保存しました: {filepath}")
+            filepath = save_json(self.usage.report(), "usage_report")
+            self.logger.success(f"使用量レポートを保存しました: {filepath}")
+
+        self.logger.log("\n📈 モデルルーティング統計")
+        self.router.log_stats()
+        self.usage.log_summary()
+
+        self.logger.log("\n" + "=" * 60)
+        self.logger.success(f"✅ 処理完了！ {self._emitted}件のネタパックを生成")
+        self.logger.log("=" * 60)
+        self.journal.record("done", {"results": self._emitted})
+
+        return all_results
+
+    def process_videos(
+        self,
+        videos: List[Dict],
+        on_result: Optional[Callable[[Dict], None]] = None,
+        usage: Optional[UsageTracker] = None,
+        query: Optional[str] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> List[Dict]:
+        """
+        検索済みの動画に対してスクリーニング・分析（Step 3-4）だけを実行
+
+        バッチ実行で、複数の入力から集めて重複除去した動画をワーカーに割り振るために使う。
+        実行ジャーナル・結果ファイル・使用量レポートの保存は呼び出し側で行う。
+
+        Args:
+            videos: YouTubeSearcher.search_videos()の動画情報リスト
+            on_result: 1動画分の結果が確定するたびに呼ばれるコールバック
+            usage: 使用量の集計先（複数のワーカーで共有する場合に指定）
+            query: 結果ストアに記録する入力文章
+            cancel_event: 外部から処理を中止するためのイベント
+
+        Returns:
+            ネタパックのリスト
+        """
+        self._begin_run(usage=usage, query=query, cancel_event=cancel_event)
+        with self.usage.activate():
+            return self._screen_and_analyze(videos, on_result)
+
+    def run_stage(self, kind: str, payload: Dict) -> Tuple[Dict, List[Tuple[str, Dict]]]:
+        """
+        ステージ単位のタスクを1件実行（ジョブキューのステージワーカー用）
+
+        ステージ: search → comments → screen → transcribe → analyze
+        各ステージは独立したプロセス・ホストで実行でき、後続タスクはキューに積み直される。
+
+        Args:
+            kind: ステージ名
+            payload: タスクの入力（前段のステージが返したもの）
+
+        Returns:
+            (タスクの結果, 後続タスクのリスト[(ステージ名, payload)])
+        """
+        self._begin_run(query=payload.get('user_input'))
+        with self.usage.activate():
+            if kind == "search":
+                output, follow_ups = self._stage_search(payload)
+            else:
+                with self.usage.video(payload['video']['video_id']):
+                    output, follow_ups = getattr(self, f"_stage_{kind}")(payload)
+        output["usage"] = self.usage.report()["total"]
+        return output, follow_ups
+
+    def _stage_search(self, payload: Dict) -> Tuple[Dict, List[Tuple[str, Dict]]]:
+        """検索ワード生成 + 動画検索 → 動画ごとのコメント取得タスク"""
+        user_input = payload['user_input']
+        search_queries = self.query_generator.generate(user_input)
+        if not search_queries:
+            raise RuntimeError("検索ワードの生成に失敗しました")
+        videos = self.searcher.search_multiple_queries(
+            search_queries,
+            max_results_per_query=self.config.max_search_results
+        )
+        follow_ups = [("comments", {"user_input": user_input, "video": video}) for video in videos]
+        return {"queries": search_queries, "videos": len(videos)}, follow_ups
+
+    def _stage_comments(self, payload: Dict) -> Tuple[Dict, List[Tuple[str, Dict]]]:
+        """動画レジストリの確認 + コメント取得 → スクリーニングタスク"""
+        video = payload['video']
+        video_id = video['video_id']
+        entry = self.registry.lookup([video_id]).get(video_id)
+        comment_count = self.searcher.get_comment_counts([video_id]).get(video_id) if entry else None
+        decision = self.registry.classify(entry, comment_count)
+        if decision in (SKIP, REUSE_RESULT):
+            # 不合格の動画は処理せず、ネタパックがあれば結果ストアに保存済み
+            return {"registry": decision}, []
+
+        comments_data = self.comment_fetcher.fetch_comments(video_id, max_results=self.config.max_comments)
+        if not comments_data:
+            self.registry.record_screening(video, "no_comments", comment_count=comment_count or 0)
+            return {"comments": 0}, []
+
+        comments = [c['text'] for c in comments_data]
+        fingerprint = comment_fingerprint(comments)
+        if entry and entry['screening_result'] and (
+                decision == REUSE_SCREENING or entry['comment_fingerprint'] == fingerprint):
+            if entry['verdict'] != "passed":
+                return {"comments": len(comments), "registry": "failed"}, []
+            video_data = {"video_info": video, "comments": comments, "screening_result": entry['screening_result']}
+            return {"comments": len(comments), "registry": decision}, [
+                ("transcribe", {"user_input": payload['user_input'], "video": video, "video_data": video_data})
+            ]
+
+        return {"comments": len(comments)}, [("screen", {
+            "user_input": payload['user_input'],
+            "video": video,
+            "comments": comments,
+            "comment_count": comment_count if comment_count is not None else len(comments),
+            "fingerprint": fingerprint
+        })]
+
+    def _stage_screen(self, payload: Dict) -> Tuple[Dict, List[Tuple[str, Dict]]]:
+        """早期スクリーニング → 合格なら文字起こしタスク"""
+        video = payload['video']
+        comments = payload['comments']
+        screening_result = self._screen_video(video, comments, payload['fingerprint'])
+        if screening_result.get('error'):
+            # 一時的な失敗はジョブを失敗させて再実行する
+            raise RuntimeError(f"スクリーニングに失敗しました: {screening_result.get('reason')}")
+
+        selected_comments = screening_result.pop("selected_comments", None)
+        self._record_screening(video, screening_result, payload['comment_count'], payload['fingerprint'])
+        if not screening_result['passed']:
+            return {"passed": False, "score": screening_result.get('score')}, []
+
+        video_data = {"video_info": video, "comments": comments, "screening_result": screening_result}
+        if selected_comments is not None:
+            video_data["filtered_comments"] = selected_comments
+        return {"passed": True, "score": screening_result.get('score')}, [
+            ("transcribe", {"user_input": payload['user_input'], "video": video, "video_data": video_data})
+        ]
+
+    def _stage_transcribe(self, payload: Dict) -> Tuple[Dict, List[Tuple[str, Dict]]]:
+        """文字起こし（YouTube字幕 or Whisper）→ 分析タスク"""
+        transcript = self._get_transcript(payload['video']['video_id'])
+        if not transcript:
+            raise RuntimeError("文字起こしの取得に失敗しました")
+        # 取得済みの文字起こしを字幕として渡し、分析ステージで再取得しない
+        video_data = dict(payload['video_data'], captions=transcript)
+        return {"chars": len(transcript)}, [
+            ("analyze", {"user_input": payload['user_input'], "video": payload['video'], "video_data": video_data})
+        ]
+
+    def _stage_analyze(self, payload: Dict) -> Tuple[Dict, List[Tuple[str, Dict]]]:
+        """コメントフィルタリング + 分析・品質評価ループ → 結果ストアに保存"""
+        result = self._analyze_video(payload['video_data'])
+        if not result:
+            raise RuntimeError("分析に失敗しました")
+        self._emit_result(result, [])
+        return {
+            "passed": bool(result['evaluation'].get('passed')),
+            "score": result['evaluation'].get('total_score'),
+            "attempts": result['attempts']
+        }, []
+
+    def _begin_run(
+        self,
+        usage: Optional[UsageTracker] = None,
+        query: Optional[str] = None,
+        deadline_sec: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+        target_results: int = 0,
+        result_sink: Optional[JsonlResultSink] = None,
+        keep_results: bool = True,
+        journal: Optional[RunJournal] = None,
+        on_event: Optional[Callable[[Dict], None]] = None
+    ):
+        """実行ごとの状態（使用量・締め切り・中止・目標件数・出力先・ジャーナル・進捗イベント）を初期化"""
+        self.usage = usage or UsageTracker.from_env(self.logger)
+        self.scheduler.start(deadline_sec)
+        self._cancel = cancel_event or threading.Event()
+        self._run_target = target_results
+        self._run_query = query
+        self._result_sink = result_sink
+        self._keep_results = keep_results
+        self._emitted = 0
+        self._passed = 0
+        self._unstored = []
+        self._abandoned = False
+        self.journal = journal or RunJournal(logger=self.logger, enabled=False)
+        self.events = ProgressEvents(on_event, self.logger)
+
+    def _screen_and_analyze(
+        self,
+        videos: List[Dict],
+        on_result: Optional[Callable[[Dict], None]] = None
+    ) -> List[Dict]:
+        """Step 3-4（コメント取得 + 早期スクリーニング、詳細分析）を実行"""
         # Step 3: コメント取得 + 早期スクリーニング
         self.logger.log("\n💬 Step 3: コメント取得 + 早期スクリーニング")
-        screened_videos = self._screen_videos_by_comments(videos)
-        if not screened_videos:
+        self.events.publish(STAGE_START, stage="screening")
+        with self.tracer.span("stage.screening", videos=len(videos)) as span:
+            screened_videos = self._screen_videos_by_comments(videos)
+            span.set_attribute("passed", len(screened_videos))
+        self.events.publish(STAGE_FINISH, stage="screening", count=len(screened_videos))
+        if not screened_videos and not self._reused_results:
             self.logger.warning("ネタになる動画が見つかりませんでした")
             return []
 
         # Step 4: 各動画の詳細分析
         self.logger.log("\n🤖 Step 4: 詳細分析開始")
-        all_results = []
-        for video_data in screened_videos:
-            result = self._analyze_video(video_data)
-            if result:
-                all_results.append(result)
+        self.events.publish(STAGE_START, stage="analysis")
+        with self.tracer.span("stage.analysis", videos=len(screened_videos)):
+            # 再利用するネタパックを先に確定（目標件数に達していれば分析自体を行わない）
+            all_results = []
+            for result in self._reused_results:
+                self._emit_result(result, all_results, on_result, fresh=False)
 
-        # Step 5: 結果保存
-        if all_results:
-            self.logger.log("\n💾 Step 5: 結果保存")
-            filepath = save_json(all_results, "analysis_result")
-            self.logger.success(f"結果を保存しました: {filepath}")
+            if self.scheduler.active:
+                # 字幕の有無で所要時間が大きく変わるため、先に字幕だけ取得してから価値/秒順に並べる
+                self._prefetch_captions(screened_videos)
+                screened_videos = self.scheduler.prioritize(screened_videos)
+            else:
+                # 有望な動画から分析し、目標件数に早く到達させる
+                screened_videos = sorted(
+                    screened_videos,
+                    key=lambda v: float(v['screening_result'].get('score', 0) or 0),
+                    reverse=True
+                )
 
-        self.logger.log("\n" + "=" * 60)
-        self.logger.success(f"✅ 処理完了！ {len(all_results)}件のネタパックを生成")
-        self.logger.log("=" * 60)
+            if self.config.batch_mode:
+                self._analyze_videos_batched(screened_videos, all_results, on_result)
+            else:
+                for video_data in screened_videos:
+                    if self._cancel.is_set():
+                        break
+                    if self.usage.aborted:
+                        self.logger.warning("予算上限に達したため残りの動画をスキップします")
+                        break
+                    if self.scheduler.expired:
+                        self.logger.warning("締め切りに達したため残りの動画をスキップします")
+                        break
+                    # まだ1件も結果がなければ予測に関わらず着手する（結果ゼロよりは部分的な結果を返す）
+                    if self._emitted and not self.scheduler.allow_video(video_data):
+                        self.logger.warning(f"締め切りに間に合わない見込みのためスキップ: {video_data['video_info']['title']}")
+                        continue
+                    video_id = video_data['video_info']['video_id']
+                    with self.tracer.span("video.analyze", video_id=video_id) as span, self.usage.video(video_id):
+                        result = self._analyze_video(video_data)
+                        span.set_attribute("attempts", result['attempts'] if result else 0)
+                    if result:
+                        self._emit_result(result, all_results, on_result)
 
+        self.events.publish(STAGE_FINISH, stage="analysis", count=self._emitted)
         return all_results
 
     def _screen_videos_by_comments(self, videos: List[Dict]) -> List[Dict]:
         """
         コメントの面白さでスクリーニング（新フロー）
         動画内容は見ない、コメントのみで判定
+
+        動画レジストリに登録済みの動画は、不合格なら一定期間スキップし、
+        合格済みならスクリーニング結果（鮮度期間内でネタパックがあればネタパック）を再利用する。
+        コメント数が大きく増えた動画のみ再スクリーニングする。
         """
         screened_videos = []
+        videos_with_comments = []
+        # {動画ID: (コメント総数, コメント指紋)}（バッチ判定後のレジストリ登録用）
+        registry_meta = {}
+        self._reused_results = []
+
+        known = self.registry.lookup([v['video_id'] for v in videos])
+        # 再スクリーニング判定用に、登録済みの動画だけ現在のコメント総数を取得
+        comment_counts = self._journaled(
+            "comment_counts", lambda: self.searcher.get_comment_counts(list(known))
+        ) if known else {}
 
         for video in videos:
+            if self._cancel.is_set():
+                self.logger.warning("処理が中止されました")
+                break
+            if self.usage.aborted:
+                self.logger.warning("予算上限に達したため残りの動画のスクリーニングをスキップします")
+                break
+            if self.scheduler.expired:
+                self.logger.warning("締め切りに達したため残りの動画のスクリーニングをスキップします")
+                break
+
+            video_id = video['video_id']
+            found, result = self.journal.lookup("result", video_id)
+            if found:
+                # 再開時、中断前に確定していた結果はそのまま使う
+                self.logger.info(f"実行ジャーナルから結果を復元: {video['title']}")
+                self._reused_results.append(result)
+                self._publish_verdict(video, REUSED, result['screening_result'], "実行ジャーナルから復元")
+                continue
+
+            entry = known.get(video_id)
+            decision = self.registry.classify(entry, comment_counts.get(video_id))
+            if decision == SKIP:
+                self.logger.info(f"前回不合格のためスキップ: {video['title']}")
+                self._publish_verdict(video, SKIPPED, entry['screening_result'], "前回不合格")
+                continue
+            if decision == REUSE_RESULT:
+                self.logger.info(f"前回のネタパックを再利用: {video['title']}")
+                self._reused_results.append(dict(entry['result'], reused=True))
+                self._publish_verdict(video, REUSED, entry['screening_result'], "前回のネタパックを再利用")
+                continue
+
             # コメント取得（全件）
-            comments_data = self.comment_fetcher.fetch_comments(
-                video['video_id'],
-                max_results=self.max_comments
-            )
+            with self.tracer.span("video.comments", video_id=video_id) as span, \
+                    self.usage.video(video_id):
+                comments_data = self._journaled("comments", lambda: self.comment_fetcher.fetch_comments(
+                    video_id,
+                    max_results=self.config.max_comments
+                ), video_id)
+                span.set_attribute("comments", len(comments_data))
 
             if not comments_data:
                 self.logger.warning(f"コメントなし、スキップ: {video['title']}")
+                self.registry.record_screening(video, "no_comments", comment_count=comment_counts.get(video_id, 0))
+                self._publish_verdict(video, SKIPPED, reason="コメントなし")
                 continue
 
             comments = [c['text'] for c in comments_data]
+            fingerprint = comment_fingerprint(comments)
+            comment_count = comment_counts.get(video_id, len(comments))
 
-            # コメントのみでスクリーニング
-            screening_result = self.screener.screen_comments(
-                video,
-                comments
-            )
+            # 合格済み、またはコメントが前回から変わっていなければ前回の判定をそのまま使う
+            if entry and entry['screening_result'] and (
+                    decision == REUSE_SCREENING or entry['comment_fingerprint'] == fingerprint):
+                self.logger.info(f"前回のスクリーニング結果を再利用: {video['title']}")
+                if decision == PROCESS:
+                    self.registry.record_screening(
+                        video, entry['verdict'], entry['screening_result'], comment_count, fingerprint
+                    )
+                if entry['verdict'] == "passed":
+                    screened_videos.append({
+                        "video_info": video,
+                        "comments": comments,
+                        "screening_result": entry['screening_result']
+                    })
+                self._publish_verdict(video, PASSED if entry['verdict'] == "passed" else FAILED, entry['screening_result'])
+                continue
+
+            found, screening_result = self.journal.lookup("screening", video_id)
+            if not found:
+                if self.config.batch_mode:
+                    # バッチモードでは全動画のコメントを集めてからまとめて判定
+                    videos_with_comments.append({"video_info": video, "comments": comments})
+                    registry_meta[video_id] = (comment_count, fingerprint)
+                    continue
+
+                with self.tracer.span("video.screen", video_id=video_id) as span, \
+                        self.usage.video(video_id):
+                    screening_result = self._screen_video(video, comments, fingerprint)
+                    span.set_attributes(score=screening_result.get('score'), passed=screening_result['passed'])
+                self._journal_screening(video_id, screening_result)
+
+            screening_result = dict(screening_result)
+            selected_comments = screening_result.pop("selected_comments", None)
+            self._record_screening(video, screening_result, comment_count, fingerprint)
+            self._publish_verdict(video, PASSED if screening_result['passed'] else FAILED, screening_result)
 
             if screening_result['passed']:
-                screened_videos.append({
+                video_data = {
                     "video_info": video,
                     "comments": comments,  # コメントを保持
                     "screening_result": screening_result
-                })
+                }
+                if selected_comments is not None:
+                    video_data["filtered_comments"] = selected_comments
+                screened_videos.append(video_data)
+
+        if videos_with_comments:
+            screening_results = self._screen_batch(videos_with_comments, registry_meta)
+            for data, screening_result in zip(videos_with_comments, screening_results):
+                self._journal_screening(data['video_info']['video_id'], screening_result)
+                self._record_screening(
+                    data['video_info'], screening_result, *registry_meta[data['video_info']['video_id']]
+                )
+                self._publish_verdict(data['video_info'], PASSED if screening_result['passed'] else FAILED, screening_result)
+                if screening_result['passed']:
+                    data['screening_result'] = screening_result
+                    screened_videos.append(data)
 
         return screened_videos
 
+    def _screen_batch(self, videos_with_comments: List[Dict], registry_meta: Dict) -> List[Dict]:
+        """
+        複数動画をまとめてスクリーニング
+
+        同じ動画・同じコメントの組み合わせのバッチが他のセッション・ワーカーで実行中なら、その結果を共有する。
+        バッチ判定はコメントを選定しないため、統合スクリーニング（FUSED_SCREENING）は使わない
+        （合格動画は分析時に個別にフィルタリングする）。
+        """
+        if self.config.fused_screening:
+            self.logger.warning(
+                "バッチモードのため統合スクリーニングは使いません（合格動画のコメントは分析時にフィルタリングします）"
+            )
+        key = ("screening_batch",) + tuple(
+            (data['video_info']['video_id'], registry_meta[data['video_info']['video_id']][1])
+            for data in videos_with_comments
+        )
+        return single_flight(key, lambda: self.screener.screen_batch(videos_with_comments))
+
+    def _screen_video(self, video: Dict, comments: List[str], fingerprint: str) -> Dict:
+        """
+        1動画をスクリーニング
+
+        同じ動画・同じコメントの判定が他のセッション・ワーカーで実行中なら、その結果を共有する
+        """
+        def screen():
+            if self.config.fused_screening:
+                # 判定と同時にコメントを選定し、分析時のフィルタリング呼び出しを省略
+                return self.screener.screen_and_filter(
+                    video,
+                    comments,
+                    target_count=self.config.filtered_comments
+                )
+            # コメントのみでスクリーニング
+            return self.screener.screen_comments(video, comments)
+
+        key = ("screening", video['video_id'], fingerprint, self.config.fused_screening, self.config.filtered_comments)
+        return single_flight(key, screen)
+
+    def _publish_verdict(
+        self,
+        video: Dict,
+        verdict: str,
+        screening_result: Optional[Dict] = None,
+        reason: Optional[str] = None
+    ):
+        """動画ごとのスクリーニング判定を進捗イベントとして配信"""
+        screening_result = screening_result or {}
+        self.events.publish(
+            VIDEO_VERDICT,
+            video_id=video['video_id'],
+            title=video['title'],
+            verdict=verdict,
+            score=screening_result.get('score'),
+            reason=reason or screening_result.get('reason')
+        )
+
+    def _journal_screening(self, video_id: str, screening_result: Dict):
+        """スクリーニング結果をジャーナルに記録（判定エラーは再開時にやり直す）"""
+        if not screening_result.get('error'):
+            self.journal.record("screening", screening_result, video_id)
+
+    def _journaled(self, step: str, fn: Callable[[], Any], video_id: Optional[str] = None) -> Any:
+        """
+        ジャーナルに記録済みならその値を返し、なければ実行して記録
+
+        空の結果（取得失敗）は記録せず、再開時にやり直す
+        """
+        found, value = self.journal.lookup(step, video_id)
+        if found:
+            return value
+        value = fn()
+        if value:
+            self.journal.record(step, value, video_id)
+        return value
+
+    def _record_screening(self, video: Dict, screening_result: Dict, comment_count: int, fingerprint: str):
+        """スクリーニング結果をレジストリに登録（判定エラーは一時的な失敗のため登録しない）"""
+        if screening_result.get('error'):
+            return
+        verdict = "passed" if screening_result['passed'] else "failed"
+        self.registry.record_screening(video, verdict, screening_result, comment_count, fingerprint)
+
     def _analyze_video(self, video_data: Dict) -> Optional[Dict]:
         """
         1つの動画を詳細分析（自己改善ループ付き）
         新フロー: Whisperで文字起こし → シーンマッチング
         """
         video_info = video_data['video_info']
-        self.logger.log(f"\n📹 分析中: {video_info['title']}")
-
-        # Step 1: 文字起こし取得（YouTube字幕 or Whisper）
-        transcript = self._get_transcript(video_info['video_id'])
-        if not transcript:
-            self.logger.error("文字起こしの取得に失敗")
+        prepared = self._prepare_analysis(video_data)
+        if not prepared:
             return None
+        transcript, filtered_comments = prepared
 
-        # Step 2: コメントフィルタリング（既にスクリーニングで取得済み）
-        comments = video_data['comments']
-        filtered_comments = self.comment_filter.filter_comments(
-            comments,
-            target_count=self.filtered_comments
-        )
-
-        # 自己改善ループ
+        # 自己改善ループ（再開時はジャーナルに記録済みの分析・評価を再利用する）
+        video_id = video_info['video_id']
         attempt = 1
         analysis_result = None
         refinement_feedback = None
 
-        while attempt <= self.max_retry:
-            self.logger.info(f"分析試行 {attempt}/{self.max_retry}")
+        while attempt <= self.config.max_retry:
+            if self._cancel.is_set():
+                return None
 
-            # コメント分析
-            analysis_result = self.analyzer.analyze(
-                video_info,
-                transcript,
-                filtered_comments,
-                refinement_feedback=refinement_feedback
-            )
+            analysis_result = self._recorded_attempt("analysis", video_id, attempt)
+            if analysis_result is not None:
+                self.logger.info(f"分析試行 {attempt}/{self.config.max_retry}（実行ジャーナルから復元）")
+            else:
+                self.logger.info(f"分析試行 {attempt}/{self.config.max_retry}")
 
-            if not analysis_result:
-                self.logger.error("分析に失敗しました")
-                break
+                # コメント分析
+                started = time.monotonic()
+                analysis_result = self.analyzer.analyze(
+                    video_info,
+                    transcript,
+                    filtered_comments,
+                    refinement_feedback=refinement_feedback
+                )
+                self.scheduler.record("analysis", time.monotonic() - started)
 
-            # 品質評価
-            evaluation = self.evaluator.evaluate(
-                analysis_result,
-                threshold=self.quality_threshold
+                if not analysis_result:
+                    self.logger.error("分析に失敗しました")
+                    break
+                self._journal_attempt("analysis", video_id, attempt, analysis_result)
+            self.events.publish(
+                ITEMS, video_id=video_id, title=video_info['title'], attempt=attempt, items=analysis_result
             )
 
+            evaluation = self._recorded_attempt("evaluation", video_id, attempt)
+            if evaluation is None:
+                # 事前検証（構造的に壊れた結果はGPT-4oに回さず即不合格）
+                validation = self.validator.validate(analysis_result, transcript)
+                if validation['passed']:
+                    # 品質評価
+                    started = time.monotonic()
+                    evaluation = self.evaluator.evaluate(
+                        analysis_result,
+                        threshold=self.config.quality_threshold
+                    )
+                    self.scheduler.record("evaluation", time.monotonic() - started)
+                else:
+                    evaluation = self.validator.to_evaluation(validation)
+                self._journal_attempt("evaluation", video_id, attempt, evaluation)
+
             if evaluation['passed']:
                 self.logger.success(f"✅ 品質評価合格 (試行{attempt}回目)")
-                return {
-                    "video_info": video_info,
-                    "screening_result": video_data['screening_result'],
-                    "analysis": analysis_result,
-                    "evaluation": evaluation,
-                    "attempts": attempt
-                }
+                return self._build_result(video_data, analysis_result, evaluation, attempt)
+            elif evaluation.get('unevaluated'):
+                return self._build_result(video_data, analysis_result, evaluation, attempt, warning=UNEVALUATED_WARNING)
             else:
-                if attempt < self.max_retry:
+                # 予算超過後・締め切りに間に合わない場合は再分析しない
+                if attempt < self.config.max_retry and not self.usage.exceeded and self.scheduler.allow_retry():
                     self.logger.warning(f"品質不足、再分析します (試行{attempt + 1}回目)")
                     refinement_feedback = evaluation['feedback']
                     attempt += 1
                 else:
-                    self.logger.warning("最大試行回数に達しました。現在の結果を返します")
-                    return {
-                        "video_info": video_info,
-                        "screening_result": video_data['screening_result'],
-                        "analysis": analysis_result,
-                        "evaluation": evaluation,
-                        "attempts": attempt,
-                        "warning": "品質基準未達成"
-                    }
+                    if attempt < self.config.max_retry:
+                        self.logger.warning("予算・締め切りのため再分析を打ち切ります。現在の結果を返します")
+                    else:
+                        self.logger.warning("最大試行回数に達しました。現在の結果を返します")
+                    return self._build_result(
+                        video_data, analysis_result, evaluation, attempt, warning="品質基準未達成"
+                    )
 
         return None
 
-    def _get_transcript(self, video_id: str) -> Optional[str]:
+    def _journal_attempt(self, step: str, video_id: str, attempt: int, value: Any):
+        """
+        分析試行の分析結果（step="analysis"）・評価（step="evaluation"）をジャーナルに記録
+
+        評価モデルの遮断で評価できなかった場合は記録せず、再開時に評価し直す
+        """
+        if step == "evaluation" and value.get('unevaluated'):
+            return
+        self.journal.record(step, {"attempt": attempt, "value": value}, video_id)
+
+    def _recorded_attempt(self, step: str, video_id: str, attempt: int) -> Any:
+        """ジャーナルに記録済みの分析試行の分析結果・評価（未記録ならNone）"""
+        for entry in self.journal.entries(step, video_id):
+            if entry['attempt'] == attempt:
+                return entry['value']
+        return None
+
+    def _analyze_videos_batched(
+        self,
+        screened_videos: List[Dict],
+        all_results: List[Dict],
+        on_result: Optional[Callable[[Dict], None]] = None
+    ) -> List[Dict]:
+        """
+        複数動画をラウンド単位で分析し、品質評価をバッチでまとめて実行
+        各ラウンドで全動画を1回ずつ分析 → まとめて評価 → 不合格分のみ次ラウンドで再分析
+        結果は all_results に追加する
+        """
+        pending = []
+        for video_data in screened_videos:
+            if self._cancel.is_set():
+                break
+            if self.usage.aborted:
+                self.logger.warning("予算上限に達したため残りの動画の分析準備をスキップします")
+                break
+            if self.scheduler.expired:
+                self.logger.warning("締め切りに達したため残りの動画の分析準備をスキップします")
+                break
+            # 逐次処理と同様、1本目は予測に関わらず着手する（結果ゼロよりは部分的な結果を返す）
+            if pending and not self.scheduler.allow_video(video_data):
+                self.logger.warning(f"締め切りに間に合わない見込みのためスキップ: {video_data['video_info']['title']}")
+                continue
+            with self.usage.video(video_data['video_info']['video_id']):
+                prepared = self._prepare_analysis(video_data)
+            if prepared:
+                transcript, filtered_comments = prepared
+                pending.append({
+                    "video_data": video_data,
+                    "transcript": transcript,
+                    "comments": filtered_comments,
+                    "feedback": None,
+                    "attempt": 1
+                })
+
+        while pending:
+            if self._cancel.is_set():
+                break
+            if self.usage.aborted:
+                self.logger.warning("予算上限に達したため残りの動画の分析をスキップします")
+                break
+            if self.scheduler.expired:
+                # 締め切り時点で得られている最良の結果（前ラウンドの分析）を返す
+                self.logger.warning("締め切りに達したため、再分析待ちの動画は前回の結果を返します")
+                for task in pending:
+                    if 'analysis' not in task:
+                        continue
+                    result = self._build_result(
+                        task['video_data'], task['analysis'], task['evaluation'], task['attempt'] - 1,
+                        warning="品質基準未達成"
+                    )
+                    self._emit_result(result, all_results, on_result)
+                break
+            analyzed = []
+            to_evaluate = []
+
+            for task in pending:
+                if self._cancel.is_set():
+                    break
+                video_info = task['video_data']['video_info']
+                video_id = video_info['video_id']
+                analysis_result = self._recorded_attempt("analysis", video_id, task['attempt'])
+                if analysis_result is not None:
+                    self.logger.info(
+                        f"分析試行 {task['attempt']}/{self.config.max_retry}（実行ジャーナルから復元）: {video_info['title']}"
+                    )
+                else:
+                    self.logger.info(f"分析試行 {task['attempt']}/{self.config.max_retry}: {video_info['title']}")
+
+                    with self.tracer.span("video.analyze", video_id=video_id, attempt=task['attempt']), \
+                            self.usage.video(video_id):
+                        analysis_result = self.analyzer.analyze(
+                            video_info,
+                            task['transcript'],
+                            task['comments'],
+                            refinement_feedback=task['feedback']
+                        )
+                    if not analysis_result:
+                        self.logger.error(f"分析に失敗しました: {video_info['title']}")
+                        continue
+                    self._journal_attempt("analysis", video_id, task['attempt'], analysis_result)
+                self.events.publish(
+                    ITEMS, video_id=video_id, title=video_info['title'], attempt=task['attempt'], items=analysis_result
+                )
+
+                task['analysis'] = analysis_result
+                analyzed.append(task)
+
+                evaluation = self._recorded_attempt("evaluation", video_id, task['attempt'])
+                if evaluation is not None:
+                    task['evaluation'] = evaluation
+                    continue
+
+                validation = self.validator.validate(analysis_result, task['transcript'])
+                if validation['passed']:
+                    to_evaluate.append(task)
+                else:
+                    task['evaluation'] = self.validator.to_evaluation(validation)
+                    self._journal_attempt("evaluation", video_id, task['attempt'], task['evaluation'])
+
+            if to_evaluate:
+                evaluations = self.evaluator.evaluate_batch(
+                    [{"video_id": t['video_data']['video_info']['video_id'], "analysis_result": t['analysis']}
+                     for t in to_evaluate],
+                    threshold=self.config.quality_threshold
+                )
+                for task, evaluation in zip(to_evaluate, evaluations):
+                    task['evaluation'] = evaluation
+                    self._journal_attempt(
+                        "evaluation", task['video_data']['video_info']['video_id'], task['attempt'], evaluation
+                    )
+
+            pending = []
+            for task in analyzed:
+                evaluation = task['evaluation']
+                if evaluation['passed']:
+                    result = self._build_result(
+                        task['video_data'], task['analysis'], evaluation, task['attempt']
+                    )
+                elif evaluation.get('unevaluated'):
+                    result = self._build_result(
+                        task['video_data'], task['analysis'], evaluation, task['attempt'],
+                        warning=UNEVALUATED_WARNING
+                    )
+                elif task['attempt'] < self.config.max_retry and not self.usage.exceeded and self.scheduler.allow_retry():
+                    task['feedback'] = evaluation['feedback']
+                    task['attempt'] += 1
+                    pending.append(task)
+                    continue
+                else:
+                    result = self._build_result(
+                        task['video_data'], task['analysis'], evaluation, task['attempt'],
+                        warning="品質基準未達成"
+                    )
+                self._emit_result(result, all_results, on_result)
+
+        return all_results
+
+    def _prepare_analysis(self, video_data: Dict) -> Optional[tuple]:
+        """
+        分析の前準備（文字起こし取得 + コメントフィルタリング）
+
+        Returns:
+            (文字起こし, フィルタリング済みコメント)、文字起こし取得失敗時はNone
+        """
+        video_info = video_data['video_info']
+        self.logger.log(f"\n📹 分析中: {video_info['title']}")
+
+        # Step 1: 文字起こし取得（YouTube字幕 or Whisper、字幕は先行取得済みならそれを使う）
+        transcript = self._journaled(
+            "transcript",
+            lambda: self._get_transcript(video_info['video_id'], video_data.get('captions')),
+            video_info['video_id']
+        )
+        if not transcript:
+            self.logger.error("文字起こしの取得に失敗")
+            return None
+
+        # Step 2: コメントフィルタリング（統合スクリーニングで選定済みならスキップ）
+        if 'filtered_comments' in video_data:
+            return transcript, video_data['filtered_comments']
+
+        found, filtered_comments = self.journal.lookup("filtered_comments", video_info['video_id'])
+        if found:
+            return transcript, filtered_comments
+
+        comments = video_data['comments']
+        started = time.monotonic()
+        filtered_comments = self.comment_filter.filter_comments(
+            comments,
+            target_count=self.config.filtered_comments
+        )
+        self.scheduler.record("filtering", time.monotonic() - started)
+        if filtered_comments:
+            self.journal.record("filtered_comments", filtered_comments, video_info['video_id'])
+        return transcript, filtered_comments
+
+    def _prefetch_captions(self, screened_videos: List[Dict]):
+        """YouTube字幕だけを先に取得し video_data['captions'] に保持（字幕なしは空文字）"""
+        for video_data in screened_videos:
+            if self.scheduler.expired or self._cancel.is_set():
+                break
+            video_id = video_data['video_info']['video_id']
+            # 再開時は記録済みの文字起こしを字幕扱いにする（再取得しない）
+            found, transcript = self.journal.lookup("transcript", video_id)
+            if found:
+                video_data['captions'] = transcript
+                continue
+            with self.usage.video(video_id):
+                video_data['captions'] = self._fetch_captions(video_id)
+
+    def _emit_result(
+        self,
+        result: Dict,
+        all_results: List[Dict],
+        on_result: Optional[Callable[[Dict], None]] = None,
+        fresh: bool = True
+    ):
+        """
+        結果を確定し、合格数が目標件数に達したら以降の処理を打ち切る
+
+        結果はすぐにresult_sinkへ追記・結果ストアへ保存するため、途中で中断しても確定分は残る。
+        fresh=False（レジストリ・実行ジャーナルから復元した結果）は保存済みなので再保存しない
+        """
+        with self._emit_lock:
+            if self._abandoned:
+                self.logger.info(f"締め切り後に確定した結果は破棄します: {result['video_info']['title']}")
+                return
+            self._emit_result_locked(result, all_results, on_result, fresh)
+
+    def _emit_result_locked(
+        self,
+        result: Dict,
+        all_results: List[Dict],
+        on_result: Optional[Callable[[Dict], None]] = None,
+        fresh: bool = True
+    ):
+        self._emitted += 1
+        if result['evaluation'].get('passed'):
+            self._passed += 1
+        if self._keep_results:
+            all_results.append(result)
+        if self._result_sink:
+            self._result_sink.write(result)
+        if fresh:
+            # 評価なしの結果は再実行時に評価し直すため、ジャーナル・レジストリには残さない
+            if not result['evaluation'].get('unevaluated'):
+                self.journal.record("result", result, result['video_info']['video_id'])
+                self.registry.record_result(result)
+            if self.result_store.enabled and not self.result_store.add_result(result, query=self._run_query):
+                self._unstored.append(result)
+        if on_result:
+            on_result(result)
+        self.events.publish(RESULT, result=result)
+
+        if self._run_target and self._passed >= self._run_target and not self._cancel.is_set():
+            self.logger.success(f"目標の{self._run_target}件に達したため残りの処理を打ち切ります")
+            self._cancel.set()
+
+    def _build_result(
+        self,
+        video_data: Dict,
+        analysis_result: List[Dict],
+        evaluation: Dict,
+        attempts: int,
+        warning: Optional[str] = None
+    ) -> Dict:
+        """1動画分の最終結果を組み立て"""
+        result = {
+            "video_info": video_data['video_info'],
+            "screening_result": video_data['screening_result'],
+            "analysis": analysis_result,
+            "evaluation": evaluation,
+            "attempts": attempts,
+            "usage": self.usage.video_usage(video_data['video_info']['video_id'])
+        }
+        if warning:
+            result["warning"] = warning
+        return result
+
+    def _get_transcript(self, video_id: str, captions: Optional[str] = None) -> Optional[str]:
         """
         文字起こしを取得（YouTube字幕優先、なければWhisper）
 
         Args:
             video_id: YouTube動画ID
+            captions: 先行取得済みの字幕（None=未取得、空文字=字幕なし）
 
         Returns:
             文字起こしテキスト（タイムスタンプ付き）
         """
         # まずYouTube字幕を試す
-        self.logger.info("YouTube字幕を確認中...")
-        transcript = self.transcript_fetcher.get_transcript_with_timestamps(video_id)
+        transcript = captions if captions is not None else self._fetch_captions(video_id)
 
         if transcript:
             self.logger.success("YouTube字幕を取得しました")
             return transcript
 
+        if self.usage.exceeded:
+            self.logger.warning("予算上限を超えているためWhisper文字起こしをスキップします")
+            return None
+        if not self.whisper_transcriber.breaker.available:
+            self.logger.warning("Whisper APIが障害で遮断中のため文字起こしをスキップします")
+            return None
+        if not self.scheduler.allow_whisper():
+            self.logger.warning("締め切りに間に合わない見込みのためWhisper文字起こしをスキップします")
+            return None
+
         # YouTube字幕がなければWhisperで文字起こし
         self.logger.info("YouTube字幕なし、Whisper文字起こしを実行...")
-        transcript = self.whisper_transcriber.transcribe_video(video_id)
+        started = time.monotonic()
+        with self.tracer.span("video.transcript", video_id=video_id, source="whisper") as span:
+            transcript = self.whisper_transcriber.transcribe_video(video_id)
+            span.set_attribute("chars", len(transcript or ""))
+        self.scheduler.record("whisper", time.monotonic() - started)
 
         if transcript:
             self.logger.success("Whisper文字起こし完了")
@@ -235,6 +1160,16 @@ class YouTubeCommentOrchestrator:
             self.logger.error("文字起こしを取得できませんでした")
             return None
 
+    def _fetch_captions(self, video_id: str) -> str:
+        """YouTube字幕を取得（字幕なしは空文字）"""
+        self.logger.info("YouTube字幕を確認中...")
+        started = time.monotonic()
+        with self.tracer.span("video.transcript", video_id=video_id, source="captions") as span:
+            transcript = self.transcript_fetcher.get_transcript_with_timestamps(video_id)
+            span.set_attribute("chars", len(transcript))
+        self.scheduler.record("captions", time.monotonic() - started)
+        return transcript
+
 
 if __name__ == "__main__":
     # テスト実行
@@ -0,0 +1,207 @@
+"""
+プロファイリングモジュール
+オーケストレーターのステージ（stage.* スパン）ごとにCPUプロファイル・壁時計/CPU時間・
+メモリ確保量を取り、サンプリングしたスタックをフレームグラフ用の collapsed 形式で出力する
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+from src.tracing import Span, Tracer, get_tracer, set_tracer
+from src.utils import get_env, ProgressLogger
+
+PROFILE_MODES = ("all", "sampling", "deterministic")
+
+# メモリ確保レポートを取るステージ（コメント・文字起こしを大量に扱う）
+ALLOCATION_STAGES = ("stage.screening", "stage.analysis")
+
+# レポートに載せる上位件数
+TOP_N = 30
+
+
+class PipelineProfiler:
+    """
+    ステージ単位のプロファイラ
+
+    使い方:
+        profiler = PipelineProfiler("outputs")   # オーケストレーター生成より前に作る
+        orchestrator = YouTubeCommentOrchestrator()
+        with profiler:
+            orchestrator.process(...)
+    """
+
+    def __init__(
+        self,
+        output_dir: str = "outputs",
+        mode: str = "all",
+        logger: ProgressLogger = None
+    ):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"不正なプロファイルモードです: {mode}")
+        self.mode = mode
+        self.logger = logger or ProgressLogger()
+        self.run_dir = os.path.join(output_dir, f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        self.sample_interval = float(get_env("PROFILE_SAMPLE_INTERVAL_MS", "5")) / 1000
+
+        self.stages: Dict[str, Dict] = {}
+        self.stacks: Counter = Counter()
+        self._current_stage: Optional[str] = None
+        # 採取対象のスレッド（最後にステージを開始したスレッド。締め切り指定時はメインスレッドではない）
+        self._sample_thread: Optional[int] = None
+        self._stage_profile: Optional[cProfile.Profile] = None
+        self._stage_start: Dict = {}
+        self._allocation_snapshots: Dict[str, tracemalloc.Snapshot] = {}
+        self._allocation_reports: Dict[str, str] = {}
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        # ステージ境界はトレーサーのスパンから取るため、無効ならプロファイル出力先に書くトレーサーを差し込む
+        os.makedirs(self.run_dir, exist_ok=True)
+        self.tracer = get_tracer()
+        if not self.tracer.enabled:
+            self.tracer = Tracer(enabled=True, trace_file=os.path.join(self.run_dir, "traces.jsonl"))
+            set_tracer(self.tracer)
+        self.tracer.add_listener(self._on_span_end, on_start=self._on_span_start)
+
+    @property
+    def deterministic(self) -> bool:
+        return self.mode in ("all", "deterministic")
+
+    @property
+    def sampling(self) -> bool:
+        return self.mode in ("all", "sampling")
+
+    def __enter__(self) -> "PipelineProfiler":
+        self._started_at = (time.perf_counter(), time.process_time())
+        if self.deterministic:
+            tracemalloc.start()
+        if self.sampling:
+            self._stop.clear()
+            self._sample_thread = threading.main_thread().ident
+            self._sampler = threading.Thread(target=self._sample_loop, daemon=True)
+            self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._started_at[0]
+        cpu = time.process_time() - self._started_at[1]
+        if self._sampler:
+            self._stop.set()
+            self._sampler.join()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._write_reports(wall, cpu)
+        return False
+
+    # ========================================
+    # ステージ境界
+    # ========================================
+    def _on_span_start(self, span: Span):
+        if not span.name.startswith("stage."):
+            return
+        self._current_stage = span.name
+        # スパンを開いたスレッドで呼ばれるので、ステージを実行しているスレッドを採取・計測する
+        self._sample_thread = threading.get_ident()
+        self._stage_start[span.name] = (time.perf_counter(), time.process_time(), time.thread_time())
+
+        if self.deterministic:
+            self._stage_profile = cProfile.Profile()
+            self._stage_profile.enable()
+            if span.name in ALLOCATION_STAGES:
+                tracemalloc.reset_peak()
+                self._allocation_snapshots[span.name] = tracemalloc.take_snapshot()
+
+    def _on_span_end(self, span: Span):
+        if not span.name.startswith("stage.") or span.name not in self._stage_start:
+            return
+        wall_start, cpu_start, thread_start = self._stage_start.pop(span.name)
+        stats = {
+            "wall_sec": time.perf_counter() - wall_start,
+            "cpu_sec": time.process_time() - cpu_start,
+            "thread_cpu_sec": time.thread_time() - thread_start,
+        }
+        stats["cpu_ratio"] = stats["cpu_sec"] / stats["wall_sec"] if stats["wall_sec"] else 0.0
+
+        if self._stage_profile:
+            self._stage_profile.disable()
+            self._write_stage_profile(span.name, self._stage_profile)
+            self._stage_profile = None
+
+        if span.name in self._allocation_snapshots:
+            before = self._allocation_snapshots.pop(span.name)
+            stats["peak_traced_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            self._allocation_reports[span.name] = self._allocation_report(before, tracemalloc.take_snapshot())
+
+        self.stages[span.name] = stats
+        self._current_stage = None
+
+    # ========================================
+    # サンプリング
+    # ========================================
+    def _sample_loop(self):
+        """ステージを実行しているスレッドのスタックを一定間隔で採取（collapsed形式のキーで集計）"""
+        while not self._stop.wait(self.sample_interval):
+            frame = sys._current_frames().get(self._sample_thread)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            names.append(self._current_stage or "other")
+            self.stacks[";".join(reversed(names))] += 1
+
+    # ========================================
+    # 出力
+    # ========================================
+    def _write_stage_profile(self, stage: str, profile: cProfile.Profile):
+        name = stage.replace("stage.", "")
+        profile.dump_stats(os.path.join(self.run_dir, f"{name}.prof"))
+        text = io.StringIO()
+        pstats.Stats(profile, stream=text).sort_stats("cumulative").print_stats(TOP_N)
+        with open(os.path.join(self.run_dir, f"{name}_cpu.txt"), 'w', encoding='utf-8') as f:
+            f.write(text.getvalue())
+
+    def _allocation_report(self, before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> str:
+        """ステージ中に増えたメモリ確保を行番号単位で集計"""
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen *>")]
+        diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+        return "\n".join(str(stat) for stat in diff[:TOP_N])
+
+    def _write_reports(self, wall: float, cpu: float):
+        summary = {
+            "mode": self.mode,
+            "total": {"wall_sec": wall, "cpu_sec": cpu, "cpu_ratio": cpu / wall if wall else 0.0},
+            "stages": self.stages,
+            "samples": sum(self.stacks.values()),
+        }
+        with open(os.path.join(self.run_dir, "summary.json"), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+        if self.stacks:
+            # flamegraph.pl / speedscope でそのまま読める形式
+            with open(os.path.join(self.run_dir, "stacks.collapsed"), 'w', encoding='utf-8') as f:
+                for stack, count in self.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+
+        if self._allocation_reports:
+            with open(os.path.join(self.run_dir, "allocations.txt"), 'w', encoding='utf-8') as f:
+                for stage, report in self._allocation_reports.items():
+                    peak = self.stages.get(stage, {}).get("peak_traced_mb", 0.0)
+                    f.write(f"## {stage}（ピーク {peak:.1f}MB）\n{report}\n\n")
+
+        self.logger.info(f"プロファイル結果を保存しました: {self.run_dir}")
+        for stage, s in self.stages.items():
+            self.logger.info(
+                f"[{stage}] 壁時計{s['wall_sec']:.2f}秒 / CPU{s['cpu_sec']:.2f}秒 "
+                f"（CPU使用率{s['cpu_ratio']:.0%}）"
+            )
@@ -0,0 +1,113 @@
+"""
+進捗イベントモジュール
+オーケストレーターの進行状況（ステージの開始・終了、動画ごとの判定、分析途中のネタ、確定した結果）を
+種類付きのイベント（dict）として購読者に配信する
+
+イベントは {"type": 種類, "ts": UNIX時刻, ...種類ごとの項目} の形式:
+- stage_start:   {"stage"}
+- stage_finish:  {"stage", "count"}
+- video_verdict: {"video_id", "title", "verdict", "score", "reason"}
+- items:         {"video_id", "title", "attempt", "items"}（分析試行ごとのネタ、品質評価前）
+- result:        {"result"}（確定した1動画分の結果）
+- run_finish:    {"results", "passed", "error"}
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from src.utils import ProgressLogger
+
+STAGE_START = "stage_start"
+STAGE_FINISH = "stage_finish"
+VIDEO_VERDICT = "video_verdict"
+ITEMS = "items"
+RESULT = "result"
+RUN_FINISH = "run_finish"
+
+# ステージ名と表示名
+STAGES = {
+    "queries": "検索ワード生成",
+    "search": "YouTube動画検索",
+    "screening": "コメント取得 + 早期スクリーニング",
+    "analysis": "詳細分析",
+}
+
+# 動画ごとの判定
+PASSED = "passed"
+FAILED = "failed"
+SKIPPED = "skipped"        # 前回不合格・コメントなし
+REUSED = "reused"          # 前回のネタパック・実行ジャーナルの結果を再利用
+
+
+class ProgressEvents:
+    """1回の実行分のイベント配信（購読者がいなければ何もしない）"""
+
+    def __init__(self, subscriber: Optional[Callable[[Dict], None]] = None, logger: ProgressLogger = None):
+        self.subscriber = subscriber
+        self.logger = logger or ProgressLogger()
+
+    def close(self):
+        """以降のイベントを配信しない"""
+        self.subscriber = None
+
+    def publish(self, event_type: str, **data):
+        subscriber = self.subscriber
+        if subscriber is None:
+            return
+        try:
+            subscriber({"type": event_type, "ts": time.time(), **data})
+        except Exception as e:
+            # 購読側の不具合で処理を止めない
+            self.logger.error(f"進捗イベントの配信エラー: {str(e)}")
+
+
+class BackgroundRun:
+    """
+    実行をバックグラウンドスレッドで行い、イベントをキューに溜める（Streamlit用）
+
+    UIスレッドは drain() で届いたイベントを取り出して描画し、実行中は再描画を繰り返す
+    """
+
+    def __init__(self, target: Callable[[Callable[[Dict], None], threading.Event], Any]):
+        """
+        Args:
+            target: (イベントの購読関数, 中止イベント) を受け取って実行する関数
+        """
+        self._queue: "queue.Queue[Dict]" = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        # キャッシュした実行の再生か
+        self.cached = False
+        # cancel()で中止したか（目標件数に達した打ち切りは含まない）
+        self.cancelled = False
+        self._thread = threading.Thread(target=self._run, args=(target,), daemon=True, name="background-run")
+
+    def start(self) -> "BackgroundRun":
+        self._thread.start()
+        return self
+
+    def _run(self, target):
+        try:
+            self.result = target(self._queue.put, self.cancel_event)
+        except BaseException as e:
+            self.error = e
+            self._queue.put({"type": RUN_FINISH, "ts": time.time(), "results": 0, "passed": 0, "error": str(e)})
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def drain(self) -> List[Dict]:
+        """届いているイベントをすべて取り出す"""
+        events = []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def cancel(self):
+        """未着手の動画の処理を中止（実行中の動画は完了まで待つ）"""
+        self.cancelled = True
+        self.cancel_event.set()
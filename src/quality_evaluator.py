@@ -2,16 +2,26 @@
 品質評価モジュール
 GPT-4oで分析結果の品質を評価
 """
-import openai
 import json
 from typing import Dict, List
-from config.prompt_template import QUALITY_EVALUATION_PROMPT
-from src.utils import get_env, extract_json_from_text, ProgressLogger
+from config.prompt_template import (
+    QUALITY_EVALUATION_PREFIX,
+    QUALITY_EVALUATION_SUFFIX,
+    QUALITY_EVALUATION_BATCH_PREFIX,
+    QUALITY_EVALUATION_BATCH_SUFFIX,
+    QUALITY_EVALUATION_BATCH_ITEM,
+)
+from src.circuit_breaker import CircuitOpenError
+from src.model_router import ModelRouter
+from src.utils import get_env, estimate_tokens, pack_batches, ProgressLogger
 
 class QualityEvaluator:
-    def __init__(self, logger: ProgressLogger = None):
-        self.client = openai.OpenAI(api_key=get_env("OPENAI_API_KEY"))
+    def __init__(self, logger: ProgressLogger = None, router: ModelRouter = None):
         self.logger = logger or ProgressLogger()
+        self.router = router or ModelRouter(self.logger)
+        # バッチモード: 1リクエストに詰める最大トークン数・最大動画数
+        self.batch_token_budget = int(get_env("BATCH_TOKEN_BUDGET", "8000"))
+        self.batch_max_videos = int(get_env("BATCH_MAX_VIDEOS", "5"))
 
     def evaluate(
         self,
@@ -34,56 +44,37 @@ class QualityEvaluator:
                 "feedback": 次回への指示,
                 "strengths": 優れている点
             }
+            評価モデルが遮断中の場合は "unevaluated": True（評価なし）
         """
         self.logger.info("品質評価中...")
 
         # 分析結果をJSON文字列に
         analysis_json = json.dumps(analysis_result, ensure_ascii=False, indent=2)
 
-        prompt = QUALITY_EVALUATION_PROMPT.format(
+        prompt = QUALITY_EVALUATION_SUFFIX.format(
             analysis_result=analysis_json,
             threshold=threshold
         )
 
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",  # 最高峰モデルで厳しく評価
+            # 合否が明確なら軽量モデルで確定、閾値付近のみ上位モデルで厳しく再評価
+            routed = self.router.complete(
+                "evaluation",
                 messages=[
-                    {"role": "system", "content": "あなたは人気YouTuberのディレクター兼お笑いプロデューサーです。"},
+                    {"role": "system", "content": QUALITY_EVALUATION_PREFIX},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.3,  # 評価は安定性重視
-                max_tokens=1500
+                max_tokens=1500,
+                validate=lambda r: isinstance(r, dict) and "総合スコア" in r,
+                is_borderline=lambda r: self.router.is_borderline(
+                    r.get("総合スコア"), threshold, r.get("確信度")
+                )
             )
-
-            result_text = response.choices[0].message.content
-            result = extract_json_from_text(result_text)
+            result = routed["result"]
 
             if result:
-                total_score = result.get("総合スコア", 0)
-                passed = result.get("合格判定", False)
-
-                evaluation = {
-                    "passed": passed,
-                    "total_score": total_score,
-                    "individual_scores": result.get("個別スコア", {}),
-                    "improvements": result.get("改善ポイント", []),
-                    "feedback": result.get("次回への指示", ""),
-                    "strengths": result.get("優れている点", [])
-                }
-
-                if passed:
-                    self.logger.success(f"✅ 品質評価合格 (スコア: {total_score}/10)")
-                else:
-                    self.logger.warning(f"⚠️  品質評価不合格 (スコア: {total_score}/10) - 再分析を推奨")
-
-                # 詳細ログ
-                if evaluation['improvements']:
-                    self.logger.info("改善ポイント:")
-                    for imp in evaluation['improvements']:
-                        self.logger.info(f"  - {imp}")
-
-                return evaluation
+                return self._build_evaluation(result, routed["model"])
             else:
                 self.logger.error("評価結果のパースに失敗")
                 return {
@@ -93,6 +84,17 @@ class QualityEvaluator:
                     "feedback": ""
                 }
 
+        except CircuitOpenError as e:
+            # 評価モデルが障害で遮断中: 評価なしで結果を返す（再分析はしない）
+            self.logger.warning(f"品質評価をスキップします: {str(e)}")
+            return {
+                "passed": False,
+                "total_score": 0,
+                "improvements": [],
+                "feedback": "",
+                "unevaluated": True
+            }
+
         except Exception as e:
             self.logger.error(f"品質評価エラー: {str(e)}")
             return {
@@ -102,6 +104,126 @@ class QualityEvaluator:
                 "feedback": ""
             }
 
+    def evaluate_batch(
+        self,
+        items: List[Dict],
+        threshold: float = 7.0
+    ) -> List[Dict]:
+        """
+        複数動画のネタパックを1リクエストにまとめて評価
+
+        評価軸・出力形式を動画ごとに繰り返さずに済むため往復回数とトークンを削減できる。
+        トークン予算内でバッチに分割し、バッチが失敗した動画・結果スロットが欠けた動画・
+        ボーダーラインの動画はevaluate()で個別に評価し直す。
+
+        Args:
+            items: [{
+                "video_id": 動画ID,
+                "analysis_result": コメント分析結果
+            }]
+            threshold: 合格スコア閾値
+
+        Returns:
+            itemsと同じ順序の評価結果リスト
+        """
+        results: List[Dict] = [None] * len(items)
+        indexed = [
+            (i, item, json.dumps(item['analysis_result'], ensure_ascii=False, indent=2))
+            for i, item in enumerate(items)
+        ]
+        batches = pack_batches(
+            indexed,
+            size_fn=lambda x: estimate_tokens(x[2]),
+            token_budget=self.batch_token_budget,
+            max_items=self.batch_max_videos
+        )
+
+        for batch in batches:
+            if len(batch) > 1:
+                for idx, evaluation in self._evaluate_one_batch(batch, threshold).items():
+                    results[idx] = evaluation
+
+            # バッチで確定しなかった動画は個別評価にフォールバック
+            for idx, item, _ in batch:
+                if results[idx] is None:
+                    results[idx] = self.evaluate(item['analysis_result'], threshold)
+
+        return results
+
+    def _evaluate_one_batch(self, batch: List, threshold: float) -> Dict[int, Dict]:
+        """1バッチ分をまとめて評価し、確定した結果を {元のindex: 結果} で返す"""
+        prompt = QUALITY_EVALUATION_BATCH_SUFFIX.format(
+            video_count=len(batch),
+            threshold=threshold,
+            analyses="".join(
+                QUALITY_EVALUATION_BATCH_ITEM.format(video_id=item['video_id'], analysis_result=analysis_json)
+                for _, item, analysis_json in batch
+            )
+        )
+
+        self.logger.info(f"品質評価中（バッチ{len(batch)}本）...")
+
+        try:
+            routed = self.router.complete(
+                "evaluation",
+                messages=[
+                    {"role": "system", "content": QUALITY_EVALUATION_BATCH_PREFIX},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,
+                max_tokens=1000 * len(batch),
+                validate=lambda r: isinstance(r, dict) and isinstance(r.get("results"), dict)
+            )
+        except Exception as e:
+            self.logger.warning(f"バッチ評価失敗、個別評価に切り替えます: {str(e)}")
+            return {}
+
+        slots = (routed["result"] or {}).get("results")
+        if not isinstance(slots, dict):
+            self.logger.warning("バッチ評価結果のパースに失敗、個別評価に切り替えます")
+            return {}
+
+        confirmed = {}
+        for idx, item, _ in batch:
+            slot = slots.get(item['video_id'])
+            if not isinstance(slot, dict) or "総合スコア" not in slot:
+                continue
+            # ボーダーラインのスロットは個別評価（カスケード）に回す
+            if self.router.is_borderline(slot.get("総合スコア"), threshold, slot.get("確信度")):
+                continue
+            self.logger.info(f"バッチ評価結果: {item['video_id']}")
+            confirmed[idx] = self._build_evaluation(slot, routed["model"])
+
+        return confirmed
+
+    def _build_evaluation(self, result: Dict, model: str) -> Dict:
+        """モデル出力から評価結果を組み立ててログ出力"""
+        total_score = result.get("総合スコア", 0)
+        passed = result.get("合格判定", False)
+
+        evaluation = {
+            "passed": passed,
+            "total_score": total_score,
+            "individual_scores": result.get("個別スコア", {}),
+            "improvements": result.get("改善ポイント", []),
+            "feedback": result.get("次回への指示", ""),
+            "strengths": result.get("優れている点", []),
+            "model": model
+        }
+
+        if passed:
+            self.logger.success(f"✅ 品質評価合格 (スコア: {total_score}/10)")
+        else:
+            self.logger.warning(f"⚠️  品質評価不合格 (スコア: {total_score}/10) - 再分析を推奨")
+
+        # 詳細ログ
+        if evaluation['improvements']:
+            self.logger.info("改善ポイント:")
+            for imp in evaluation['improvements']:
+                self.logger.info(f"  - {imp}")
+
+        return evaluation
+
 
 if __name__ == "__main__":
     # テスト実行
@@ -0,0 +1,281 @@
+"""
+レート制限モジュール
+OpenAI（モデル別のRPM・TPM）とYouTube Data API（1日のクォータ）のトークンバケットを
+SQLiteファイルで共有し、全スレッド・全プロセス（バッチ実行・ステージワーカー）で上限を守る
+
+- 上限に達した呼び出しは失敗させず、バケットが回復するまで待ってから実行する
+  （待ち時間が RATE_LIMIT_MAX_WAIT_SEC を超える見込みなら RateLimitTimeoutError）
+- 429（レート制限）を受けたら Retry-After（なければ指数バックオフ）の間バケットを止め、
+  他のプロセスも含めて待ってから再試行する
+"""
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from config.model_routing import (
+    DEFAULT_MODEL_RATE_LIMIT,
+    MODEL_RATE_LIMITS,
+    YOUTUBE_DAILY_QUOTA,
+    YOUTUBE_QUOTA_COST,
+)
+from src.tracing import current_span, get_tracer
+from src.usage_tracker import record_quota
+from src.utils import get_env, ProgressLogger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,              -- 例: openai:rpm:gpt-4o / youtube:quota
+    tokens REAL NOT NULL,               -- 残量
+    updated_at REAL NOT NULL,           -- 残量を計算した時刻
+    blocked_until REAL NOT NULL DEFAULT 0  -- 429を受けた後の停止期限
+);
+"""
+
+# バケット指定 (名前, 容量, 1秒あたりの回復量, 今回の消費量)
+Bucket = Tuple[str, float, float, float]
+
+
+class RateLimitTimeoutError(Exception):
+    """上限の回復を待てる時間を超えた"""
+
+
+def http_status(error: Exception) -> Optional[int]:
+    """openai / googleapiclient の例外からHTTPステータスを取得"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "resp", None), "status", None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """再試行で回復するレート制限エラーか（1日のクォータ超過 quotaExceeded は対象外）"""
+    status = http_status(error)
+    if status == 429:
+        return True
+    if status == 403:
+        content = getattr(error, "content", b"") or b""
+        if isinstance(content, bytes):
+            content = content.decode("utf-8", "ignore")
+        return "rateLimitExceeded" in content or "userRateLimitExceeded" in content
+    return False
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Retry-Afterヘッダーの秒数（なければNone）"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or getattr(error, "resp", None)
+    try:
+        value = headers.get("retry-after") if headers is not None else None
+        return float(value) if value is not None else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    def __init__(self, path: Optional[str] = None, logger: ProgressLogger = None, enabled: Optional[bool] = None):
+        """
+        Args:
+            path: バケットを共有するSQLiteファイル（省略時は RATE_LIMIT_PATH）
+            enabled: Falseならバケットを使わず429の再試行だけ行う（省略時は RATE_LIMIT_ENABLED）
+        """
+        self.logger = logger or ProgressLogger()
+        self.enabled = enabled if enabled is not None else get_env("RATE_LIMIT_ENABLED", "true").lower() == "true"
+        self.path = path or get_env("RATE_LIMIT_PATH", "outputs/rate_limits.sqlite3")
+        self.max_wait_sec = float(get_env("RATE_LIMIT_MAX_WAIT_SEC", "300"))
+        self.max_retries = int(get_env("RATE_LIMIT_MAX_RETRIES", "5"))
+        self.retry_base_sec = float(get_env("RATE_LIMIT_RETRY_BASE_SEC", "2"))
+        self.youtube_daily_quota = int(get_env("YOUTUBE_DAILY_QUOTA", str(YOUTUBE_DAILY_QUOTA)))
+
+        self._lock = threading.Lock()
+        self._conn = None
+        if self.enabled:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls, logger: ProgressLogger = None) -> "RateLimiter":
+        """環境変数から生成（カセット再生時は外部呼び出しがないため無効）"""
+        from src.cassette import get_cassette
+        enabled = get_env("RATE_LIMIT_ENABLED", "true").lower() == "true" and not get_cassette().replaying
+        return cls(logger=logger, enabled=enabled)
+
+    def model_limits(self, model: str) -> Dict[str, int]:
+        """モデルの上限 {"rpm", "tpm"}（環境変数 RATE_LIMIT_<MODEL>="rpm,tpm" で上書き）"""
+        limits = dict(MODEL_RATE_LIMITS.get(model, DEFAULT_MODEL_RATE_LIMIT))
+        key = "RATE_LIMIT_" + "".join(c if c.isalnum() else "_" for c in model).upper()
+        override = get_env(key, "")
+        if override:
+            rpm, _, tpm = override.partition(",")
+            limits["rpm"] = int(rpm)
+            if tpm:
+                limits["tpm"] = int(tpm)
+        return limits
+
+    def _model_buckets(self, model: str, tokens: int) -> List[Bucket]:
+        limits = self.model_limits(model)
+        buckets = []
+        if limits["rpm"]:
+            buckets.append((f"openai:rpm:{model}", limits["rpm"], limits["rpm"] / 60, 1))
+        if limits["tpm"] and tokens:
+            buckets.append((f"openai:tpm:{model}", limits["tpm"], limits["tpm"] / 60, tokens))
+        return buckets
+
+    def _youtube_buckets(self, method: str) -> List[Bucket]:
+        quota = self.youtube_daily_quota
+        return [("youtube:quota", quota, quota / 86400, YOUTUBE_QUOTA_COST.get(method, 1))]
+
+    def call_openai(self, model: str, tokens: int, fn: Callable[[], Any]) -> Any:
+        """
+        OpenAI APIをレート制限内で呼び出し
+
+        Args:
+            model: モデル名
+            tokens: 消費トークンの見込み（入力 + 最大出力。0ならTPMは見ない）
+            fn: API呼び出し
+        """
+        return self._call(self._model_buckets(model, tokens), fn, model)
+
+    def execute_youtube(self, request, method: str, stage: str) -> Dict:
+        """
+        YouTube Data APIのリクエストをクォータ内で実行し、使用量を記録
+
+        Args:
+            request: googleapiclientのリクエスト（.execute()を持つ）
+            method: APIメソッド（例: "search.list"）
+            stage: 使用量の集計ステージ
+        """
+        def execute():
+            record_quota(method, stage)
+            return request.execute()
+
+        return self._call(self._youtube_buckets(method), execute, f"YouTube {method}")
+
+    def _call(self, buckets: List[Bucket], fn: Callable[[], Any], label: str) -> Any:
+        """バケットを確保してから呼び出し、429なら全バケットを止めて再試行"""
+        for attempt in range(self.max_retries + 1):
+            for bucket in buckets:
+                self.acquire(*bucket)
+            try:
+                return fn()
+            except Exception as e:
+                if attempt == self.max_retries or not is_rate_limited(e):
+                    raise
+                wait = _retry_after(e) or self.retry_base_sec * 2 ** attempt * random.uniform(1.0, 1.5)
+                self.logger.warning(f"{label} がレート制限（429）を返しました。{wait:.1f}秒後に再試行します")
+                # 呼び出し元のスパン（llm.attempt など）に実際の再試行回数を残す
+                span = current_span()
+                span.set_attribute("retry_count", attempt + 1)
+                span.add_event("rate_limit_retry", attempt=attempt + 1, wait_sec=round(wait, 2))
+                get_tracer().metrics.inc("rate_limit_retries_total", target=label)
+                if self.enabled:
+                    for name, *_ in buckets:
+                        self._block(name, wait)
+                else:
+                    time.sleep(wait)
+
+    def acquire(self, name: str, capacity: float, per_sec: float, cost: float = 1) -> float:
+        """
+        バケットから消費量を確保（足りなければ回復まで待つ）
+
+        Returns:
+            待った秒数
+        """
+        if not self.enabled:
+            return 0.0
+        # 容量を超える消費は容量いっぱいで確保（永遠に待たないように）
+        cost = min(cost, capacity)
+        started = time.time()
+        logged = False
+        while True:
+            wait = self._try_acquire(name, capacity, per_sec, cost)
+            if wait <= 0:
+                return time.time() - started
+            if time.time() - started + wait > self.max_wait_sec:
+                raise RateLimitTimeoutError(
+                    f"{name} の上限の回復まで{wait:.0f}秒かかるため待機を打ち切りました"
+                )
+            if not logged:
+                self.logger.info(f"レート制限待ち: {name}（約{wait:.1f}秒）")
+                logged = True
+            # 他のプロセスと同時に起きて取り合わないよう少しずらす
+            time.sleep(min(wait, 1.0) * random.uniform(1.0, 1.2))
+
+    def _try_acquire(self, name: str, capacity: float, per_sec: float, cost: float) -> float:
+        """確保できれば0、できなければ回復までの見込み秒数"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated_at, blocked_until FROM buckets WHERE name = ?", (name,)
+                ).fetchone()
+                if row is None:
+                    tokens, blocked_until = capacity, 0.0
+                else:
+                    elapsed = max(now - row["updated_at"], 0.0)
+                    tokens, blocked_until = min(capacity, row["tokens"] + elapsed * per_sec), row["blocked_until"]
+
+                if blocked_until > now:
+                    wait = blocked_until - now
+                elif tokens >= cost:
+                    tokens -= cost
+                    wait = 0.0
+                else:
+                    wait = (cost - tokens) / per_sec
+                self._conn.execute(
+                    """
+                    INSERT INTO buckets (name, tokens, updated_at, blocked_until) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at
+                    """,
+                    (name, tokens, now, blocked_until)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def _block(self, name: str, seconds: float):
+        """429を受けたバケットを全プロセスで一定時間止める"""
+        until = time.time() + seconds
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO buckets (name, tokens, updated_at, blocked_until) VALUES (?, 0, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET blocked_until = MAX(blocked_until, excluded.blocked_until)
+                """,
+                (name, time.time(), until)
+            )
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """プロセス共通のレート制限（環境変数から初回のみ生成）"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                # 複数の実行で共有するため、実行ごとのログ出力先ではなく標準エラーに出す
+                # （標準出力に結果をストリーミングする実行を汚さない）
+                _limiter = RateLimiter.from_env(logger=ProgressLogger(stream=sys.stderr))
+    return _limiter
+
+
+def set_rate_limiter(limiter: Optional[RateLimiter]):
+    """プロセス共通のレート制限を差し替え（Noneで環境変数から再生成）"""
+    global _limiter
+    with _limiter_lock:
+        _limiter = limiter
@@ -0,0 +1,229 @@
+"""
+常駐リソースモジュール
+Streamlitの再描画・セッションをまたいで使い回すプロセス共通のリソースと、
+(入力文章, 処理設定) ごとの実行結果キャッシュ
+
+- ルーター（OpenAIクライアント・ヘッジのレイテンシ記録）・動画レジストリ・結果ストアは全実行で共有する
+- YouTubeクライアント（httplib2）はスレッド間で共有できないため、プールから実行ごとに貸し出して使い回す
+- オーケストレーターは実行ごとの状態（使用量・締め切り・ジャーナル・進捗イベント）を持つため実行ごとに生成するが、
+  重い部品はここから渡すので生成は軽い
+- health() で状態を確認し、使えなくなったら get_resources() が作り直す
+"""
+import atexit
+import copy
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from src.cassette import build_youtube_client
+from src.model_router import ModelRouter
+from src.orchestrator import YouTubeCommentOrchestrator
+from src.progress_events import BackgroundRun
+from src.result_store import ResultStore
+from src.run_config import RunConfig
+from src.tracing import get_tracer
+from src.utils import get_env, ProgressLogger
+from src.video_registry import VideoRegistry
+
+
+def _cache_key(user_input: str, config: RunConfig) -> Tuple:
+    """結果キャッシュのキー（空白と大文字小文字の違いは同じ入力とみなす）"""
+    return " ".join(user_input.split()).lower(), tuple(sorted(config.to_dict().items()))
+
+
+class Resources:
+    def __init__(self, logger: ProgressLogger = None):
+        self.logger = logger or ProgressLogger(verbose=False)
+        self.tracer = get_tracer()
+        # 貸し出していないYouTubeクライアントをこの数まで保持
+        self.youtube_pool_size = int(get_env("YOUTUBE_CLIENT_POOL_SIZE", "4"))
+        self.cache_size = int(get_env("RESULT_CACHE_SIZE", "32"))
+        self.cache_ttl_sec = float(get_env("RESULT_CACHE_TTL_SEC", "3600"))
+
+        self.router = ModelRouter(self.logger)
+        self.registry = VideoRegistry(logger=self.logger)
+        self.result_store = ResultStore(logger=self.logger)
+
+        self._lock = threading.Lock()
+        # 最初の実行で生成を待たないよう1つ作っておく
+        self._youtube_pool: List[Any] = [build_youtube_client()]
+        self._leased = 0
+        self._cache: "OrderedDict[Tuple, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._runs = 0
+        self._cache_hits = 0
+        self.created_at = time.time()
+        self.closed = False
+
+    @contextmanager
+    def youtube_client(self) -> Iterator[Any]:
+        """YouTubeクライアントを貸し出し（使い終わったらプールに戻す）"""
+        with self._lock:
+            youtube = self._youtube_pool.pop() if self._youtube_pool else None
+            self._leased += 1
+        try:
+            if youtube is None:
+                youtube = build_youtube_client()
+            yield youtube
+        finally:
+            with self._lock:
+                self._leased -= 1
+                if youtube is not None and not self.closed and len(self._youtube_pool) < self.youtube_pool_size:
+                    self._youtube_pool.append(youtube)
+                    youtube = None
+            _close_client(youtube)
+
+    def run(self, user_input: str, config: Optional[RunConfig] = None, verbose: bool = False, **process_options) -> List[Dict]:
+        """
+        共有リソースで1回実行（同じプロセスで並行して呼び出してよい）
+
+        Args:
+            user_input: ユーザーの入力文章
+            config: 処理設定（省略時は RunConfig.from_env()）
+            verbose: 詳細ログを出力するか
+            process_options: YouTubeCommentOrchestrator.process() に渡す引数
+        """
+        with self._lock:
+            self._runs += 1
+        with self.youtube_client() as youtube:
+            orchestrator = YouTubeCommentOrchestrator(
+                verbose=verbose,
+                router=self.router,
+                registry=self.registry,
+                result_store=self.result_store,
+                config=config,
+                youtube=youtube
+            )
+            return orchestrator.process(user_input, **process_options)
+
+    def start_run(self, user_input: str, config: Optional[RunConfig] = None) -> BackgroundRun:
+        """
+        バックグラウンドで実行（Streamlit用）
+
+        同じ入力・設定で完了済みの実行がキャッシュにあれば、その進捗イベントをすぐに再生する
+        """
+        config = config or RunConfig.from_env()
+        events = self.cached_events(user_input, config)
+        if events is not None:
+            def replay(on_event, cancel_event):
+                for event in events:
+                    on_event(event)
+
+            run = BackgroundRun(replay)
+            run.cached = True
+            return run.start()
+
+        def execute(on_event, cancel_event):
+            recorded = []
+
+            def record(event):
+                recorded.append(event)
+                on_event(event)
+
+            results = self.run(user_input, config, on_event=record, cancel_event=cancel_event)
+            # 中止した実行は途中までの結果なのでキャッシュしない
+            if not run.cancelled:
+                self._store_events(user_input, config, recorded)
+            return results
+
+        run = BackgroundRun(execute)
+        return run.start()
+
+    def cached_events(self, user_input: str, config: RunConfig) -> Optional[List[Dict]]:
+        """完了済みの実行の進捗イベント（なければ・期限切れならNone）"""
+        if not self.cache_size:
+            return None
+        key = _cache_key(user_input, config)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            stored_at, events = entry
+            if time.time() - stored_at > self.cache_ttl_sec:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            self._cache_hits += 1
+        self.tracer.metrics.inc("result_cache_hits_total")
+        # 再生した側の変更がキャッシュに波及しないようコピーを返す
+        return copy.deepcopy(events)
+
+    def _store_events(self, user_input: str, config: RunConfig, events: List[Dict]):
+        if not self.cache_size:
+            return
+        key = _cache_key(user_input, config)
+        with self._lock:
+            self._cache[key] = (time.time(), copy.deepcopy(events))
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def health(self) -> Dict:
+        """各リソースの状態 {"healthy", "registry", "result_store", "youtube_clients", ...}"""
+        registry_ok = self.registry.ping()
+        result_store_ok = self.result_store.ping()
+        with self._lock:
+            return {
+                "healthy": not self.closed and registry_ok and result_store_ok,
+                "closed": self.closed,
+                "registry": registry_ok,
+                "result_store": result_store_ok,
+                "youtube_clients": {"idle": len(self._youtube_pool), "leased": self._leased},
+                "cached_runs": len(self._cache),
+                "runs": self._runs,
+                "cache_hits": self._cache_hits,
+                "uptime_sec": round(time.time() - self.created_at, 1)
+            }
+
+    def healthy(self) -> bool:
+        return self.health()["healthy"]
+
+    def close(self):
+        """接続・クライアントを解放（貸し出し中のYouTubeクライアントは返却時に閉じる）"""
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            pool, self._youtube_pool = self._youtube_pool, []
+            self._cache.clear()
+        for youtube in pool:
+            _close_client(youtube)
+        self.registry.close()
+        self.result_store.close()
+
+
+def _close_client(client):
+    close = getattr(client, "close", None)
+    if callable(close):
+        try:
+            close()
+        except Exception:
+            pass
+
+
+_resources: Optional[Resources] = None
+_resources_lock = threading.Lock()
+
+
+def get_resources() -> Resources:
+    """プロセス共通の常駐リソース（初回、または使えなくなったときに生成）"""
+    global _resources
+    with _resources_lock:
+        if _resources is None or not _resources.healthy():
+            if _resources is not None:
+                _resources.logger.warning("常駐リソースが使えなくなったため作り直します")
+                _resources.close()
+            _resources = Resources()
+        return _resources
+
+
+def close_resources():
+    """プロセス共通の常駐リソースを解放"""
+    global _resources
+    with _resources_lock:
+        if _resources is not None:
+            _resources.close()
+            _resources = None
+
+
+atexit.register(close_resources)
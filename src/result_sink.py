@@ -0,0 +1,113 @@
+"""
+結果ストリーミングモジュール
+1動画分の結果が確定するたびにJSONL（1行1結果）で追記し、途中で落ちても確定分を失わないようにする
+
+書き込みは1行ごとにflushするため `tail -f` や下流ツールからすぐに読める。
+fsyncはコストが高いので、件数または経過時間ごとにまとめて行う。
+"""
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+from src.utils import get_env, ProgressLogger
+
+# --output にこの値を渡すと標準出力へストリーミング
+STDOUT_TARGET = "-"
+
+
+class JsonlResultSink:
+    def __init__(
+        self,
+        target: str,
+        logger: ProgressLogger = None,
+        fsync_every: Optional[int] = None,
+        fsync_interval_sec: Optional[float] = None
+    ):
+        """
+        Args:
+            target: 出力先ファイルパス（"-" で標準出力）
+            fsync_every: この件数ごとにfsync（省略時は RESULT_SINK_FSYNC_EVERY）
+            fsync_interval_sec: 前回のfsyncからこの秒数が経っていればfsync（省略時は RESULT_SINK_FSYNC_INTERVAL_SEC）
+        """
+        self.logger = logger or ProgressLogger()
+        self.target = target
+        self.fsync_every = fsync_every if fsync_every is not None else int(get_env("RESULT_SINK_FSYNC_EVERY", "10"))
+        self.fsync_interval_sec = (
+            fsync_interval_sec if fsync_interval_sec is not None
+            else float(get_env("RESULT_SINK_FSYNC_INTERVAL_SEC", "2.0"))
+        )
+
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.count = 0
+
+        if target == STDOUT_TARGET:
+            self._file = sys.stdout
+            self._owns_file = False
+        else:
+            directory = os.path.dirname(target)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(target, "a", encoding="utf-8")
+            self._owns_file = True
+
+    def write(self, result: Dict):
+        """結果を1行追記"""
+        line = json.dumps(result, ensure_ascii=False)
+        with self._lock:
+            try:
+                self._file.write(line + "\n")
+                self._file.flush()
+                self.count += 1
+                self._unsynced += 1
+                if (self._unsynced >= self.fsync_every
+                        or time.monotonic() - self._last_sync >= self.fsync_interval_sec):
+                    self._sync()
+            except Exception as e:
+                self.logger.error(f"結果の書き込みエラー: {str(e)}")
+
+    def _sync(self):
+        """ディスクへ確定（ロック内で呼ぶこと）"""
+        if self._unsynced and self._owns_file:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        """未確定分をfsyncして閉じる"""
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                self._file.flush()
+                self._sync()
+            except Exception as e:
+                self.logger.error(f"結果の書き込みエラー: {str(e)}")
+            if self._owns_file:
+                self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def open_result_sink(output: str, logger: ProgressLogger = None) -> JsonlResultSink:
+    """
+    --output の指定から結果の出力先を開く
+
+    - "-": 標準出力
+    - "*.jsonl": そのファイルに追記
+    - それ以外: ディレクトリとみなし <output>/<日時>_results.jsonl に出力
+    """
+    if output == STDOUT_TARGET or output.endswith(".jsonl"):
+        return JsonlResultSink(output, logger)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return JsonlResultSink(os.path.join(output, f"{timestamp}_results.jsonl"), logger)
@@ -0,0 +1,302 @@
+"""
+結果ストアモジュール
+ネタパックを1動画ごとにSQLiteへ保存し、構文タグ・スコア・チャンネル・本文で検索できるようにする
+
+本文検索はFTS5のtrigramトークナイザ（分かち書き不要で日本語の部分一致に対応）を使う。
+trigramは3文字以上のクエリのみ索引を使えるため、2文字以下はLIKE検索にフォールバックする。
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+from src.utils import get_env, ProgressLogger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS packs (
+    video_id TEXT PRIMARY KEY,          -- 動画ごとに最新のネタパックのみ保持
+    title TEXT,
+    channel_title TEXT,
+    url TEXT,
+    query TEXT,                         -- 生成時のユーザー入力
+    screening_score REAL,
+    quality_score REAL,
+    passed INTEGER,
+    attempts INTEGER,
+    warning TEXT,
+    created_at REAL NOT NULL,
+    result TEXT NOT NULL                -- 最終結果のJSON
+);
+CREATE INDEX IF NOT EXISTS idx_packs_channel ON packs(channel_title);
+CREATE INDEX IF NOT EXISTS idx_packs_quality ON packs(quality_score);
+
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    video_id TEXT NOT NULL REFERENCES packs(video_id),
+    comment TEXT,                       -- 元コメント
+    tag TEXT,                           -- 構文タグ
+    point TEXT,                         -- いじりポイント
+    tsukkomi TEXT,                      -- ツッコミ例
+    scene_timestamp TEXT,
+    scene_description TEXT,
+    scene_relevance REAL
+);
+CREATE INDEX IF NOT EXISTS idx_items_video ON items(video_id);
+CREATE INDEX IF NOT EXISTS idx_items_tag ON items(tag);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    comment, point, tsukkomi, scene_description,
+    content='items', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN
+    INSERT INTO items_fts(rowid, comment, point, tsukkomi, scene_description)
+    VALUES (new.id, new.comment, new.point, new.tsukkomi, new.scene_description);
+END;
+CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN
+    INSERT INTO items_fts(items_fts, rowid, comment, point, tsukkomi, scene_description)
+    VALUES ('delete', old.id, old.comment, old.point, old.tsukkomi, old.scene_description);
+END;
+"""
+
+# trigramトークナイザの最小クエリ長
+FTS_MIN_QUERY_LENGTH = 3
+
+TEXT_COLUMNS = ("comment", "point", "tsukkomi", "scene_description")
+
+
+class ResultStore:
+    def __init__(self, path: Optional[str] = None, logger: ProgressLogger = None):
+        self.logger = logger or ProgressLogger()
+        self.enabled = get_env("RESULT_STORE_ENABLED", "true").lower() == "true"
+        self.path = path or get_env("RESULT_STORE_PATH", "outputs/results.sqlite3")
+
+        self._lock = threading.Lock()
+        self._conn = None
+        self.fts_enabled = False
+        if self.enabled:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            try:
+                self._conn.executescript(FTS_SCHEMA)
+                self.fts_enabled = True
+            except sqlite3.OperationalError as e:
+                # FTS5/trigram非対応のSQLite（3.34未満）ではLIKE検索のみ
+                self.logger.warning(f"全文検索インデックスを作成できません。LIKE検索を使用します: {str(e)}")
+
+    def add_result(self, result: Dict, query: Optional[str] = None) -> bool:
+        """
+        1動画分の最終結果を保存（同じ動画の以前のネタパックは置き換え）
+
+        形式の崩れたネタは検索用の行だけ省き、ネタパック自体は保存する
+
+        Returns:
+            保存できたか（無効時はFalse）
+        """
+        if not self.enabled:
+            return False
+        video_info = result['video_info']
+        video_id = video_info['video_id']
+        rows = []
+        for item in result.get('analysis', []):
+            try:
+                rows.append(_item_row(video_id, item))
+            except Exception as e:
+                self.logger.warning(f"検索用に登録できないネタを省きます（{video_id}）: {str(e)}")
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM items WHERE video_id = ?", (video_id,))
+                self._conn.execute(
+                    """
+                    INSERT OR REPLACE INTO packs (
+                        video_id, title, channel_title, url, query, screening_score, quality_score,
+                        passed, attempts, warning, created_at, result
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        video_id, video_info.get('title'), video_info.get('channel_title'), video_info.get('url'),
+                        query,
+                        _to_float(result.get('screening_result', {}).get('score')),
+                        _to_float(result['evaluation'].get('total_score')),
+                        1 if result['evaluation'].get('passed') else 0,
+                        result.get('attempts'), result.get('warning'), time.time(),
+                        json.dumps(result, ensure_ascii=False)
+                    )
+                )
+                self._conn.executemany(
+                    """
+                    INSERT INTO items (
+                        video_id, comment, tag, point, tsukkomi,
+                        scene_timestamp, scene_description, scene_relevance
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    rows
+                )
+            return True
+        except Exception as e:
+            self.logger.error(f"結果ストア保存エラー: {str(e)}")
+            return False
+
+    def search(
+        self,
+        text: Optional[str] = None,
+        tag: Optional[str] = None,
+        channel: Optional[str] = None,
+        min_score: Optional[float] = None,
+        passed_only: bool = False,
+        limit: int = 50
+    ) -> List[Dict]:
+        """
+        ネタを検索
+
+        Args:
+            text: 元コメント・いじりポイント・ツッコミ例・シーン説明の部分一致
+            tag: 構文タグ（完全一致）
+            channel: チャンネル名（部分一致）
+            min_score: 品質スコアの下限
+            passed_only: 品質評価に合格したネタパックのみ
+            limit: 最大件数
+
+        Returns:
+            [{"video_id", "title", "channel_title", "url", "quality_score", "元コメント",
+              "構文タグ", "いじりポイント", "ツッコミ例", "関連シーン"}]（品質スコアの高い順）
+        """
+        if not self.enabled:
+            return []
+
+        conditions = []
+        params: List = []
+        if text:
+            if self.fts_enabled and len(text) >= FTS_MIN_QUERY_LENGTH:
+                conditions.append("items.id IN (SELECT rowid FROM items_fts WHERE items_fts MATCH ?)")
+                params.append('"' + text.replace('"', '""') + '"')
+            else:
+                pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                conditions.append("(" + " OR ".join(f"items.{c} LIKE ? ESCAPE '\\'" for c in TEXT_COLUMNS) + ")")
+                params.extend([pattern] * len(TEXT_COLUMNS))
+        if tag:
+            conditions.append("items.tag = ?")
+            params.append(tag)
+        if channel:
+            conditions.append("packs.channel_title LIKE ?")
+            params.append(f"%{channel}%")
+        if min_score is not None:
+            conditions.append("packs.quality_score >= ?")
+            params.append(min_score)
+        if passed_only:
+            conditions.append("packs.passed = 1")
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = f"""
+            SELECT items.*, packs.title, packs.channel_title, packs.url, packs.quality_score, packs.created_at
+            FROM items JOIN packs ON packs.video_id = items.video_id
+            {where}
+            ORDER BY packs.quality_score DESC, items.scene_relevance DESC
+            LIMIT ?
+        """
+        params.append(limit)
+
+        try:
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+        except Exception as e:
+            self.logger.error(f"結果ストア検索エラー: {str(e)}")
+            return []
+
+        return [
+            {
+                "video_id": row["video_id"],
+                "title": row["title"],
+                "channel_title": row["channel_title"],
+                "url": row["url"],
+                "quality_score": row["quality_score"],
+                "created_at": row["created_at"],
+                "元コメント": row["comment"],
+                "構文タグ": row["tag"],
+                "いじりポイント": row["point"],
+                "ツッコミ例": row["tsukkomi"],
+                "関連シーン": {
+                    "タイムスタンプ": row["scene_timestamp"],
+                    "シーン説明": row["scene_description"],
+                    "関連度": row["scene_relevance"]
+                }
+            }
+            for row in rows
+        ]
+
+    def tags(self) -> List[tuple]:
+        """構文タグと件数の一覧（件数の多い順）"""
+        if not self.enabled:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT tag, COUNT(*) AS n FROM items WHERE tag IS NOT NULL GROUP BY tag ORDER BY n DESC"
+            ).fetchall()
+        return [(row["tag"], row["n"]) for row in rows]
+
+    def get_result(self, video_id: str) -> Optional[Dict]:
+        """保存済みの最終結果（ネタパック全体）を取得"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM packs WHERE video_id = ?", (video_id,)).fetchone()
+        return json.loads(row["result"]) if row else None
+
+    def ping(self) -> bool:
+        """接続が使えるか（無効時はTrue）"""
+        if not self.enabled:
+            return True
+        try:
+            with self._lock:
+                self._conn.execute("SELECT 1").fetchone()
+            return True
+        except Exception as e:
+            self.logger.error(f"結果ストアの接続エラー: {str(e)}")
+            return False
+
+    def close(self):
+        """接続を閉じる（以降は無効として扱う）"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self.enabled = False
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _text(value) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _item_row(video_id: str, item: Dict) -> tuple:
+    scene = item.get('関連シーン') or item.get('related_scene') or {}
+    if isinstance(scene, dict):
+        timestamp, description, relevance = scene.get('タイムスタンプ'), scene.get('シーン説明'), scene.get('関連度')
+    else:
+        # "0:32" のように文字列だけ返された場合はそのまま説明として残す
+        timestamp, description, relevance = None, str(scene), None
+    return (
+        video_id,
+        _text(item.get('元コメント')),
+        _text(item.get('構文タグ')),
+        _text(item.get('いじりポイント')),
+        _text(item.get('ツッコミ例')),
+        _text(timestamp),
+        _text(description),
+        _to_float(relevance),
+    )
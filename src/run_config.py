@@ -0,0 +1,68 @@
+"""
+実行設定モジュール
+1回の実行の処理設定（検索動画数・コメント数・品質閾値・再試行回数など）を変更不可のオブジェクトにまとめる
+
+設定の出どころは環境変数（.env）とCLI・UIの指定だけ。os.environを書き換えて渡すと
+同じプロセスで並行する実行（Streamlitの複数セッション・バッチのワーカー）が互いの設定を上書きするため、
+オーケストレーターには RunConfig を明示的に渡す。
+"""
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Dict, Optional
+from src.utils import get_env
+
+
+@dataclass(frozen=True)
+class RunConfig:
+    # 検索ワードあたりの検索動画数
+    max_search_results: int = 3
+    # 動画あたりの取得コメント数
+    max_comments: int = 200
+    # スクリーニングに使うコメント数
+    screening_comments: int = 20
+    # 詳細分析に渡すコメント数
+    filtered_comments: int = 50
+    # 品質評価の合格スコア
+    quality_threshold: float = 7.0
+    # 詳細分析の最大試行回数
+    max_retry: int = 2
+    # 複数動画のスクリーニング・品質評価を1リクエストにまとめる
+    batch_mode: bool = False
+    # スクリーニングとコメントフィルタリングを1回の呼び出しで行う
+    fused_screening: bool = False
+    # 品質評価に合格したネタパックがこの件数に達したら残りの処理を打ち切る（0は無制限）
+    target_results: int = 0
+
+    @classmethod
+    def from_env(cls, **overrides) -> "RunConfig":
+        """
+        環境変数から生成
+
+        Args:
+            overrides: CLI・UIで指定した値（Noneの項目は環境変数の値を使う）
+        """
+        config = cls(
+            max_search_results=int(get_env("MAX_SEARCH_RESULTS", "3")),
+            max_comments=int(get_env("MAX_COMMENTS_PER_VIDEO", "200")),
+            screening_comments=int(get_env("EARLY_SCREENING_COMMENTS", "20")),
+            filtered_comments=int(get_env("FILTERED_COMMENTS", "50")),
+            quality_threshold=float(get_env("QUALITY_THRESHOLD", "7.0")),
+            max_retry=int(get_env("MAX_RETRY_ATTEMPTS", "2")),
+            batch_mode=get_env("BATCH_MODE", "false").lower() == "true",
+            fused_screening=get_env("FUSED_SCREENING", "false").lower() == "true",
+            target_results=int(get_env("TARGET_RESULTS", "0"))
+        )
+        return config.with_overrides(**overrides)
+
+    def with_overrides(self, **overrides) -> "RunConfig":
+        """指定した項目だけ差し替えた設定（Noneの項目はそのまま）"""
+        return replace(self, **{key: value for key, value in overrides.items() if value is not None})
+
+    def to_dict(self) -> Dict:
+        """JSONに保存できる形式（ジョブのペイロード・結果のキャッシュキー用）"""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> "RunConfig":
+        """to_dict()の値から復元（未知の項目は無視し、欠けた項目は環境変数の値を使う）"""
+        names = {f.name for f in fields(cls)}
+        return cls.from_env(**{key: value for key, value in (data or {}).items() if key in names})
@@ -0,0 +1,121 @@
+"""
+実行ジャーナルモジュール
+各ステップの出力（検索ワード・候補動画・コメント・スクリーニング判定・文字起こし・分析試行など）を
+1実行ごとのJSONLに追記し、中断した実行を有料の外部呼び出しを繰り返さずに再開できるようにする
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from src.utils import get_env, ProgressLogger
+
+# 同じ動画・ステップで複数回記録し、すべてを順に再生するステップ
+MULTI_STEPS = ("analysis", "evaluation")
+
+
+class RunNotFoundError(Exception):
+    """再開対象の実行ジャーナルが存在しない"""
+
+
+class RunJournal:
+    def __init__(
+        self,
+        run_id: Optional[str] = None,
+        directory: Optional[str] = None,
+        logger: ProgressLogger = None,
+        enabled: Optional[bool] = None
+    ):
+        """
+        Args:
+            run_id: 実行ID（省略時は新規に採番）
+            directory: ジャーナルの保存先（省略時は RUN_JOURNAL_DIR）
+            enabled: Falseなら何も記録しない（省略時は RUN_JOURNAL_ENABLED）
+        """
+        self.logger = logger or ProgressLogger()
+        self.enabled = enabled if enabled is not None else get_env("RUN_JOURNAL_ENABLED", "true").lower() == "true"
+        self.directory = directory or get_env("RUN_JOURNAL_DIR", "outputs/runs")
+        self.run_id = run_id or f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self.path = os.path.join(self.directory, f"{self.run_id}.jsonl")
+
+        self._lock = threading.Lock()
+        # {(ステップ, 動画ID): 最新の値}、MULTI_STEPSは値のリスト
+        self._entries: Dict[Tuple[str, Optional[str]], Any] = {}
+        self._file = None
+
+    @classmethod
+    def resume(cls, run_id: str, directory: Optional[str] = None, logger: ProgressLogger = None) -> "RunJournal":
+        """既存の実行ジャーナルを読み込んで再開"""
+        journal = cls(run_id=run_id, directory=directory, logger=logger, enabled=True)
+        if not os.path.exists(journal.path):
+            raise RunNotFoundError(f"実行ジャーナルが見つかりません: {journal.path}")
+
+        with open(journal.path, "rb") as f:
+            content = f.read()
+        # 書き込み途中で中断された最終行（改行で終わっていない）は捨て、
+        # 以降の追記がその断片に続けて書かれないようファイルからも切り詰める
+        complete = content.rfind(b"\n") + 1
+        if complete < len(content):
+            journal.logger.warning(f"実行ジャーナルの書き込み途中の最終行を破棄します: {journal.path}")
+            os.truncate(journal.path, complete)
+
+        for line in content[:complete].decode("utf-8", "replace").splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            journal._apply(record["step"], record.get("video_id"), record["data"])
+        return journal
+
+    def _apply(self, step: str, video_id: Optional[str], data: Any):
+        key = (step, video_id)
+        if step in MULTI_STEPS:
+            self._entries.setdefault(key, []).append(data)
+        else:
+            self._entries[key] = data
+
+    def record(self, step: str, data: Any, video_id: Optional[str] = None):
+        """ステップの出力を追記（1件ごとにfsyncし、直後に落ちても失われないようにする）"""
+        if not self.enabled:
+            return
+        line = json.dumps(
+            {"step": step, "video_id": video_id, "data": data, "ts": time.time()},
+            ensure_ascii=False
+        )
+        with self._lock:
+            try:
+                if self._file is None:
+                    os.makedirs(self.directory, exist_ok=True)
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write(line + "\n")
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._apply(step, video_id, data)
+            except Exception as e:
+                self.logger.error(f"実行ジャーナル書き込みエラー: {str(e)}")
+
+    def lookup(self, step: str, video_id: Optional[str] = None) -> Tuple[bool, Any]:
+        """
+        記録済みの値を取得
+
+        Returns:
+            (記録済みか, 値)
+        """
+        key = (step, video_id)
+        with self._lock:
+            if key in self._entries:
+                return True, self._entries[key]
+        return False, None
+
+    def entries(self, step: str, video_id: Optional[str] = None) -> List[Any]:
+        """MULTI_STEPSのステップの記録を古い順に取得"""
+        with self._lock:
+            return list(self._entries.get((step, video_id), []))
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,115 @@
+"""
+実行スケジューラモジュール
+締め切り（壁時計時間）内で最も価値の高い結果を返せるよう、
+動画の処理順・Whisperフォールバック・再分析の可否を所要時間の予測から判断する
+"""
+import threading
+import time
+from typing import Dict, List, Optional
+from src.utils import get_env, ProgressLogger
+
+# 所要時間の初期推定（秒）。実測でEWMA更新される
+DEFAULT_ESTIMATES = {
+    "captions": 2.0,
+    "whisper": 90.0,
+    "filtering": 8.0,
+    "analysis": 25.0,
+    "evaluation": 8.0,
+}
+
+
+class RunScheduler:
+    """締め切りと所要時間のEWMA推定に基づく実行判断"""
+
+    def __init__(self, logger: ProgressLogger = None):
+        self.logger = logger or ProgressLogger()
+        # EWMAの平滑化係数（大きいほど直近の実測を重視）
+        self.alpha = float(get_env("SCHEDULER_EWMA_ALPHA", "0.3"))
+        # 予測のばらつきに対する安全率
+        self.safety_factor = float(get_env("SCHEDULER_SAFETY_FACTOR", "1.2"))
+
+        self._lock = threading.Lock()
+        # 推定値はインスタンスが生きている間（複数回の実行をまたいで）引き継ぐ
+        self.estimates: Dict[str, float] = dict(DEFAULT_ESTIMATES)
+        self.deadline: Optional[float] = None
+        self._start: float = time.monotonic()
+
+    def start(self, deadline_sec: Optional[float] = None):
+        """実行開始（deadline_secがNone/0なら締め切りなし）"""
+        self._start = time.monotonic()
+        self.deadline = self._start + deadline_sec if deadline_sec else None
+
+    @property
+    def active(self) -> bool:
+        """締め切りが設定されているか"""
+        return self.deadline is not None
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._start
+
+    def remaining(self) -> float:
+        """締め切りまでの残り秒数（締め切りなしなら無限大）"""
+        if self.deadline is None:
+            return float("inf")
+        return self.deadline - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    # ========================================
+    # 所要時間の推定
+    # ========================================
+    def record(self, operation: str, seconds: float):
+        """実測した所要時間で推定値を更新"""
+        with self._lock:
+            previous = self.estimates.get(operation, seconds)
+            self.estimates[operation] = (1 - self.alpha) * previous + self.alpha * seconds
+
+    def estimate(self, *operations: str) -> float:
+        """操作列の予測所要時間（安全率込み）"""
+        with self._lock:
+            return sum(self.estimates.get(op, 0.0) for op in operations) * self.safety_factor
+
+    def can_afford(self, *operations: str) -> bool:
+        """締め切りまでに操作列を終えられる見込みか"""
+        return self.remaining() >= self.estimate(*operations)
+
+    # ========================================
+    # 判断
+    # ========================================
+    def predicted_seconds(self, video_data: Dict) -> float:
+        """1動画の残り処理（文字起こし・フィルタリング・分析1回・評価1回）の予測所要時間"""
+        operations = ["analysis", "evaluation"]
+        if video_data.get("captions") is None:
+            operations.append("captions")
+        elif not video_data["captions"]:
+            operations.append("whisper")
+        if "filtered_comments" not in video_data:
+            operations.append("filtering")
+        return self.estimate(*operations)
+
+    def prioritize(self, videos: List[Dict]) -> List[Dict]:
+        """
+        予測価値/秒の高い順に並べ替え
+
+        価値はスクリーニングスコア、コストは predicted_seconds で見積もる。
+        字幕がなくWhisperが必要な動画は締め切りに間に合う見込みが薄いぶん後回しになる。
+        """
+        def value_per_second(video_data: Dict) -> float:
+            score = float(video_data.get("screening_result", {}).get("score", 0) or 0)
+            return score / max(self.predicted_seconds(video_data), 1e-6)
+
+        return sorted(videos, key=value_per_second, reverse=True)
+
+    def allow_whisper(self) -> bool:
+        """Whisperフォールバック後に分析・評価まで終えられる見込みか"""
+        return self.can_afford("whisper", "analysis", "evaluation")
+
+    def allow_retry(self) -> bool:
+        """再分析 + 再評価を締め切りまでに終えられる見込みか"""
+        return self.can_afford("analysis", "evaluation")
+
+    def allow_video(self, video_data: Dict) -> bool:
+        """次の動画に着手して結果まで出せる見込みか"""
+        return self.remaining() >= self.predicted_seconds(video_data)
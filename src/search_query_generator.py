@@ -2,15 +2,15 @@
 検索ワード生成モジュール
 ユーザー入力からYouTube検索ワードを生成
 """
-import openai
 from typing import List
-from config.prompt_template import SEARCH_QUERY_GENERATOR_PROMPT
-from src.utils import get_env, extract_json_from_text, ProgressLogger
+from config.prompt_template import SEARCH_QUERY_GENERATOR_PREFIX, SEARCH_QUERY_GENERATOR_SUFFIX
+from src.model_router import ModelRouter
+from src.utils import ProgressLogger
 
 class SearchQueryGenerator:
-    def __init__(self, logger: ProgressLogger = None):
-        self.client = openai.OpenAI(api_key=get_env("OPENAI_API_KEY"))
+    def __init__(self, logger: ProgressLogger = None, router: ModelRouter = None):
         self.logger = logger or ProgressLogger()
+        self.router = router or ModelRouter(self.logger)
 
     def generate(self, user_input: str) -> List[str]:
         """
@@ -24,21 +24,20 @@ class SearchQueryGenerator:
         """
         self.logger.info(f"検索ワード生成中: '{user_input}'")
 
-        prompt = SEARCH_QUERY_GENERATOR_PROMPT.format(user_input=user_input)
+        prompt = SEARCH_QUERY_GENERATOR_SUFFIX.format(user_input=user_input)
 
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
+            routed = self.router.complete(
+                "query_generation",
                 messages=[
-                    {"role": "system", "content": "あなたはYouTube検索のエキスパートです。"},
+                    {"role": "system", "content": SEARCH_QUERY_GENERATOR_PREFIX},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
-                max_tokens=500
+                max_tokens=500,
+                validate=lambda r: isinstance(r, dict) and "search_queries" in r
             )
-
-            result_text = response.choices[0].message.content
-            result = extract_json_from_text(result_text)
+            result = routed["result"]
 
             if result and "search_queries" in result:
                 queries = result["search_queries"]
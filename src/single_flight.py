@@ -0,0 +1,78 @@
+"""
+同時実行の重複排除モジュール（single-flight）
+同じキー（ステージ, 動画ID, パラメータ）の処理が実行中なら新たに実行せず、
+実行中の処理の完了を待って結果を共有する
+
+Streamlitの複数セッションやバッチ実行の複数入力が同じ動画に同時に当たったとき、
+コメント取得・スクリーニング・字幕取得・Whisper文字起こしを1回にまとめる。
+完了後の結果は保持しない（再利用は動画レジストリ・実行ジャーナルの役割）。
+"""
+import copy
+import threading
+from typing import Any, Callable, Dict, Hashable
+from src.tracing import get_tracer
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        キーごとに1回だけ実行
+
+        Args:
+            key: (ステージ, 動画ID, パラメータ...) のタプル
+            fn: 実行する処理
+
+        Returns:
+            処理結果（待機した側には変更が波及しないようコピーを返す）。
+            実行した側で例外が起きた場合は待機した側にも同じ例外を送出
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            get_tracer().metrics.inc("single_flight_coalesced_total", stage=str(key[0]))
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        result = None
+        try:
+            result = fn()
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.waiters and call.error is None:
+                    # 実行した側が結果を書き換えても待機した側に波及しないよう控えを渡す
+                    call.result = copy.deepcopy(result)
+            call.done.set()
+
+
+# プロセス共通（Streamlitのセッション・バッチのワーカーはそれぞれ別のインスタンスを持つため）
+_flights = SingleFlight()
+
+
+def single_flight(key: Hashable, fn: Callable[[], Any]) -> Any:
+    """プロセス共通のsingle-flightで実行"""
+    return _flights.do(key, fn)
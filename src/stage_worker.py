@@ -0,0 +1,131 @@
+"""
+ステージワーカーモジュール
+ジョブキューからステージ単位のタスクを取り出して実行し、後続タスクをキューに積む
+
+- 同じキューファイルを共有すれば、複数プロセス・複数ホストで何台でも起動できる
+- 担当ステージを絞れるため、重い文字起こし（Whisper）だけを別のワーカー群でスケールできる
+- 処理中はリースを延長し、ワーカーが落ちればリース期限切れ後に他のワーカーが再実行する
+"""
+import threading
+import uuid
+from typing import Dict, List, Optional
+from src.job_queue import JobQueue, default_worker_id
+from src.orchestrator import YouTubeCommentOrchestrator
+from src.utils import get_env, ProgressLogger
+
+# パイプラインのステージ（この順に後続タスクが積まれる）
+STAGES = ("search", "comments", "screen", "transcribe", "analyze")
+
+
+def new_group_id() -> str:
+    """投入単位のID"""
+    return uuid.uuid4().hex[:12]
+
+
+def enqueue_input(queue: JobQueue, user_input: str, group: Optional[str] = None) -> str:
+    """
+    入力文章をキューに投入（最初のsearchタスクを登録）
+
+    Returns:
+        投入単位のID
+    """
+    group = group or new_group_id()
+    queue.enqueue("search", {"user_input": user_input}, group=group, key=f"{group}:search")
+    return group
+
+
+class StageWorker:
+    def __init__(
+        self,
+        queue: Optional[JobQueue] = None,
+        stages: Optional[List[str]] = None,
+        worker_id: Optional[str] = None,
+        verbose: bool = True
+    ):
+        """
+        Args:
+            queue: ジョブキュー（省略時は JOB_QUEUE_PATH）
+            stages: 担当するステージ（省略時は全ステージ）
+            worker_id: ワーカーID（省略時はホスト名:プロセスID）
+            verbose: 詳細ログを出力するか
+        """
+        self.logger = ProgressLogger(verbose=verbose)
+        self.queue = queue or JobQueue(logger=self.logger)
+        self.stages = list(stages or STAGES)
+        unknown = [s for s in self.stages if s not in STAGES]
+        if unknown:
+            raise ValueError(f"不明なステージ: {', '.join(unknown)}")
+        self.worker_id = worker_id or default_worker_id()
+        self.poll_interval_sec = float(get_env("JOB_POLL_INTERVAL_SEC", "2"))
+
+        self.orchestrator = YouTubeCommentOrchestrator(verbose=verbose)
+        self._stop = threading.Event()
+        self.processed = 0
+        self.failed = 0
+
+    def run(self, exit_when_idle: bool = False, max_jobs: Optional[int] = None):
+        """
+        ジョブを取り出して実行し続ける
+
+        Args:
+            exit_when_idle: 担当ステージの未完了ジョブがなくなったら終了
+            max_jobs: この件数を処理したら終了
+        """
+        self.logger.log(f"👷 ワーカー起動: {self.worker_id}（担当: {', '.join(self.stages)}）")
+        while not self._stop.is_set():
+            if max_jobs is not None and self.processed + self.failed >= max_jobs:
+                break
+            job = self.queue.lease(self.stages, self.worker_id)
+            if job is None:
+                # 他のワーカーが処理中のジョブが後続タスクを積む可能性があるため、未完了がある間は待つ
+                if exit_when_idle and self.queue.pending(self.stages) == 0:
+                    break
+                self._stop.wait(self.poll_interval_sec)
+                continue
+            self.run_job(job)
+
+        self.logger.success(f"ワーカー終了: 完了 {self.processed}件 / 失敗 {self.failed}件")
+
+    def run_job(self, job: Dict) -> bool:
+        """リースしたジョブを1件実行（成功したらTrue）"""
+        label = f"#{job['id']} {job['kind']}"
+        video = job['payload'].get('video')
+        if video:
+            label += f"（{video['title']}）"
+        self.logger.log(f"\n▶️  {label} 試行{job['attempts']}回目")
+
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job['id'], stop_heartbeat), daemon=True)
+        heartbeat.start()
+        try:
+            output, follow_ups = self.orchestrator.run_stage(job['kind'], job['payload'])
+            # 後続タスクはキー付きで登録し、再実行されても重複しないようにする
+            for kind, payload in follow_ups:
+                video_id = payload['video']['video_id']
+                self.queue.enqueue(kind, payload, group=job['group'], key=f"{job['group']}:{kind}:{video_id}")
+        except Exception as e:
+            stop_heartbeat.set()
+            self.failed += 1
+            self.logger.error(f"{label} 失敗: {str(e)}")
+            self.queue.nack(job['id'], self.worker_id, str(e))
+            return False
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+
+        if not self.queue.ack(job['id'], self.worker_id, output):
+            self.logger.warning(f"{label} のリースを失っていたため結果を破棄しました")
+        self.processed += 1
+        self.logger.success(f"{label} 完了（後続 {len(follow_ups)}件）")
+        return True
+
+    def _heartbeat(self, job_id: int, stop: threading.Event):
+        """処理中はリース期間の1/3ごとにリースを延長"""
+        while not stop.wait(self.queue.lease_sec / 3):
+            if not self.queue.heartbeat(job_id, self.worker_id):
+                self.logger.warning(f"ジョブ #{job_id} のリースを失いました")
+                return
+
+    def stop(self):
+        """実行中のジョブが終わったら終了"""
+        self._stop.set()
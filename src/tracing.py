@@ -0,0 +1,324 @@
+"""
+トレーシング・メトリクスモジュール
+ステージ・外部呼び出しごとのスパンをJSONL（OTLP互換のスパン形式）に書き出し、
+Prometheus形式のメトリクスをHTTPで公開する
+
+TRACE_ENABLED=false（デフォルト）のときは全呼び出しが共有のno-opオブジェクトを返すだけで、
+計測・書き出しは一切行わない。
+"""
+import contextvars
+import json
+import os
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.utils import get_env
+
+# スパン所要時間ヒストグラムのバケット（秒）
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+METRIC_PREFIX = "ytca_"
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+def _otlp_value(value: Any) -> Dict:
+    """属性値をOTLPのAnyValue形式に変換"""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict) -> List[Dict]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items() if v is not None]
+
+
+class Span:
+    """1つの処理区間（ステージ・外部呼び出し）"""
+
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"], attributes: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes)
+        self.events: List[Dict] = []
+        self.status = "OK"
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self._start_perf = time.perf_counter()
+        self.duration = 0.0
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, **attributes):
+        self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": attributes})
+
+    def record_error(self, error: BaseException):
+        self.status = "ERROR"
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.tracer._start(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.record_error(exc)
+        _current_span.reset(self._token)
+        self.end_ns = time.time_ns()
+        self.duration = time.perf_counter() - self._start_perf
+        self.tracer._finish(self)
+        return False
+
+    def to_otlp(self) -> Dict:
+        """OTLP/JSONのスパン形式"""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "events": [
+                {"name": e["name"], "timeUnixNano": str(e["time_ns"]), "attributes": _otlp_attributes(e["attributes"])}
+                for e in self.events
+            ],
+            "status": {"code": "STATUS_CODE_ERROR" if self.status == "ERROR" else "STATUS_CODE_OK"}
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+class _NoopSpan:
+    """トレース無効時のスパン（全メソッドが何もしない）"""
+
+    name = ""
+    duration = 0.0
+    attributes: Dict = {}
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+    def add_event(self, name: str, **attributes):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Metrics:
+    """Prometheus形式のカウンター・ヒストグラム（無効時は記録しない）"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+        self._histograms: Dict[Tuple[str, Tuple], Dict] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.setdefault(key, {"buckets": [0] * len(DURATION_BUCKETS), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    hist["buckets"][i] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+
+    def render(self) -> str:
+        """Prometheusのテキスト形式に変換"""
+        def fmt_labels(labels: Tuple, extra: Tuple = ()) -> str:
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+        lines = []
+        with self._lock:
+            for name in sorted({n for n, _ in self._counters}):
+                lines.append(f"# TYPE {METRIC_PREFIX}{name} counter")
+                for (n, labels), value in self._counters.items():
+                    if n == name:
+                        lines.append(f"{METRIC_PREFIX}{name}{fmt_labels(labels)} {value}")
+            for name in sorted({n for n, _ in self._histograms}):
+                lines.append(f"# TYPE {METRIC_PREFIX}{name} histogram")
+                for (n, labels), hist in self._histograms.items():
+                    if n != name:
+                        continue
+                    for bound, count in zip(DURATION_BUCKETS, hist["buckets"]):
+                        lines.append(f"{METRIC_PREFIX}{name}_bucket{fmt_labels(labels, (('le', bound),))} {count}")
+                    lines.append(f"{METRIC_PREFIX}{name}_bucket{fmt_labels(labels, (('le', '+Inf'),))} {hist['count']}")
+                    lines.append(f"{METRIC_PREFIX}{name}_sum{fmt_labels(labels)} {hist['sum']}")
+                    lines.append(f"{METRIC_PREFIX}{name}_count{fmt_labels(labels)} {hist['count']}")
+        return "\n".join(lines) + "\n"
+
+
+class Tracer:
+    """スパンの生成・書き出しとメトリクス集計"""
+
+    def __init__(self, enabled: bool = False, trace_file: str = "outputs/traces.jsonl", metrics_port: int = 0):
+        self.enabled = enabled
+        self.trace_file = trace_file
+        self.metrics = Metrics(enabled)
+        self._lock = threading.Lock()
+        self._file = None
+        self._listeners: List[Callable[[Span], None]] = []
+        self._start_listeners: List[Callable[[Span], None]] = []
+        self._server = None
+        if enabled and metrics_port:
+            self.start_metrics_server(metrics_port)
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        """環境変数から生成"""
+        return cls(
+            enabled=get_env("TRACE_ENABLED", "false").lower() == "true",
+            trace_file=get_env("TRACE_FILE", "outputs/traces.jsonl"),
+            metrics_port=int(get_env("METRICS_PORT", "0"))
+        )
+
+    def span(self, name: str, **attributes):
+        """
+        スパンを開始（with文で使う）
+
+        Args:
+            name: スパン名（例: "stage.screening", "openai.chat.completions"）
+            **attributes: video_id・model等の属性
+
+        Returns:
+            Span（無効時は共有のno-opスパン）
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, _current_span.get(), attributes)
+
+    def add_listener(
+        self,
+        listener: Callable[[Span], None],
+        on_start: Optional[Callable[[Span], None]] = None
+    ):
+        """スパン終了時（on_start指定時は開始時も）に呼ばれる関数を登録"""
+        self._listeners.append(listener)
+        if on_start:
+            self._start_listeners.append(on_start)
+
+    def _start(self, span: Span):
+        for listener in self._start_listeners:
+            listener(span)
+
+    def _finish(self, span: Span):
+        """スパン終了: メトリクス更新 + JSONL書き出し"""
+        self.metrics.observe("span_duration_seconds", span.duration, span=span.name)
+        if span.status == "ERROR":
+            self.metrics.inc("span_errors_total", span=span.name)
+        for listener in self._listeners:
+            listener(span)
+
+        line = json.dumps(span.to_otlp(), ensure_ascii=False, default=str)
+        with self._lock:
+            if self._file is None:
+                directory = os.path.dirname(self.trace_file)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open(self.trace_file, 'a', encoding='utf-8')
+            self._file.write(line + "\n")
+            if span.parent_id is None:
+                self._file.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._file:
+                self._file.flush()
+
+    def start_metrics_server(self, port: int):
+        """/metrics をPrometheus形式で返すHTTPサーバーをバックグラウンドで起動"""
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+
+def current_span():
+    """実行中のスパン（なければno-opスパン）"""
+    return _current_span.get() or NOOP_SPAN
+
+
+# ========================================
+# プロセス共通のトレーサー
+# ========================================
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """プロセス共通のトレーサー（環境変数から初回のみ生成）"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer.from_env()
+    return _tracer
+
+
+def set_tracer(tracer: Optional[Tracer]):
+    """プロセス共通のトレーサーを差し替え（Noneで環境変数から再生成）"""
+    global _tracer
+    with _tracer_lock:
+        _tracer = tracer
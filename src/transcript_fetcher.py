@@ -1,13 +1,30 @@
 """
 YouTube文字起こし取得モジュール
 """
-from youtube_transcript_api import YouTubeTranscriptApi
+from youtube_transcript_api import (
+    CouldNotRetrieveTranscript,
+    TooManyRequests,
+    YouTubeRequestFailed,
+    YouTubeTranscriptApi,
+)
 from typing import List, Dict, Optional
+from src.cassette import get_cassette
+from src.circuit_breaker import get_breaker, is_outage
+from src.single_flight import single_flight
 from src.utils import format_timestamp, ProgressLogger
 
+def _is_transcript_outage(error: Exception) -> bool:
+    """字幕APIの障害か（字幕なし・字幕無効・動画非公開は動画側の事情なので数えない）"""
+    if isinstance(error, (TooManyRequests, YouTubeRequestFailed)):
+        return True
+    return not isinstance(error, CouldNotRetrieveTranscript) and is_outage(error)
+
+
 class TranscriptFetcher:
     def __init__(self, logger: ProgressLogger = None):
         self.logger = logger or ProgressLogger()
+        self.cassette = get_cassette()
+        self.breaker = get_breaker("youtube.transcript", is_failure=_is_transcript_outage)
 
     def fetch_transcript(
         self,
@@ -29,30 +46,27 @@ class TranscriptFetcher:
                 "timestamp": "分:秒"
             }]
         """
+        # 同じ動画の字幕を同時に取得しようとした場合は1回にまとめる
+        return single_flight(
+            ("captions", video_id, tuple(languages)),
+            lambda: self._fetch_transcript(video_id, languages)
+        )
+
+    def _fetch_transcript(self, video_id: str, languages: List[str]) -> Optional[List[Dict]]:
+        """字幕を取得してタイムスタンプを付与"""
         self.logger.info(f"文字起こし取得中: {video_id}")
 
         try:
-            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-
-            # 優先言語で取得を試みる
-            transcript = None
-            for lang in languages:
-                try:
-                    transcript = transcript_list.find_transcript([lang])
-                    break
-                except:
-                    continue
-
-            if not transcript:
-                # 自動生成字幕を含めて最初に見つかったものを使用
-                transcript = transcript_list.find_generated_transcript(languages)
-
-            if not transcript:
+            transcript_data = self.breaker.call(lambda: self.cassette.call(
+                "youtube_transcript_api.fetch",
+                {"video_id": video_id, "languages": languages},
+                lambda: self._fetch_raw_transcript(video_id, languages)
+            ))
+
+            if not transcript_data:
                 self.logger.warning(f"字幕が見つかりませんでした: {video_id}")
                 return None
 
-            transcript_data = transcript.fetch()
-
             # タイムスタンプを追加
             formatted_transcript = []
             for item in transcript_data:
@@ -70,6 +84,35 @@ class TranscriptFetcher:
             self.logger.error(f"文字起こし取得エラー: {str(e)}")
             return None
 
+    def _fetch_raw_transcript(
+        self,
+        video_id: str,
+        languages: List[str]
+    ) -> Optional[List[Dict]]:
+        """youtube-transcript-apiから字幕データ（text/start/duration）を取得"""
+        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
+
+        # 優先言語で取得を試みる
+        transcript = None
+        for lang in languages:
+            try:
+                transcript = transcript_list.find_transcript([lang])
+                break
+            except:
+                continue
+
+        if not transcript:
+            # 自動生成字幕を含めて最初に見つかったものを使用
+            transcript = transcript_list.find_generated_transcript(languages)
+
+        if not transcript:
+            return None
+
+        return [
+            {"text": item['text'], "start": item['start'], "duration": item['duration']}
+            for item in transcript.fetch()
+        ]
+
     def get_transcript_text(
         self,
         video_id: str,
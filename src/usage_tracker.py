@@ -0,0 +1,258 @@
+"""
+使用量・コスト集計モジュール
+LLMトークン・Whisper音声秒数・YouTubeクォータを実行／動画／ステージ単位で集計し、
+実行ごとの予算上限（コスト・トークン）を超えたら中断または格下げする
+"""
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+from config.model_routing import MODEL_PRICING, WHISPER_PRICE_PER_MINUTE, YOUTUBE_QUOTA_COST
+from src.utils import get_env, ProgressLogger
+
+# 動画に紐付かない使用量（検索ワード生成・動画検索・バッチ判定など）の集計キー
+RUN_SCOPE = "_run"
+
+BUDGET_ACTIONS = ("abort", "downgrade")
+
+_current_tracker: contextvars.ContextVar = contextvars.ContextVar("usage_tracker", default=None)
+_current_video: contextvars.ContextVar = contextvars.ContextVar("usage_video", default=RUN_SCOPE)
+
+
+class BudgetExceededError(Exception):
+    """実行ごとの予算上限を超えた（BUDGET_ACTION=abort時）"""
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    """トークン数から推定コスト（USD）を計算"""
+    pricing = MODEL_PRICING.get(model)
+    if not pricing:
+        return 0.0
+    uncached = max(prompt_tokens - cached_tokens, 0)
+    return (
+        uncached * pricing["input"]
+        + cached_tokens * pricing["cached_input"]
+        + completion_tokens * pricing["output"]
+    ) / 1_000_000
+
+
+def _empty_usage() -> Dict:
+    return {
+        "llm_calls": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cached_tokens": 0,
+        "audio_seconds": 0.0,
+        "quota_units": 0,
+        "cost_usd": 0.0,
+    }
+
+
+def _add(target: Dict, usage: Dict):
+    for key, value in usage.items():
+        target[key] += value
+
+
+class UsageTracker:
+    """1回の実行分の使用量を集計"""
+
+    def __init__(
+        self,
+        logger: ProgressLogger = None,
+        max_cost_usd: float = 0.0,
+        max_tokens: int = 0,
+        budget_action: str = "abort"
+    ):
+        if budget_action not in BUDGET_ACTIONS:
+            raise ValueError(f"不正なBUDGET_ACTIONです: {budget_action}")
+        self.logger = logger or ProgressLogger()
+        # 0は無制限
+        self.max_cost_usd = max_cost_usd
+        self.max_tokens = max_tokens
+        self.budget_action = budget_action
+
+        self._lock = threading.Lock()
+        # {動画ID: {ステージ: 使用量}}
+        self._usage: Dict[str, Dict[str, Dict]] = {}
+        self._totals = _empty_usage()
+        self._exceeded_reason: Optional[str] = None
+
+    @classmethod
+    def from_env(
+        cls,
+        logger: ProgressLogger = None,
+        max_cost_usd: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> "UsageTracker":
+        """環境変数から生成（引数で指定した上限は環境変数より優先）"""
+        return cls(
+            logger=logger,
+            max_cost_usd=max_cost_usd if max_cost_usd is not None else float(get_env("MAX_RUN_COST_USD", "0")),
+            max_tokens=max_tokens if max_tokens is not None else int(get_env("MAX_RUN_TOKENS", "0")),
+            budget_action=get_env("BUDGET_ACTION", "abort").lower()
+        )
+
+    # ========================================
+    # 実行・動画のスコープ
+    # ========================================
+    @contextmanager
+    def activate(self):
+        """このトラッカーを現在の実行の集計先にする"""
+        token = _current_tracker.set(self)
+        try:
+            yield self
+        finally:
+            _current_tracker.reset(token)
+
+    @contextmanager
+    def video(self, video_id: str):
+        """ブロック内の使用量をこの動画に帰属させる"""
+        token = _current_video.set(video_id)
+        try:
+            yield
+        finally:
+            _current_video.reset(token)
+
+    # ========================================
+    # 記録
+    # ========================================
+    def record_llm(
+        self,
+        stage: str,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int = 0
+    ) -> float:
+        """LLM呼び出し1回分を記録し、推定コストを返す"""
+        cost = estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens)
+        self._record(stage, {
+            "llm_calls": 1,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": cached_tokens,
+            "cost_usd": cost,
+        })
+        return cost
+
+    def record_audio(self, seconds: float, stage: str = "whisper"):
+        """Whisperで文字起こしした音声秒数を記録"""
+        self._record(stage, {"audio_seconds": seconds, "cost_usd": seconds / 60 * WHISPER_PRICE_PER_MINUTE})
+
+    def record_quota(self, method: str, stage: str, calls: int = 1):
+        """YouTube Data APIの呼び出しを記録（method例: "search.list"）"""
+        self._record(stage, {"quota_units": YOUTUBE_QUOTA_COST.get(method, 1) * calls})
+
+    def _record(self, stage: str, usage: Dict):
+        video_id = _current_video.get()
+        with self._lock:
+            stages = self._usage.setdefault(video_id, {})
+            _add(stages.setdefault(stage, _empty_usage()), usage)
+            _add(self._totals, usage)
+            newly_exceeded = self._exceeded_reason is None and self._check_limits()
+
+        if newly_exceeded:
+            action = "以降の処理を中断します" if self.budget_action == "abort" else "以降は安価な処理に格下げします"
+            self.logger.warning(f"予算上限を超えました（{self._exceeded_reason}）。{action}")
+
+    def _check_limits(self) -> bool:
+        """上限を判定し、超過理由を保持（ロック内で呼ぶこと）"""
+        tokens = self._totals["prompt_tokens"] + self._totals["completion_tokens"]
+        if self.max_cost_usd and self._totals["cost_usd"] > self.max_cost_usd:
+            self._exceeded_reason = f"コスト ${self._totals['cost_usd']:.4f} > ${self.max_cost_usd}"
+        elif self.max_tokens and tokens > self.max_tokens:
+            self._exceeded_reason = f"トークン {tokens} > {self.max_tokens}"
+        return self._exceeded_reason is not None
+
+    # ========================================
+    # 予算
+    # ========================================
+    @property
+    def exceeded(self) -> bool:
+        return self._exceeded_reason is not None
+
+    @property
+    def aborted(self) -> bool:
+        """予算超過で以降の処理を止めるべきか"""
+        return self.exceeded and self.budget_action == "abort"
+
+    @property
+    def downgraded(self) -> bool:
+        """予算超過で以降の処理を安価なものに切り替えるべきか"""
+        return self.exceeded and self.budget_action == "downgrade"
+
+    def check_budget(self, stage: str):
+        """abort設定で予算を超過していれば例外を送出（外部呼び出しの直前に呼ぶ）"""
+        if self.aborted:
+            raise BudgetExceededError(f"{stage}: 予算上限を超えています（{self._exceeded_reason}）")
+
+    # ========================================
+    # 集計結果
+    # ========================================
+    def video_usage(self, video_id: str) -> Dict:
+        """動画1本分の使用量（ステージ別 + 合計）"""
+        with self._lock:
+            stages = {stage: dict(usage) for stage, usage in self._usage.get(video_id, {}).items()}
+        total = _empty_usage()
+        for usage in stages.values():
+            _add(total, usage)
+        return {"total": total, "stages": stages}
+
+    def report(self) -> Dict:
+        """
+        実行全体の使用量レポート
+
+        Returns:
+            {
+                "total": 合計,
+                "stages": ステージ別合計,
+                "videos": {動画ID: {"total", "stages"}},
+                "budget": 予算設定と超過状況
+            }
+        """
+        with self._lock:
+            video_ids = list(self._usage)
+            stages: Dict[str, Dict] = {}
+            for per_video in self._usage.values():
+                for stage, usage in per_video.items():
+                    _add(stages.setdefault(stage, _empty_usage()), usage)
+            total = dict(self._totals)
+
+        return {
+            "total": total,
+            "stages": stages,
+            "videos": {video_id: self.video_usage(video_id) for video_id in video_ids},
+            "budget": {
+                "max_cost_usd": self.max_cost_usd or None,
+                "max_tokens": self.max_tokens or None,
+                "action": self.budget_action,
+                "exceeded": self._exceeded_reason
+            }
+        }
+
+    def log_summary(self):
+        """合計をログ出力"""
+        t = self._totals
+        self.logger.info(
+            f"トークン {t['prompt_tokens']}+{t['completion_tokens']}（キャッシュ{t['cached_tokens']}）/ "
+            f"音声{t['audio_seconds'] / 60:.1f}分 / クォータ{t['quota_units']} / 推定${t['cost_usd']:.4f}"
+        )
+
+
+def current_tracker() -> Optional[UsageTracker]:
+    """実行中のトラッカー（実行外ではNone）"""
+    return _current_tracker.get()
+
+
+def record_quota(method: str, stage: str, calls: int = 1):
+    """実行中のトラッカーがあればYouTubeクォータを記録"""
+    tracker = _current_tracker.get()
+    if tracker:
+        tracker.record_quota(method, stage, calls)
+
+
+def record_audio(seconds: float, stage: str = "whisper"):
+    """実行中のトラッカーがあれば音声秒数を記録"""
+    tracker = _current_tracker.get()
+    if tracker:
+        tracker.record_audio(seconds, stage)
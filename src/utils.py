@@ -2,10 +2,11 @@
 ユーティリティ関数
 """
 import os
+import sys
 import json
 import re
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable
 from dotenv import load_dotenv
 
 # 環境変数読み込み
@@ -109,6 +110,39 @@ def truncate_text(text: str, max_length: int = 100) -> str:
         return text
     return text[:max_length] + "..."
 
+def estimate_tokens(text: str) -> int:
+    """トークン数の概算（日本語は1文字≒1トークン、ASCIIは4文字≒1トークン）"""
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return (len(text) - ascii_chars) + ascii_chars // 4 + 1
+
+def pack_batches(
+    items: List[Any],
+    size_fn: Callable[[Any], int],
+    token_budget: int,
+    max_items: int
+) -> List[List[Any]]:
+    """
+    トークン予算内に収まるようにアイテムをバッチに詰める（順序は維持）
+
+    予算を単独で超えるアイテムは1件だけのバッチになる
+    """
+    batches = []
+    current = []
+    current_size = 0
+
+    for item in items:
+        size = size_fn(item)
+        if current and (current_size + size > token_budget or len(current) >= max_items):
+            batches.append(current)
+            current = []
+            current_size = 0
+        current.append(item)
+        current_size += size
+
+    if current:
+        batches.append(current)
+    return batches
+
 def clean_text(text: str) -> str:
     """テキストのクリーニング"""
     # 改行を統一
@@ -121,14 +155,19 @@ def clean_text(text: str) -> str:
 
 class ProgressLogger:
     """進捗ログ出力"""
-    def __init__(self, verbose: bool = True):
+    def __init__(self, verbose: bool = True, stream=None):
         self.verbose = verbose
+        # 出力先（Noneは標準出力。標準出力に結果をストリーミングする場合は標準エラーを指定）
+        self.stream = stream
 
     def log(self, message: str, level: str = "INFO"):
-        """ログ出力"""
+        """ログ出力（トレース有効時は実行中のスパンにもイベントとして記録）"""
+        from src.tracing import current_span
+        current_span().add_event("log", level=level, message=message)
+
         if self.verbose:
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            print(f"[{timestamp}] [{level}] {message}")
+            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+            print(f"[{timestamp}] [{level}] {message}", file=self.stream or sys.stdout)
 
     def success(self, message: str):
         """成功ログ"""
@@ -0,0 +1,196 @@
+"""
+動画レジストリモジュール
+処理済み動画のスクリーニング結果・ネタパックをSQLiteに保存し、実行をまたいで再利用する
+
+- 不合格（コメントなし含む）の動画は一定期間スキップ（ネガティブキャッシュ）
+- 合格してネタパックまで作った動画は鮮度期間内なら結果をそのまま再利用
+- コメント数が大きく増えた動画だけ再スクリーニング
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+from src.utils import get_env, ProgressLogger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    title TEXT,
+    channel_title TEXT,
+    verdict TEXT NOT NULL,              -- passed / failed / no_comments
+    screening_score REAL,
+    screening_result TEXT,              -- JSON
+    comment_count INTEGER,              -- 判定時のコメント総数（statistics.commentCount、取得できなければ取得件数）
+    comment_fingerprint TEXT,
+    screened_at REAL NOT NULL,
+    result TEXT,                        -- 最終結果（ネタパック）のJSON
+    result_passed INTEGER,
+    analyzed_at REAL
+);
+"""
+
+# classify() の判定
+PROCESS = "process"                  # 通常どおり処理
+SKIP = "skip"                        # 既知の不合格動画
+REUSE_SCREENING = "reuse_screening"  # スクリーニング合格済み（分析から再開）
+REUSE_RESULT = "reuse_result"        # ネタパックを再利用
+
+
+def comment_fingerprint(comments: List[str]) -> str:
+    """コメント本文の集合から指紋を計算（順序に依存しない）"""
+    digest = hashlib.sha1()
+    for text in sorted(comments):
+        digest.update(text.encode('utf-8'))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class VideoRegistry:
+    def __init__(self, path: Optional[str] = None, logger: ProgressLogger = None):
+        self.logger = logger or ProgressLogger()
+        self.enabled = get_env("REGISTRY_ENABLED", "true").lower() == "true"
+        self.path = path or get_env("REGISTRY_PATH", "outputs/video_registry.sqlite3")
+        # 合格・ネタパックを再利用する期間
+        self.freshness_sec = float(get_env("REGISTRY_FRESHNESS_HOURS", "168")) * 3600
+        # 不合格動画をスキップする期間
+        self.negative_ttl_sec = float(get_env("REGISTRY_NEGATIVE_TTL_HOURS", "72")) * 3600
+        # コメント数がこの割合以上増えたら再スクリーニング（0.5 = 50%増）
+        self.rescreen_growth = float(get_env("REGISTRY_RESCREEN_GROWTH", "0.5"))
+
+        self._lock = threading.Lock()
+        self._conn = None
+        if self.enabled:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def lookup(self, video_ids: List[str]) -> Dict[str, Dict]:
+        """
+        登録済みの動画を取得
+
+        Returns:
+            {video_id: レコード（screening_result・resultはパース済み）}
+        """
+        if not self.enabled or not video_ids:
+            return {}
+        placeholders = ",".join("?" * len(video_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM videos WHERE video_id IN ({placeholders})", list(video_ids)
+            ).fetchall()
+
+        entries = {}
+        for row in rows:
+            entry = dict(row)
+            entry["screening_result"] = json.loads(entry["screening_result"]) if entry["screening_result"] else None
+            entry["result"] = json.loads(entry["result"]) if entry["result"] else None
+            entries[entry["video_id"]] = entry
+        return entries
+
+    def classify(self, entry: Optional[Dict], current_comment_count: Optional[int] = None) -> str:
+        """
+        登録内容と現在のコメント数から処理方針を決定
+
+        Args:
+            entry: lookup()のレコード（未登録ならNone）
+            current_comment_count: 現在のコメント総数（不明ならNone）
+
+        Returns:
+            PROCESS / SKIP / REUSE_SCREENING / REUSE_RESULT
+        """
+        if not entry:
+            return PROCESS
+
+        if self._comments_grew(entry.get("comment_count"), current_comment_count):
+            return PROCESS
+
+        now = time.time()
+        if entry["verdict"] != "passed":
+            return SKIP if now - entry["screened_at"] < self.negative_ttl_sec else PROCESS
+
+        if now - entry["screened_at"] >= self.freshness_sec:
+            return PROCESS
+        if entry["result"] and entry["result_passed"]:
+            return REUSE_RESULT
+        return REUSE_SCREENING
+
+    def _comments_grew(self, previous: Optional[int], current: Optional[int]) -> bool:
+        if previous is None or current is None:
+            return False
+        return current >= max(previous, 1) * (1 + self.rescreen_growth)
+
+    def record_screening(
+        self,
+        video_info: Dict,
+        verdict: str,
+        screening_result: Optional[Dict] = None,
+        comment_count: Optional[int] = None,
+        fingerprint: Optional[str] = None
+    ):
+        """スクリーニング結果を登録（以前のネタパックは破棄）"""
+        if not self.enabled:
+            return
+        score = screening_result.get("score") if screening_result else None
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    """
+                    INSERT OR REPLACE INTO videos (
+                        video_id, title, channel_title, verdict, screening_score, screening_result,
+                        comment_count, comment_fingerprint, screened_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        video_info["video_id"], video_info.get("title"), video_info.get("channel_title"),
+                        verdict, score,
+                        json.dumps(screening_result, ensure_ascii=False) if screening_result else None,
+                        comment_count, fingerprint, time.time()
+                    )
+                )
+        except Exception as e:
+            self.logger.error(f"レジストリ登録エラー: {str(e)}")
+
+    def record_result(self, result: Dict):
+        """最終結果（ネタパック）を登録"""
+        if not self.enabled:
+            return
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "UPDATE videos SET result = ?, result_passed = ?, analyzed_at = ? WHERE video_id = ?",
+                    (
+                        json.dumps(result, ensure_ascii=False),
+                        1 if result["evaluation"].get("passed") else 0,
+                        time.time(),
+                        result["video_info"]["video_id"]
+                    )
+                )
+        except Exception as e:
+            self.logger.error(f"レジストリ登録エラー: {str(e)}")
+
+    def ping(self) -> bool:
+        """接続が使えるか（無効時はTrue）"""
+        if not self.enabled:
+            return True
+        try:
+            with self._lock:
+                self._conn.execute("SELECT 1").fetchone()
+            return True
+        except Exception as e:
+            self.logger.error(f"レジストリの接続エラー: {str(e)}")
+            return False
+
+    def close(self):
+        """接続を閉じる（以降は無効として扱う）"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self.enabled = False
@@ -2,17 +2,31 @@
 Whisper文字起こしモジュール
 OpenAI Whisper APIを使って動画から文字起こしを生成
 """
-import openai
 import os
 import tempfile
 import subprocess
-from typing import Optional
-from src.utils import get_env, ProgressLogger
+from typing import Dict, List, Optional
+from src.cassette import build_openai_client, file_digest, get_cassette
+from src.circuit_breaker import get_breaker
+from src.rate_limiter import get_rate_limiter
+from src.single_flight import single_flight
+from src.usage_tracker import record_audio
+from src.utils import ProgressLogger
+
+# yt-dlpが出力しうる音声ファイルの拡張子
+AUDIO_EXTENSIONS = ['.mp3', '.m4a', '.opus', '.webm']
 
 
 class WhisperTranscriber:
-    def __init__(self, logger: ProgressLogger = None):
-        self.client = openai.OpenAI(api_key=get_env("OPENAI_API_KEY"))
+    def __init__(self, logger: ProgressLogger = None, client=None):
+        """
+        Args:
+            client: OpenAIクライアント（省略時は生成）
+        """
+        self.client = client or build_openai_client()
+        self.cassette = get_cassette()
+        self.limiter = get_rate_limiter()
+        self.breaker = get_breaker("whisper")
         self.logger = logger or ProgressLogger()
 
     def transcribe_video(self, video_id: str) -> Optional[str]:
@@ -25,6 +39,11 @@ class WhisperTranscriber:
         Returns:
             文字起こしテキスト（タイムスタンプ付き）
         """
+        # 数分かかるため、同じ動画の文字起こしが実行中ならその完了を待って結果を共有する
+        return single_flight(("whisper", video_id), lambda: self._transcribe_video(video_id))
+
+    def _transcribe_video(self, video_id: str) -> Optional[str]:
+        """音声抽出 → Whisper API → 一時ファイル削除"""
         self.logger.info(f"Whisper文字起こし開始: {video_id}")
 
         audio_file = None
@@ -84,17 +103,18 @@ class WhisperTranscriber:
             ]
 
             self.logger.info(f"音声ダウンロード中: {video_id}")
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5分タイムアウト
+            base_path = output_path.replace('.mp3', '')
+            # 一時ファイル名は毎回変わるのでキーから除外して記録・再生
+            result = self.cassette.call(
+                "subprocess.yt-dlp",
+                {"cmd": [arg for arg in cmd if arg != base_path]},
+                lambda: self._run_yt_dlp(cmd, base_path),
+                on_replay=lambda recorded: self._materialize_audio(base_path, recorded)
             )
 
-            if result.returncode == 0:
+            if result['returncode'] == 0:
                 # yt-dlpは拡張子を自動で付けるので、実際のファイル名を探す
-                base_path = output_path.replace('.mp3', '')
-                for ext in ['.mp3', '.m4a', '.opus', '.webm']:
+                for ext in AUDIO_EXTENSIONS:
                     test_path = base_path + ext
                     if os.path.exists(test_path):
                         self.logger.success(f"音声ダウンロード完了: {test_path}")
@@ -107,7 +127,7 @@ class WhisperTranscriber:
                 self.logger.error("音声ファイルが見つかりません")
                 return None
             else:
-                self.logger.error(f"yt-dlpエラー: {result.stderr}")
+                self.logger.error(f"yt-dlpエラー: {result['stderr']}")
                 return None
 
         except subprocess.TimeoutExpired:
@@ -117,6 +137,44 @@ class WhisperTranscriber:
             self.logger.error(f"音声ダウンロードエラー: {str(e)}")
             return None
 
+    def _run_yt_dlp(self, cmd: List[str], base_path: str) -> Dict:
+        """
+        yt-dlpを実行し、結果と出力ファイルのサイズを返す
+
+        Returns:
+            {"returncode": 終了コード, "stderr": 標準エラー, "files": {拡張子: バイト数},
+             "digests": {拡張子: 内容のSHA-256}}
+        """
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            timeout=300  # 5分タイムアウト
+        )
+        files = {
+            ext: os.path.getsize(base_path + ext)
+            for ext in AUDIO_EXTENSIONS
+            if os.path.exists(base_path + ext)
+        }
+        digests = {}
+        for ext in files:
+            with open(base_path + ext, 'rb') as f:
+                digests[ext] = file_digest(f)
+        return {"returncode": result.returncode, "stderr": result.stderr, "files": files, "digests": digests}
+
+    def _materialize_audio(self, base_path: str, recorded: Dict):
+        """
+        再生時: 記録と同じサイズのダミー音声ファイルを作成（中身は読まれない）
+
+        Whisperの記録はファイル内容のハッシュがキーなので、ダミーファイルには記録時のハッシュを対応付ける
+        """
+        digests = recorded.get('digests', {})
+        for ext, size in recorded.get('files', {}).items():
+            with open(base_path + ext, 'wb') as f:
+                f.truncate(size)
+            if ext in digests:
+                self.cassette.register_digest(base_path + ext, digests[ext])
+
     def _transcribe_with_whisper(self, audio_file: str) -> Optional[str]:
         """
         Whisper APIで文字起こし
@@ -136,13 +194,21 @@ class WhisperTranscriber:
 
             self.logger.info("Whisper API呼び出し中...")
 
-            with open(audio_file, 'rb') as f:
-                response = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=f,
-                    response_format="verbose_json",  # タイムスタンプ付き
-                    language="ja"  # 日本語指定
-                )
+            def transcribe():
+                # 429で再試行する場合もファイルを先頭から送り直す
+                with open(audio_file, 'rb') as f:
+                    return self.client.audio.transcriptions.create(
+                        model="whisper-1",
+                        file=f,
+                        response_format="verbose_json",  # タイムスタンプ付き
+                        language="ja"  # 日本語指定
+                    )
+
+            response = self.breaker.call(lambda: self.limiter.call_openai("whisper-1", 0, transcribe))
+
+            segments = getattr(response, 'segments', None) or []
+            duration = getattr(response, 'duration', None) or (segments[-1]['end'] if segments else 0)
+            record_audio(float(duration))
 
             # タイムスタンプ付きテキストを生成
             if hasattr(response, 'segments') and response.segments:
@@ -2,14 +2,20 @@
 YouTube動画検索モジュール
 Creative Commons動画のみを対象
 """
-from googleapiclient.discovery import build
 from typing import List, Dict, Optional
-from src.utils import get_env, ProgressLogger
+from src.cassette import build_youtube_client
+from src.circuit_breaker import get_breaker
+from src.rate_limiter import get_rate_limiter
+from src.utils import ProgressLogger
 
 class YouTubeSearcher:
-    def __init__(self, logger: ProgressLogger = None):
-        self.api_key = get_env("YOUTUBE_API_KEY")
-        self.youtube = build('youtube', 'v3', developerKey=self.api_key)
+    def __init__(self, logger: ProgressLogger = None, youtube=None):
+        """
+        Args:
+            youtube: YouTube Data APIクライアント（省略時は生成。スレッド間で共有しないこと）
+        """
+        self.youtube = youtube or build_youtube_client()
+        self.limiter = get_rate_limiter()
         self.logger = logger or ProgressLogger()
 
     def search_videos(
@@ -42,7 +48,9 @@ class YouTubeSearcher:
                 relevanceLanguage="ja"
             )
 
-            response = request.execute()
+            response = get_breaker("youtube.search").call(
+                lambda: self.limiter.execute_youtube(request, "search.list", "search")
+            )
 
             videos = []
             for item in response.get('items', []):
@@ -96,6 +104,37 @@ class YouTubeSearcher:
         self.logger.success(f"合計{len(all_videos)}件のユニーク動画を取得")
         return all_videos
 
+    def get_comment_counts(self, video_ids: List[str]) -> Dict[str, int]:
+        """
+        動画のコメント総数を取得（videos.list、50件ごとに1ユニット）
+
+        Args:
+            video_ids: YouTube動画IDのリスト
+
+        Returns:
+            {video_id: コメント総数}（取得できなかった動画は含まない）
+        """
+        counts = {}
+        try:
+            for i in range(0, len(video_ids), 50):
+                chunk = video_ids[i:i + 50]
+                request = self.youtube.videos().list(
+                    part="statistics",
+                    id=",".join(chunk),
+                    maxResults=len(chunk)
+                )
+                response = get_breaker("youtube.videos").call(
+                    lambda: self.limiter.execute_youtube(request, "videos.list", "search")
+                )
+
+                for item in response.get('items', []):
+                    count = item.get('statistics', {}).get('commentCount')
+                    if count is not None:
+                        counts[item['id']] = int(count)
+        except Exception as e:
+            self.logger.error(f"動画統計取得エラー: {str(e)}")
+        return counts
+
 
 if __name__ == "__main__":
     # テスト実行
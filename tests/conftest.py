@@ -0,0 +1,8 @@
+"""
+テスト共通設定
+リポジトリ直下から `python -m pytest` で実行する（src/ をパッケージとして読み込むため）
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
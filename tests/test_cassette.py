@@ -0,0 +1,61 @@
+"""カセット: 音声の文字起こしはファイル内容のハッシュをキーに記録・再生する"""
+import pytest
+from src.cassette import Cassette, CassetteMissError, CassetteOpenAI
+
+
+class FakeTranscriptions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, file, **kwargs):
+        self.calls += 1
+        return {"text": file.read().decode()}
+
+
+class FakeOpenAI:
+    def __init__(self):
+        self.audio = type("Audio", (), {"transcriptions": FakeTranscriptions()})()
+
+
+def transcribe(client, path):
+    with open(path, 'rb') as f:
+        return client.audio.transcriptions.create(file=f, model="whisper-1")
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    """1件記録したカセットのディレクトリと、記録した音声の内容"""
+    directory = str(tmp_path / "cassettes")
+    audio = tmp_path / "record.mp3"
+    audio.write_bytes(b"first")
+    live = FakeOpenAI()
+    response = transcribe(CassetteOpenAI(live, Cassette("record", directory, latency_ms=0)), audio)
+    assert response.text == "first"
+    return directory, audio
+
+
+def test_replay_matches_on_content_not_name(tmp_path, recorded):
+    directory, _ = recorded
+    other = tmp_path / "other_name.mp3"
+    other.write_bytes(b"first")
+    client = CassetteOpenAI(None, Cassette("replay", directory, latency_ms=0))
+    assert transcribe(client, other).text == "first"
+
+
+def test_same_size_different_content_is_a_miss(tmp_path, recorded):
+    directory, _ = recorded
+    other = tmp_path / "same_size.mp3"
+    other.write_bytes(b"other")
+    client = CassetteOpenAI(None, Cassette("replay", directory, latency_ms=0))
+    with pytest.raises(CassetteMissError):
+        transcribe(client, other)
+
+
+def test_dummy_file_replays_with_registered_digest(tmp_path, recorded):
+    directory, audio = recorded
+    cassette = Cassette("replay", directory, latency_ms=0)
+    dummy = tmp_path / "dummy.mp3"
+    dummy.write_bytes(b"\0" * 5)
+    with open(audio, 'rb') as f:
+        cassette.register_digest(str(dummy), cassette.file_digest(f))
+    assert transcribe(CassetteOpenAI(None, cassette), dummy).text == "first"
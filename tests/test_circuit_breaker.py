@@ -0,0 +1,97 @@
+"""サーキットブレーカー: 障害として数える失敗の判定と状態遷移"""
+import json
+import pytest
+from src.cassette import CassetteMissError, CassetteReplayError
+from src.circuit_breaker import CLOSED, OPEN, CircuitBreaker, CircuitOpenError, get_breaker, is_outage
+from src.rate_limiter import RateLimitTimeoutError
+
+
+def http_error(status, content=b""):
+    error = Exception(f"HTTP {status}")
+    error.status_code = status
+    error.content = content
+    return error
+
+
+# openai / httplib2 の例外の代わり（名前で判定するため同名のクラスで足りる）
+class APIConnectionError(Exception):
+    pass
+
+
+class ServerNotFoundError(Exception):
+    pass
+
+
+@pytest.mark.parametrize("error", [
+    ConnectionResetError(),
+    TimeoutError(),
+    APIConnectionError("connection refused"),
+    ServerNotFoundError("dns"),
+    http_error(500),
+    http_error(503),
+    http_error(408),
+    http_error(429),
+    http_error(403, json.dumps({"error": {"errors": [{"reason": "quotaExceeded"}]}}).encode()),
+])
+def test_outages(error):
+    assert is_outage(error)
+
+
+@pytest.mark.parametrize("error", [
+    RateLimitTimeoutError("待機打ち切り"),
+    KeyError("choices"),
+    ValueError("JSONDecodeError"),
+    http_error(400),
+    http_error(403, b"commentsDisabled"),
+    http_error(404),
+    CassetteMissError("記録がありません"),
+    CassetteReplayError("APIConnectionError", "connection refused"),
+])
+def test_not_outages(error):
+    assert not is_outage(error)
+
+
+def test_local_failures_do_not_open_the_breaker():
+    breaker = CircuitBreaker("test.local", failure_threshold=2, reset_sec=60)
+    for _ in range(5):
+        with pytest.raises(KeyError):
+            breaker.call(lambda: {}["missing"])
+    assert breaker.state == CLOSED
+
+
+def test_outages_open_the_breaker():
+    breaker = CircuitBreaker("test.outage", failure_threshold=2, reset_sec=60)
+    for _ in range(2):
+        with pytest.raises(ConnectionResetError):
+            breaker.call(lambda: (_ for _ in ()).throw(ConnectionResetError()))
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "not called")
+
+
+def fail_with(error):
+    def fn():
+        raise error
+    return fn
+
+
+def test_interrupted_probe_does_not_wedge_the_breaker():
+    breaker = CircuitBreaker("test.interrupt", failure_threshold=1, reset_sec=0)
+    with pytest.raises(ConnectionResetError):
+        breaker.call(fail_with(ConnectionResetError()))
+    assert breaker.state == OPEN
+    # 試し呼び出しが中断されても、次の呼び出しで改めて試せる
+    with pytest.raises(KeyboardInterrupt):
+        breaker.call(fail_with(KeyboardInterrupt()))
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_shared_breaker_logs_to_stderr(capsys):
+    breaker = get_breaker("test.stderr")
+    breaker.failure_threshold = 1
+    with pytest.raises(ConnectionResetError):
+        breaker.call(fail_with(ConnectionResetError()))
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "test.stderr" in captured.err
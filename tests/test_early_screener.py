@@ -0,0 +1,51 @@
+"""早期スクリーニング: バッチ判定で確定できないスロットの個別判定へのフォールバック"""
+from config.prompt_template import COMMENT_SCREENING_BATCH_PREFIX
+from src.early_screener import EarlyScreener
+from src.model_router import ModelRouter
+from src.utils import ProgressLogger
+
+
+class FakeRouter(ModelRouter):
+    """バッチ判定は固定のスロット、個別判定は動画ごとの固定結果を返すルーター"""
+
+    def __init__(self, slots, single):
+        self.escalation_margin = 1.0
+        self.min_confidence = 0.6
+        self.slots = slots
+        self.single = single
+        self.single_calls = []
+
+    def complete(self, stage, messages, **kwargs):
+        if messages[0]["content"] == COMMENT_SCREENING_BATCH_PREFIX:
+            return {"result": {"results": self.slots}, "model": "cheap"}
+        video_id = next(v for v in self.single if v in messages[1]["content"])
+        self.single_calls.append(video_id)
+        return {"result": self.single[video_id], "model": "cheap"}
+
+
+def videos(*ids):
+    return [
+        {"video_info": {"video_id": vid, "title": f"動画{vid}"}, "comments": ["草", "わかる"]}
+        for vid in ids
+    ]
+
+
+def screen(router, ids):
+    return EarlyScreener(ProgressLogger(verbose=False), router=router).screen_batch(videos(*ids))
+
+
+def test_numeric_string_scores_are_coerced():
+    router = FakeRouter({"a1": {"score": "9", "passed": True}, "b2": {"score": 2, "passed": False}}, {})
+    results = screen(router, ["a1", "b2"])
+    assert [(r["score"], r["passed"]) for r in results] == [(9.0, True), (2, False)]
+    assert router.single_calls == []
+
+
+def test_invalid_scores_fall_back_to_single_screening():
+    router = FakeRouter(
+        {"a1": {"score": "高い", "passed": True}, "b2": {"score": None}, "c3": {"score": 9, "passed": True}},
+        {"a1": {"score": 8, "passed": True}, "b2": {"score": 3, "passed": False}}
+    )
+    results = screen(router, ["a1", "b2", "c3"])
+    assert router.single_calls == ["a1", "b2"]
+    assert [r["passed"] for r in results] == [True, False, True]
@@ -0,0 +1,103 @@
+"""ジョブキュー: リース・nackのバックオフ・リース期限切れの再取得"""
+import pytest
+from src import job_queue
+from src.job_queue import DONE, FAILED, LEASED, QUEUED, JobQueue
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(job_queue.time, "time", clock.time)
+    return clock
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch, clock):
+    monkeypatch.setenv("JOB_LEASE_SEC", "30")
+    monkeypatch.setenv("JOB_MAX_ATTEMPTS", "2")
+    monkeypatch.setenv("JOB_RETRY_BACKOFF_SEC", "10")
+    return JobQueue(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_enqueue_is_idempotent_per_key(queue):
+    first = queue.enqueue("screen", {"video_id": "a"}, group="g", key="screen:a")
+    assert queue.enqueue("screen", {"video_id": "a"}, group="g", key="screen:a") == first
+    assert queue.pending() == 1
+
+
+def test_lease_is_exclusive_and_ack_needs_the_lease(queue):
+    job_id = queue.enqueue("screen", {"video_id": "a"})
+    job = queue.lease(["screen"], "w1")
+    assert job["id"] == job_id and job["payload"] == {"video_id": "a"} and job["attempts"] == 1
+    assert queue.lease(["screen"], "w2") is None
+    assert not queue.ack(job_id, "w2")
+    assert queue.ack(job_id, "w1", {"ok": True})
+    assert queue.stats() == {"screen": {DONE: 1}}
+
+
+def test_lease_filters_by_kind_and_priority(queue):
+    queue.enqueue("analyze", {"n": 1})
+    low = queue.enqueue("screen", {"n": 2}, priority=0)
+    high = queue.enqueue("screen", {"n": 3}, priority=5)
+    assert queue.lease(["screen"], "w1")["id"] == high
+    assert queue.lease(["screen"], "w1")["id"] == low
+    assert queue.lease(["screen"], "w1") is None
+
+
+def test_nack_backs_off_then_fails_after_max_attempts(queue, clock):
+    job_id = queue.enqueue("screen", {})
+    queue.lease(["screen"], "w1")
+    assert queue.nack(job_id, "w1", "boom")
+    assert queue.stats() == {"screen": {QUEUED: 1}}
+    # バックオフ中は取得できない
+    clock.now += 9
+    assert queue.lease(["screen"], "w1") is None
+    clock.now += 2
+    assert queue.lease(["screen"], "w1")["attempts"] == 2
+    assert queue.nack(job_id, "w1", "boom again")
+    assert queue.stats() == {"screen": {FAILED: 1}}
+    assert queue.failures()[0]["error"] == "boom again"
+    assert queue.pending() == 0
+
+
+def test_nack_without_the_lease_is_ignored(queue):
+    job_id = queue.enqueue("screen", {})
+    queue.lease(["screen"], "w1")
+    assert not queue.nack(job_id, "w2", "not mine")
+    assert queue.stats() == {"screen": {LEASED: 1}}
+
+
+def test_expired_lease_is_taken_over_and_old_owner_loses_it(queue, clock):
+    job_id = queue.enqueue("screen", {})
+    queue.lease(["screen"], "w1")
+    clock.now += 20
+    assert queue.heartbeat(job_id, "w1")
+    # 延長したので最初の期限を過ぎても再取得されない
+    clock.now += 20
+    assert queue.lease(["screen"], "w2") is None
+    clock.now += 11
+    job = queue.lease(["screen"], "w2")
+    assert job["id"] == job_id and job["attempts"] == 2
+    assert not queue.heartbeat(job_id, "w1")
+    assert not queue.ack(job_id, "w1")
+    assert queue.ack(job_id, "w2")
+
+
+def test_expired_lease_without_attempts_left_fails(queue, clock):
+    job_id = queue.enqueue("screen", {})
+    queue.lease(["screen"], "w1")
+    clock.now += 31
+    queue.lease(["screen"], "w2")
+    clock.now += 31
+    assert queue.lease(["screen"], "w3") is None
+    failures = queue.failures()
+    assert [f["id"] for f in failures] == [job_id]
+    assert failures[0]["error"] == "リース期限切れ（ワーカー停止）"
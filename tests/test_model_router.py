@@ -0,0 +1,112 @@
+"""モデルルーター: 昇格先のサーキットブレーカーが開いているときのカスケード"""
+import itertools
+import json
+from types import SimpleNamespace as NS
+import pytest
+from src.circuit_breaker import CircuitOpenError, get_breaker
+from src.model_router import ModelRouter
+from src.rate_limiter import RateLimiter, set_rate_limiter
+
+_ids = itertools.count()
+
+
+class ServerError(Exception):
+    status_code = 503
+
+
+class FakeClient:
+    """モデルごとに応答（dict）または送出する例外を返すチャットクライアント"""
+
+    def __init__(self, replies):
+        self.replies = replies
+        self.calls = []
+        self.chat = NS(completions=NS(create=self.create))
+
+    def create(self, model, messages, **kwargs):
+        self.calls.append(model)
+        reply = self.replies[model]
+        if isinstance(reply, Exception):
+            raise reply
+        return NS(
+            choices=[NS(message=NS(content=json.dumps(reply)))],
+            usage=NS(prompt_tokens=10, completion_tokens=5, prompt_tokens_details=NS(cached_tokens=0))
+        )
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit():
+    set_rate_limiter(RateLimiter(enabled=False))
+    yield
+    set_rate_limiter(None)
+
+
+@pytest.fixture
+def models():
+    """テストごとに別名のモデル（ブレーカーはプロセス共通のため）"""
+    n = next(_ids)
+    return f"cheap-{n}", f"strong-{n}"
+
+
+def open_breaker(model):
+    breaker = get_breaker(f"chat:{model}")
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(ServerError):
+            breaker.call(lambda: (_ for _ in ()).throw(ServerError("down")))
+    assert not breaker.available
+
+
+def route(client, models):
+    router = ModelRouter(client=client, routing_table={"screening": list(models)})
+    return router.complete(
+        "screening", [{"role": "user", "content": "x"}],
+        validate=lambda r: isinstance(r, dict) and "score" in r,
+        is_borderline=lambda r: r["score"] == 7
+    )
+
+
+def test_escalates_when_borderline(models):
+    cheap, strong = models
+    client = FakeClient({cheap: {"score": 7}, strong: {"score": 9}})
+    routed = route(client, models)
+    assert (routed["model"], routed["result"], routed["degraded"]) == (strong, {"score": 9}, False)
+
+
+def test_open_escalation_target_returns_lower_tier_result(models):
+    cheap, strong = models
+    open_breaker(strong)
+    client = FakeClient({cheap: {"score": 7}, strong: {"score": 9}})
+
+    routed = route(client, models)
+
+    assert client.calls == [cheap]
+    assert (routed["model"], routed["result"], routed["degraded"]) == (cheap, {"score": 7}, True)
+
+
+def test_failed_escalation_returns_lower_tier_result(models):
+    cheap, strong = models
+    client = FakeClient({cheap: {"score": 7}, strong: ServerError("boom")})
+
+    routed = route(client, models)
+
+    assert (routed["model"], routed["degraded"]) == (cheap, True)
+
+
+def test_open_lower_tier_is_skipped(models):
+    cheap, strong = models
+    open_breaker(cheap)
+    client = FakeClient({cheap: {"score": 9}, strong: {"score": 9}})
+
+    routed = route(client, models)
+
+    assert client.calls == [strong]
+    assert (routed["model"], routed["degraded"]) == (strong, False)
+
+
+def test_raises_when_no_tier_produced_a_result(models):
+    cheap, strong = models
+    open_breaker(strong)
+    # スキーマ不一致の結果は代用しない
+    client = FakeClient({cheap: {"unexpected": 1}, strong: {"score": 9}})
+
+    with pytest.raises(CircuitOpenError):
+        route(client, models)
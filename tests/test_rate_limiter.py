@@ -0,0 +1,59 @@
+"""レート制限: 429の再試行とスパンへの記録"""
+import pytest
+from src.rate_limiter import RateLimiter, get_rate_limiter, set_rate_limiter
+from src.tracing import Tracer
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_RETRY_BASE_SEC", "0")
+    return RateLimiter(enabled=False)
+
+
+def flaky(failures):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise RateLimited("slow down")
+        return "ok"
+    return fn, calls
+
+
+def test_retries_are_recorded_on_the_caller_span(limiter, tmp_path):
+    tracer = Tracer(enabled=True, trace_file=str(tmp_path / "traces.jsonl"))
+    fn, calls = flaky(2)
+
+    with tracer.span("llm.attempt", tier=0) as span:
+        assert limiter.call_openai("gpt-test", 0, fn) == "ok"
+
+    assert len(calls) == 3
+    assert span.attributes["retry_count"] == 2
+    assert [e["name"] for e in span.events if e["name"] != "log"] == ["rate_limit_retry"] * 2
+
+
+def test_gives_up_after_max_retries(limiter, monkeypatch):
+    limiter.max_retries = 1
+    fn, calls = flaky(5)
+    with pytest.raises(RateLimited):
+        limiter.call_openai("gpt-test", 0, fn)
+    assert len(calls) == 2
+
+
+def test_shared_limiter_logs_to_stderr(monkeypatch, capsys):
+    monkeypatch.setenv("RATE_LIMIT_ENABLED", "false")
+    monkeypatch.setenv("RATE_LIMIT_RETRY_BASE_SEC", "0")
+    set_rate_limiter(None)
+    try:
+        fn, _ = flaky(1)
+        assert get_rate_limiter().call_openai("gpt-test", 0, fn) == "ok"
+    finally:
+        set_rate_limiter(None)
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "429" in captured.err
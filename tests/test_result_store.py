@@ -0,0 +1,52 @@
+"""結果ストア: ネタの形式が崩れていてもネタパックを失わない"""
+import pytest
+from src.result_store import ResultStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setenv("RESULT_STORE_ENABLED", "true")
+    return ResultStore(path=str(tmp_path / "results.sqlite3"))
+
+
+def make_result(video_id, analysis):
+    return {
+        "video_info": {"video_id": video_id, "title": "タイトル", "channel_title": "ch", "url": "u"},
+        "screening_result": {"score": 8},
+        "evaluation": {"total_score": 8.5, "passed": True},
+        "analysis": analysis,
+        "attempts": 1
+    }
+
+
+def test_scene_as_dict(store):
+    item = {"元コメント": "c", "構文タグ": "差別", "ツッコミ例": "t",
+            "関連シーン": {"タイムスタンプ": "0:15", "シーン説明": "d", "関連度": "8"}}
+    assert store.add_result(make_result("vid00000001", [item]))
+
+    [row] = store.search(tag="差別")
+    assert row["関連シーン"] == {"タイムスタンプ": "0:15", "シーン説明": "d", "関連度": 8.0}
+
+
+def test_scene_as_string_is_kept_as_description(store):
+    item = {"元コメント": "c", "構文タグ": "差別", "ツッコミ例": "t", "関連シーン": "0:32"}
+    assert store.add_result(make_result("vid00000002", [item]))
+
+    assert store.get_result("vid00000002")["analysis"] == [item]
+    [row] = store.search(tag="差別")
+    assert row["関連シーン"]["シーン説明"] == "0:32"
+    assert row["関連シーン"]["タイムスタンプ"] is None
+
+
+def test_malformed_item_does_not_drop_pack(store):
+    good = {"元コメント": "good", "構文タグ": "差別"}
+    assert store.add_result(make_result("vid00000003", ["壊れたネタ", good]))
+
+    assert store.get_result("vid00000003") is not None
+    assert [row["元コメント"] for row in store.search()] == ["good"]
+
+
+def test_disabled_store_reports_not_saved(tmp_path, monkeypatch):
+    monkeypatch.setenv("RESULT_STORE_ENABLED", "false")
+    store = ResultStore(path=str(tmp_path / "results.sqlite3"))
+    assert store.add_result(make_result("vid00000004", [])) is False
@@ -0,0 +1,44 @@
+"""実行ジャーナル: 中断した書き込みからの再開"""
+import pytest
+from src.run_journal import RunJournal, RunNotFoundError
+
+
+def write_journal(tmp_path, *steps):
+    journal = RunJournal(run_id="run", directory=str(tmp_path), enabled=True)
+    for step in steps:
+        journal.record(step, {"value": step}, "vid00000001")
+    journal.close()
+    return journal.path
+
+
+def test_resume_restores_records(tmp_path):
+    write_journal(tmp_path, "a", "analysis", "analysis")
+    journal = RunJournal.resume("run", directory=str(tmp_path))
+
+    assert journal.lookup("a", "vid00000001") == (True, {"value": "a"})
+    assert journal.entries("analysis", "vid00000001") == [{"value": "analysis"}] * 2
+    assert journal.lookup("a") == (False, None)
+
+
+def test_resume_after_truncated_last_line_keeps_new_records(tmp_path):
+    path = write_journal(tmp_path, "a", "b")
+    with open(path, "rb") as f:
+        content = f.read()
+    # 最終行の書き込み途中で落ちた状態
+    with open(path, "wb") as f:
+        f.write(content[:-10])
+
+    journal = RunJournal.resume("run", directory=str(tmp_path))
+    assert journal.lookup("a", "vid00000001")[0]
+    assert journal.lookup("b", "vid00000001") == (False, None)
+    journal.record("c", {"value": "c"}, "vid00000001")
+    journal.close()
+
+    resumed = RunJournal.resume("run", directory=str(tmp_path))
+    assert resumed.lookup("a", "vid00000001") == (True, {"value": "a"})
+    assert resumed.lookup("c", "vid00000001") == (True, {"value": "c"})
+
+
+def test_resume_unknown_run(tmp_path):
+    with pytest.raises(RunNotFoundError):
+        RunJournal.resume("missing", directory=str(tmp_path))
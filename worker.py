@@ -0,0 +1,79 @@
+"""
+ジョブキュー・ステージワーカー CLI
+入力文章をキューに投入し、ステージ単位のワーカーを複数プロセス・複数ホストで実行する
+
+  python worker.py enqueue "炎上している女性ドライバーの事故動画"
+  python worker.py run                          # 全ステージを担当
+  python worker.py run --stages transcribe      # Whisper文字起こしだけを担当
+  python worker.py status
+"""
+import argparse
+import json
+import sys
+from src.job_queue import JobQueue
+from src.stage_worker import STAGES, StageWorker, enqueue_input
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='YouTube Comment Analyzer - ジョブキュー・ステージワーカー'
+    )
+    parser.add_argument('--queue', type=str, help='ジョブキューのファイル（省略時は JOB_QUEUE_PATH）')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enqueue_parser = subparsers.add_parser('enqueue', help='入力文章をキューに投入')
+    enqueue_parser.add_argument('query', type=str, nargs='+', help='探したいネタ（複数指定可）')
+
+    run_parser = subparsers.add_parser('run', help='ワーカーを起動（何プロセスでも起動可）')
+    run_parser.add_argument(
+        '--stages',
+        type=str,
+        nargs='+',
+        choices=STAGES,
+        help=f'担当するステージ（省略時は全ステージ: {" ".join(STAGES)}）'
+    )
+    run_parser.add_argument('--worker-id', type=str, help='ワーカーID（省略時はホスト名:プロセスID）')
+    run_parser.add_argument('--exit-when-idle', action='store_true', help='担当ステージのジョブがなくなったら終了')
+    run_parser.add_argument('--max-jobs', type=int, help='この件数を処理したら終了')
+    run_parser.add_argument('--quiet', action='store_true', help='詳細ログを非表示')
+
+    status_parser = subparsers.add_parser('status', help='ステージ別のジョブ数と失敗したジョブを表示')
+    status_parser.add_argument('--group', type=str, help='投入IDで絞り込み')
+
+    args = parser.parse_args()
+    queue = JobQueue(args.queue)
+
+    if args.command == 'enqueue':
+        for query in args.query:
+            group = enqueue_input(queue, query)
+            print(f"📥 投入しました: {group} {query}")
+        return 0
+
+    if args.command == 'run':
+        worker = StageWorker(queue, stages=args.stages, worker_id=args.worker_id, verbose=not args.quiet)
+        try:
+            worker.run(exit_when_idle=args.exit_when_idle, max_jobs=args.max_jobs)
+        except KeyboardInterrupt:
+            # 実行中のジョブはリース期限切れ後に他のワーカーが再実行する
+            print("\n⚠️  中断されました", file=sys.stderr)
+            return 130
+        return 0 if worker.failed == 0 else 1
+
+    stats = queue.stats(args.group)
+    if not stats:
+        print("⚠️  ジョブがありません")
+        return 0
+    print(f"📊 ジョブ数{f'（{args.group}）' if args.group else ''}")
+    for kind in STAGES:
+        if kind in stats:
+            print(f"  {kind:<11} {json.dumps(stats[kind], ensure_ascii=False)}")
+    failures = queue.failures(args.group)
+    if failures:
+        print(f"\n❌ 失敗したジョブ（{len(failures)}件）")
+        for job in failures:
+            print(f"  #{job['id']} {job['kind']} [{job['job_group']}] 試行{job['attempts']}回: {job['error']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())